@@ -0,0 +1,37 @@
+"""Debug endpoints serving stored request profiles, only mounted when profiling is configured"""
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.core.profiling import get_profile_store, has_profiling_key
+
+
+def require_profiling_key(request: Request) -> None:
+    if not has_profiling_key(request.headers):
+        raise HTTPException(status_code=403, detail="Profiling key required")
+
+
+router = APIRouter(prefix="/debug/profiles", tags=["debug"], dependencies=[Depends(require_profiling_key)])
+
+
+@router.get("")
+async def list_profiles():
+    """List stored profiles, newest first"""
+    profiles = get_profile_store().summaries()
+    return {
+        "success": True,
+        "count": len(profiles),
+        "profiles": profiles
+    }
+
+
+@router.get("/{profile_id}")
+async def get_profile(profile_id: str):
+    """Get one stored profile by correlation id"""
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return {
+        "success": True,
+        "profile": profile
+    }
@@ -0,0 +1,108 @@
+"""Match endpoints"""
+
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.fieldsets import Selection, sparse_fields
+from app.core.http_cache import Validators, is_not_modified, make_etag, not_modified, with_cache_headers
+from app.core.serialization import ORJSONResponse
+from app.db.session import get_db
+from app.schemas.match import MatchDetailResponse, MatchListResponse
+from app.services.matches import (
+    MatchFilters,
+    PayloadVersion,
+    decode_cursor,
+    fetch_match_page,
+    get_match_detail,
+    get_match_version,
+    page_version,
+    serialize_list_row,
+)
+from app.services.reference import get_reference_cache
+
+router = APIRouter(prefix="/api/v1/matches", tags=["matches"])
+
+MatchStatus = Literal["scheduled", "live", "completed", "postponed", "cancelled"]
+
+
+def _validators(version: PayloadVersion, selection: Optional[Selection]) -> tuple[Validators, int]:
+    """Validators and max-age; payloads that can still change are always revalidated"""
+    validators = Validators(make_etag(*version.parts, selection), version.last_modified)
+    return validators, settings.MATCH_CACHE_TTL if version.final else 0
+
+
+@router.get("", response_model=MatchListResponse)
+async def get_matches(
+    request: Request,
+    competition_id: Optional[int] = None,
+    team_id: Optional[int] = None,
+    season: Optional[int] = None,
+    status: Optional[MatchStatus] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    order: Literal["asc", "desc"] = "asc",
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    selection: Optional[Selection] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_db)
+):
+    """List matches, paginated with an opaque cursor"""
+    filters = MatchFilters(
+        competition_id=competition_id,
+        team_id=team_id,
+        season=season,
+        status=status,
+        date_from=date_from,
+        date_to=date_to,
+    )
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    rows, next_cursor = await fetch_match_page(db, filters, limit, after, descending=order == "desc")
+
+    validators, max_age = _validators(page_version(rows, next_cursor), selection)
+    if is_not_modified(request, validators):
+        return not_modified(validators, max_age)
+
+    references = get_reference_cache()
+    matches = [serialize_list_row(row, references, selection) for row in rows]
+    response = ORJSONResponse({
+        "success": True,
+        "count": len(matches),
+        "matches": matches,
+        "next_cursor": next_cursor
+    })
+    return with_cache_headers(response, validators, max_age)
+
+
+@router.get("/{match_id}", response_model=MatchDetailResponse)
+async def get_match(
+    match_id: int,
+    request: Request,
+    selection: Optional[Selection] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get detailed information for a specific match"""
+    version = await get_match_version(db, match_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    validators, max_age = _validators(version, selection)
+    if is_not_modified(request, validators):
+        return not_modified(validators, max_age)
+
+    match = await get_match_detail(db, match_id, selection)
+    if match is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    response = ORJSONResponse({
+        "success": True,
+        "match": match
+    })
+    return with_cache_headers(response, validators, max_age)
@@ -0,0 +1,77 @@
+"""Prediction endpoints"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.fieldsets import Selection, prune, sparse_fields
+from app.core.http_cache import Validators, is_not_modified, make_etag, not_modified, with_cache_headers
+from app.core.serialization import ORJSONResponse
+from app.db.session import get_db
+from app.ml.registry import get_registry
+from app.schemas.prediction import BatchPredictionRequest, BatchPredictionResponse, PredictionResponse
+from app.services.matches import get_match_version
+from app.services.prediction import ModelNotAvailableError, predict_matches
+
+router = APIRouter(prefix="/api/v1/predictions", tags=["predictions"])
+
+
+@router.post("/batch", response_model=BatchPredictionResponse)
+async def predict_batch(
+    request: BatchPredictionRequest,
+    selection: Optional[Selection] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get ML predictions for a list of matches in one call"""
+    try:
+        predictions, missing = await predict_matches(db, request.match_ids)
+    except ModelNotAvailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return ORJSONResponse({
+        "success": True,
+        "count": len(predictions),
+        "predictions": prune(predictions, selection),
+        "not_found": missing
+    })
+
+
+@router.get("/{match_id}", response_model=PredictionResponse)
+async def get_prediction(
+    match_id: int,
+    request: Request,
+    selection: Optional[Selection] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get ML prediction for a specific match
+
+    The ETag covers the match's inputs and the model version. No
+    Last-Modified is sent since a model swap does not move any timestamp.
+    """
+    version = await get_match_version(db, match_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    loaded = get_registry().peek()
+    if loaded is not None:
+        validators = Validators(make_etag(*version.parts, loaded.version, selection))
+        if is_not_modified(request, validators):
+            return not_modified(validators, settings.PREDICTION_CACHE_TTL)
+
+    try:
+        predictions, _ = await predict_matches(db, [match_id])
+    except ModelNotAvailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    if not predictions:
+        raise HTTPException(status_code=404, detail="Match not found")
+
+    prediction = predictions[0]
+    validators = Validators(make_etag(*version.parts, prediction["model_version"], selection))
+    response = ORJSONResponse({
+        "success": True,
+        "prediction": prune(prediction, selection)
+    })
+    return with_cache_headers(response, validators, settings.PREDICTION_CACHE_TTL)
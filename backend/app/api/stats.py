@@ -0,0 +1,62 @@
+"""Team statistics endpoints backed by the materialised stats table"""
+
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.fieldsets import Selection, prune, sparse_fields
+from app.core.http_cache import Validators, is_not_modified, make_etag, not_modified, with_cache_headers
+from app.core.serialization import ORJSONResponse
+from app.db.session import get_db
+from app.schemas.stats import TeamStatsResponse
+from app.services.cache import STATS, get_cache, stats_key
+from app.services.reference import get_reference_cache
+from app.services.team_stats import get_team_stats
+
+router = APIRouter(prefix="/api/v1/stats", tags=["stats"])
+
+
+@router.get("/team/{team_id}", response_model=TeamStatsResponse)
+async def get_team_statistics(
+    team_id: int,
+    request: Request,
+    season: Optional[int] = None,
+    selection: Optional[Selection] = Depends(sparse_fields),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get team statistics for a season (latest season by default)
+
+    The cached entry keeps the row's ``updated_at`` next to the payload so
+    conditional requests are answered without touching the payload.
+    """
+
+    async def load_stats():
+        stats = await get_team_stats(db, team_id, season)
+        if stats is None:
+            return None
+        payload = stats.to_dict()
+        references = get_reference_cache()
+        await references.ensure(db, team_ids=(team_id,))
+        team = references.team(team_id)
+        payload["team_name"] = team.name if team else None
+        return {"stats": payload, "updated_at": stats.updated_at.isoformat()}
+
+    entry = await get_cache().get_or_load(STATS, stats_key(team_id, season), load_stats)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Team statistics not found")
+
+    payload = entry["stats"]
+    validators = Validators(
+        make_etag(team_id, payload["season"], entry["updated_at"], payload["team_name"], selection),
+        datetime.fromisoformat(entry["updated_at"])
+    )
+    if is_not_modified(request, validators):
+        return not_modified(validators, settings.STATS_CACHE_TTL)
+
+    response = ORJSONResponse({
+        "success": True,
+        "stats": prune(payload, selection)
+    })
+    return with_cache_headers(response, validators, settings.STATS_CACHE_TTL)
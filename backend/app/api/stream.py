@@ -0,0 +1,113 @@
+"""Push endpoints streaming live score and prediction changes"""
+
+import asyncio
+import json
+from typing import AsyncGenerator, Optional
+
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.services.broadcast import get_hub
+
+router = APIRouter(prefix="/api/v1/stream", tags=["stream"])
+
+
+def _parse_match_ids(match_ids: Optional[str]) -> Optional[set[int]]:
+    """Parse a comma separated list of match ids, None meaning all matches"""
+    if not match_ids:
+        return None
+    return {int(match_id) for match_id in match_ids.split(",") if match_id.strip()}
+
+
+def _parse_subscription_message(text: str) -> Optional[set[int]]:
+    """Parse a ``{"match_ids": [...]}`` message from a WebSocket client
+
+    Raises:
+        json.JSONDecodeError: The message is not JSON
+        ValueError: The message does not have the expected shape
+    """
+    message = json.loads(text)
+    if not isinstance(message, dict) or "match_ids" not in message:
+        raise ValueError("Expected an object with match_ids")
+    ids = message["match_ids"]
+    if ids is None:
+        return None
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError("match_ids must be a list of integers or null")
+    return set(ids)
+
+
+async def _sse_events(match_ids: Optional[set[int]]) -> AsyncGenerator[str, None]:
+    # Subscribed here, not in the endpoint, so the finally block below always
+    # runs for it, even when the client leaves before the first event
+    subscription = get_hub().subscribe(match_ids)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            data = await subscription.get(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+            # Comment lines keep proxies from closing idle connections
+            yield f"data: {data}\n\n" if data is not None else ": ping\n\n"
+    finally:
+        get_hub().unsubscribe(subscription)
+
+
+@router.get("/matches")
+async def stream_matches(match_ids: Optional[str] = Query(None, description="Comma separated match ids")):
+    """Server-sent events stream of score and prediction deltas"""
+    try:
+        ids = _parse_match_ids(match_ids)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="match_ids must be comma separated integers")
+
+    return StreamingResponse(
+        _sse_events(ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def stream_matches_ws(websocket: WebSocket, match_ids: Optional[str] = None):
+    """WebSocket stream of score and prediction deltas
+
+    Clients may send ``{"match_ids": [1, 2]}`` (or ``null`` for all matches)
+    to change their subscription.
+    """
+    try:
+        ids = _parse_match_ids(match_ids)
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = get_hub().subscribe(ids)
+
+    async def send() -> None:
+        while True:
+            data = await subscription.get(timeout=settings.STREAM_HEARTBEAT_SECONDS)
+            await websocket.send_text(data if data is not None else '{"type":"ping"}')
+
+    async def receive() -> None:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                subscription.match_ids = _parse_subscription_message(text)
+            except json.JSONDecodeError:
+                await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+                return
+            except ValueError:
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                return
+
+    tasks = [asyncio.create_task(send()), asyncio.create_task(receive())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            exception = task.exception()
+            if exception is not None and not isinstance(exception, WebSocketDisconnect):
+                raise exception
+    finally:
+        for task in tasks:
+            task.cancel()
+        get_hub().unsubscribe(subscription)
@@ -0,0 +1,159 @@
+"""Response compression middleware (brotli when available, gzip otherwise)
+
+Only complete, single-message bodies above a size threshold are compressed;
+streamed responses such as the SSE feed pass through untouched. Every
+response that could have been compressed, and every 304, carries
+``Vary: Accept-Encoding`` whether or not it was, so shared caches keep the
+variants apart. Brotli needs the optional ``brotli`` package.
+"""
+
+import gzip
+from typing import Any, Optional
+
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/", "application/problem+json")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header"""
+    accepted: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+
+    def allowed(encoding: str) -> bool:
+        return accepted.get(encoding, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def _content_type(headers: list[tuple[bytes, bytes]]) -> str:
+    for name, value in headers:
+        if name.lower() == b"content-type":
+            return value.decode("latin-1").lower()
+    return ""
+
+
+def _is_compressible(content_type: str) -> bool:
+    return content_type.startswith(_COMPRESSIBLE_TYPES) and not content_type.startswith("text/event-stream")
+
+
+def with_vary(headers: list[tuple[bytes, bytes]]) -> list[tuple[bytes, bytes]]:
+    """Headers with Accept-Encoding merged into Vary"""
+    merged = []
+    found = False
+    for name, value in headers:
+        if name.lower() == b"vary":
+            found = True
+            fields = {field.strip().lower() for field in value.split(b",")}
+            if b"accept-encoding" not in fields and b"*" not in fields:
+                value = value + b", Accept-Encoding"
+        merged.append((name, value))
+    if not found:
+        merged.append((b"vary", b"Accept-Encoding"))
+    return merged
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.GZIP_COMPRESSION_LEVEL)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON and text responses"""
+
+    def __init__(self, app: Any, minimum_size: int = 1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope["headers"])
+        encoding = choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            async def send_identity(message) -> None:
+                if message["type"] == "http.response.start" and self._varies(message):
+                    message = {**message, "headers": with_vary(message.get("headers", []))}
+                await send(message)
+
+            await self.app(scope, receive, send_identity)
+            return
+
+        start_message = None
+
+        async def send_compressed(message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held back until the first body chunk shows whether to compress
+                start_message = message
+                return
+
+            if start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not self._should_compress(start, body):
+                if self._varies(start):
+                    start = {**start, "headers": with_vary(start.get("headers", []))}
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            response_headers = []
+            for name, value in start["headers"]:
+                lowered = name.lower()
+                if lowered == b"content-length":
+                    continue
+                if lowered == b"etag" and not value.startswith(b"W/"):
+                    # The compressed bytes differ from the identity representation
+                    value = b"W/" + value
+                response_headers.append((name, value))
+            response_headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+            ]
+            response_headers = with_vary(response_headers)
+            await send({**start, "headers": response_headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _varies(start: dict) -> bool:
+        """Whether the response depends on Accept-Encoding
+
+        A 304 has no content type but revalidates a representation that may
+        have been compressed.
+        """
+        return start["status"] == 304 or _is_compressible(_content_type(start.get("headers", [])))
+
+    def _should_compress(self, start: dict, body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        if any(name.lower() == b"content-encoding" for name, _ in start["headers"]):
+            return False
+        return _is_compressible(_content_type(start["headers"]))
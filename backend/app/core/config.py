@@ -18,6 +18,10 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = 10
     DB_MAX_OVERFLOW: int = 20
     DB_ECHO: bool = False
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # recycle connections older than 30 minutes
+    DB_POOL_PRE_PING: bool = True
+    SQL_QUERY_BUDGET: Optional[int] = None  # fail requests issuing more statements (tests/local only)
     
     # External API Configuration
     FOOTBALL_API_KEY: str = ""
@@ -25,16 +29,38 @@ class Settings(BaseSettings):
     REAL_MADRID_TEAM_ID: int = 541
     EXTERNAL_API_TIMEOUT: int = 10
     EXTERNAL_API_MAX_RETRIES: int = 3
+    EXTERNAL_API_MAX_CONNECTIONS: int = 20
+    EXTERNAL_API_RATE_PER_SECOND: float = 5.0
+    EXTERNAL_API_BURST: int = 10
+    EXTERNAL_API_BACKOFF_BASE: float = 0.5  # seconds, doubled per retry
+    EXTERNAL_API_BACKOFF_MAX: float = 30.0
+    EXTERNAL_API_VALIDATOR_TTL: int = 604800  # ETags/content hashes older than 7 days are ignored, forcing a full fetch
     
     # ML Configuration
-    MODEL_PATH: str = "models/prediction_model.pkl"
+    MODEL_PATH: str = "models/prediction_model.pkl"  # legacy single-file model, used when the registry is empty
+    MODEL_VERSION: str = "v1.0.0"  # version reported for the legacy model
+    MODEL_REGISTRY_DIR: str = "models"
+    MODEL_NAME: str = "match_outcome"
+    MODEL_RELOAD_CHECK_SECONDS: int = 30
+    PREDICTION_HISTORY_SEASONS: int = 3  # seasons of history used to build prediction features
+    SCORELINE_MODEL_NAME: str = "scoreline"  # Dixon-Coles model, fallback while the classifier is not loaded
+    SCORELINE_HALF_LIFE_DAYS: float = 180.0  # weight of a match halves every this many days
+    ELO_INITIAL_RATING: float = 1500.0
+    ELO_HOME_ADVANTAGE: float = 65.0  # rating points added to the home side's expectation
+    ELO_K_FACTORS: dict[int, float] = {1: 30.0, 2: 25.0, 3: 20.0}  # K per Competition.tier
+    ELO_DEFAULT_K: float = 20.0  # competitions without a configured tier, e.g. cups
+    ELO_REFRESH_SECONDS: int = 60  # poll for results written by other workers; also caps the replay retry delay
     MIN_TRAINING_SAMPLES: int = 100
-    RETRAIN_THRESHOLD_ACCURACY: float = 0.50
+    RETRAIN_THRESHOLD_ACCURACY: float = 0.50  # walk-forward accuracy a new model needs to be activated
+    FEATURE_STORE_DIR: str = "models/features"  # cached training feature matrices
+    TRAINING_CV_SPLITS: int = 5  # walk-forward folds
+    TRAINING_WORKERS: Optional[int] = None  # processes for cross-validation, defaults to all cores but one
     
     # Security Configuration
     API_KEY_HEADER: str = "X-API-Key"
     RATE_LIMIT_PER_MINUTE: int = 100
     ALLOWED_ORIGINS: list[str] = ["*"]
+    PROFILING_API_KEY: Optional[str] = None  # API key allowed to request profiles with the profiling header
     
     # Cache Configuration
     REDIS_URL: Optional[str] = None
@@ -42,15 +68,56 @@ class Settings(BaseSettings):
     PREDICTION_CACHE_TTL: int = 300  # 5 minutes
     MATCH_CACHE_TTL: int = 3600  # 1 hour
     STATS_CACHE_TTL: int = 1800  # 30 minutes
+    LOCAL_CACHE_MAX_ENTRIES: int = 10000
+    LOCAL_CACHE_TTL_SECONDS: int = 30  # caps in-process staleness when Redis is shared
+    REFERENCE_REFRESH_SECONDS: int = 60  # poll for team/competition rows changed by other workers
+
+    # Response Configuration
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes; smaller bodies are sent uncompressed
+    GZIP_COMPRESSION_LEVEL: int = 5
+    BROTLI_QUALITY: int = 4  # 0-11, low values keep compression cheap per request
+
+    # Metrics Configuration
+    METRICS_ENABLED: bool = True
+    METRICS_SAMPLE_RATE: float = 0.1  # share of requests whose SQL time is measured
+
+    # Profiling Configuration (the middleware is not installed unless a key or sample rate is set)
+    PROFILING_HEADER: str = "X-Profile"
+    PROFILING_SAMPLE_RATE: float = 0.0  # share of all requests profiled
+    PROFILING_STORE_SIZE: int = 100  # profiles kept in memory
+    PROFILING_TOP_FUNCTIONS: int = 40  # functions listed per profile
+
+    # Streaming Configuration
+    STREAM_QUEUE_SIZE: int = 100  # buffered messages per connection before dropping the oldest
+    STREAM_HEARTBEAT_SECONDS: int = 15
+    STREAM_REDIS_CHANNEL: str = "football:stream"
     
     # Logging Configuration
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"  # json or text
+    LOG_QUEUE_ENABLED: bool = True  # write records from a background thread
+    LOG_QUEUE_SIZE: int = 10000  # queued records before new ones are dropped
+    LOG_SAMPLING: dict[str, float] = {}  # logger name -> share of INFO records kept, e.g. {"app.access": 0.1}
     
     # Background Tasks Configuration
     SYNC_FIXTURES_INTERVAL_HOURS: int = 24
+    SYNC_LEAGUE_IDS: list[int] = [140]  # La Liga
+    INGESTION_BATCH_SIZE: int = 1000  # rows per INSERT ... ON CONFLICT statement
+    INGESTION_CONCURRENCY: int = 4  # league seasons synced at once
     UPDATE_RESULTS_INTERVAL_HOURS: int = 2
+    LIVE_UPDATES_ENABLED: bool = False
+    LIVE_UPDATE_INTERVAL_SECONDS: int = 15
+    LIVE_WINDOW_MINUTES: int = 180  # poll matches that kicked off within this window
     RETRAIN_MODEL_INTERVAL_DAYS: int = 7
+    RETRAIN_MODEL_HOUR: int = 3  # UTC hour of the daily check for a due retrain, off-peak
+    RETRAIN_NICE: int = 10  # niceness added to the training process
+    SCHEDULER_ENABLED: bool = True  # run the background jobs in this process
+    JOB_HISTORY_DAYS: int = 30  # job_runs rows kept per job
+    RETRAIN_TIMEOUT_MINUTES: int = 120  # the training process is killed after this
+    PREDICTION_PREGENERATE_INTERVAL_MINUTES: int = 30
+    PREDICTION_PREGENERATE_DAYS: int = 14  # predict scheduled matches kicking off within this window
+    PREDICTION_PREGENERATE_BATCH_SIZE: int = 500  # fixtures per feature matrix
+    PREDICTION_PREGENERATE_DELAY_SECONDS: int = 10  # wait after match updates so a burst triggers one run
     
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,77 @@
+"""Sparse fieldsets: ``fields=id,home_team.name,score`` prunes response objects
+
+The selection applies to each returned object (a match, a prediction, a team's
+stats), not to the response envelope. Unknown fields are ignored.
+"""
+
+from typing import Any, Optional, Union
+
+from fastapi import HTTPException, Query
+
+# A selection maps a key to True (keep the whole value) or to a nested selection
+Selection = dict[str, Union[bool, "Selection"]]
+
+
+def parse_fields(fields: str) -> Selection:
+    """Parse a comma separated list of dotted paths into a selection tree
+
+    Raises:
+        ValueError: If a path has an empty segment
+    """
+    tree: Selection = {}
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        parts = path.split(".")
+        if not all(parts):
+            raise ValueError(f"Invalid field '{path}'")
+
+        node = tree
+        for part in parts[:-1]:
+            child = node.setdefault(part, {})
+            if child is True:
+                # An ancestor is already selected as a whole
+                break
+            node = child
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def prune(value: Any, selection: Union[bool, Selection, None]) -> Any:
+    """Keep only the selected fields of a value, recursing into dicts and lists"""
+    if selection is None or selection is True:
+        return value
+    if isinstance(value, dict):
+        return {key: prune(value[key], sub) for key, sub in selection.items() if key in value}
+    if isinstance(value, list):
+        return [prune(item, selection) for item in value]
+    return value
+
+
+def selects(selection: Optional[Selection], *path: str) -> bool:
+    """Check if a selection includes the value at a path, or part of it"""
+    node: Union[bool, Selection, None] = selection
+    for part in path:
+        if node is None or node is True:
+            return True
+        if part not in node:
+            return False
+        node = node[part]
+    return True
+
+
+def sparse_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma separated fields to return, dotted for nested ones, e.g. id,home_team.name,score"
+    )
+) -> Optional[Selection]:
+    """Dependency parsing the ``fields`` query parameter"""
+    if not fields:
+        return None
+    try:
+        return parse_fields(fields) or None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
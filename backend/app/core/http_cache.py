@@ -0,0 +1,78 @@
+"""Conditional GET helpers: strong ETags, Last-Modified and Cache-Control
+
+Endpoints compute their validators from ``updated_at`` columns (plus the model
+version for predictions) before building the body, and answer a matching
+``If-None-Match`` / ``If-Modified-Since`` with an empty 304.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag derived from the values the representation depends on"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(_as_utc(dt), usegmt=True)
+
+
+def cache_control(max_age: int) -> str:
+    """Cache-Control value, ``no-cache`` (always revalidate) when max_age is 0"""
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
+
+
+@dataclass(frozen=True)
+class Validators:
+    """Validators of one representation"""
+
+    etag: str
+    last_modified: Optional[datetime] = None
+
+    def headers(self, max_age: int) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": cache_control(max_age)}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = http_date(self.last_modified)
+        return headers
+
+
+def is_not_modified(request: Request, validators: Validators) -> bool:
+    """Check the request's conditional headers against the validators
+
+    ``If-None-Match`` takes precedence over ``If-Modified-Since`` as required
+    by RFC 9110; ETags are compared weakly, as they are for GET.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or validators.etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or validators.last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one second resolution
+    return _as_utc(validators.last_modified).replace(microsecond=0) <= _as_utc(since)
+
+
+def not_modified(validators: Validators, max_age: int) -> Response:
+    return Response(status_code=304, headers=validators.headers(max_age))
+
+
+def with_cache_headers(response: Response, validators: Validators, max_age: int) -> Response:
+    response.headers.update(validators.headers(max_age))
+    return response
@@ -1,18 +1,56 @@
-"""Structured logging configuration with JSON formatting"""
+"""Structured logging configuration with JSON formatting
+
+With ``LOG_QUEUE_ENABLED`` (the default) the request path only puts records on
+a bounded in-memory queue; a ``QueueListener`` thread formats and writes them,
+so a slow stdout or log shipper never stalls the event loop. Records that do
+not fit in the queue are dropped and counted rather than blocking.
+"""
 
 import logging
+import queue
+import random
 import sys
-from typing import Any
-import json
-from datetime import datetime
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
 from pythonjsonlogger import jsonlogger
 
 from app.core.config import settings
+from app.core.metrics import counter
+from app.utils.common import generate_correlation_id
+
+# Correlation id of the request being handled, attached to every record
+correlation_id_var: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+ACCESS_LOGGER = "app.access"
+
+LOG_RECORDS_DROPPED = counter(
+    "log_records_dropped_total", "Log records not written, by reason", ("reason",)
+)
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional[QueueHandler] = None
 
 
 class CustomJsonFormatter(jsonlogger.JsonFormatter):
     """Custom JSON formatter with additional fields"""
-    
+
+    _cached_second: Optional[int] = None
+    _cached_prefix: str = ""
+
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        """ISO timestamp of the record's own creation time
+
+        The second-resolution prefix is shared by every record logged within
+        the same second, so only the milliseconds are formatted per record.
+        """
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._cached_second = second
+        return f"{self._cached_prefix}.{int(record.msecs):03d}Z"
+
     def add_fields(
         self,
         log_record: dict[str, Any],
@@ -21,61 +59,223 @@ class CustomJsonFormatter(jsonlogger.JsonFormatter):
     ) -> None:
         """Add custom fields to log record"""
         super().add_fields(log_record, record, message_dict)
-        
+
         # Add timestamp in ISO format
-        log_record["timestamp"] = datetime.utcnow().isoformat()
-        
+        log_record["timestamp"] = self._timestamp(record)
+
         # Add log level
         log_record["level"] = record.levelname
-        
+
         # Add logger name
         log_record["logger"] = record.name
-        
+
         # Add correlation ID if present
-        if hasattr(record, "correlation_id"):
+        if getattr(record, "correlation_id", None) is not None:
             log_record["correlation_id"] = record.correlation_id
-        
+
         # Add extra fields
         if hasattr(record, "extra"):
             log_record.update(record.extra)
 
 
+class CorrelationIdFilter(logging.Filter):
+    """Attach the current request's correlation id to records that lack one"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "correlation_id", None) is None:
+            correlation_id = correlation_id_var.get()
+            if correlation_id is not None:
+                record.correlation_id = correlation_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a share of INFO and lower records for selected loggers
+
+    Rates are looked up by logger name, then by its parents
+    (``app.access`` -> ``app``). Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            candidate = name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or not self.rates:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        LOG_RECORDS_DROPPED.labels("sampled").inc()
+        return False
+
+
+class BoundedQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full"""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels("overflow").inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Make the record safe to format on another thread
+
+        Unlike the base class this does not run a formatter on the caller's
+        thread: only the message arguments are merged and the traceback is
+        rendered, everything else is left for the listener thread.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return CustomJsonFormatter(
+            "%(timestamp)s %(level)s %(name)s %(message)s"
+        )
+    return logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    )
+
+
 def setup_logging() -> None:
     """Configure application logging"""
-    
+    global _listener, _queue_handler
+    shutdown_logging()
+
     # Get log level from settings
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
-    
+
     # Create root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
-    
+
     # Remove existing handlers
     root_logger.handlers.clear()
-    
+
     # Create console handler
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
-    
-    # Set formatter based on configuration
-    if settings.LOG_FORMAT == "json":
-        formatter = CustomJsonFormatter(
-            "%(timestamp)s %(level)s %(name)s %(message)s"
-        )
+    console_handler.setFormatter(_build_formatter())
+
+    filters = [CorrelationIdFilter()]
+    if settings.LOG_SAMPLING:
+        filters.append(SamplingFilter(settings.LOG_SAMPLING))
+
+    if settings.LOG_QUEUE_ENABLED:
+        # Records are formatted and written on the listener thread
+        queue_handler = BoundedQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+        queue_handler.setLevel(log_level)
+        front_handler: logging.Handler = queue_handler
+        _listener = QueueListener(queue_handler.queue, console_handler, respect_handler_level=True)
+        _listener.start()
+        _queue_handler = queue_handler
     else:
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-    
-    console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
-    
+        front_handler = console_handler
+
+    for log_filter in filters:
+        front_handler.addFilter(log_filter)
+    root_logger.addHandler(front_handler)
+
     # Set log levels for third-party libraries
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("sqlalchemy").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
+def shutdown_logging() -> None:
+    """Stop the listener thread after writing every queued record
+
+    The queue handler is replaced by the listener's own handlers, so records
+    logged afterwards are written directly instead of queued for nobody.
+    """
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    _listener.stop()
+    root_logger = logging.getLogger()
+    if _queue_handler in root_logger.handlers:
+        root_logger.removeHandler(_queue_handler)
+        for handler in _listener.handlers:
+            for log_filter in _queue_handler.filters:
+                handler.addFilter(log_filter)
+            root_logger.addHandler(handler)
+    _listener = None
+    _queue_handler = None
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance with the given name"""
     return logging.getLogger(name)
+
+
+class AccessLogMiddleware:
+    """ASGI middleware assigning a correlation id and writing one access log line per request
+
+    An incoming ``X-Correlation-ID`` header is reused so ids can span
+    services. The line goes to the ``app.access`` logger, which is the usual
+    candidate for ``LOG_SAMPLING``.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self.logger = logging.getLogger(ACCESS_LOGGER)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        correlation_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-correlation-id":
+                correlation_id = value.decode("latin-1")[:64]
+                break
+        correlation_id = correlation_id or generate_correlation_id()
+        scope.setdefault("state", {})["correlation_id"] = correlation_id
+        token = correlation_id_var.set(correlation_id)
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-correlation-id", correlation_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "Request completed",
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "status_code": status_code,
+                        "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    }
+                )
+            correlation_id_var.reset(token)
@@ -0,0 +1,182 @@
+"""Opt-in per-request profiling
+
+A request is profiled when it carries the profiling header together with the
+``PROFILING_API_KEY`` in the ``API_KEY_HEADER``, or when it is picked by
+``PROFILING_SAMPLE_RATE``. The profile (cProfile function stats, wall and CPU
+time, and every SQL statement with its duration) is stored in memory under
+the request's correlation id, returned in the ``X-Profile-Id`` header and
+served by ``/debug/profiles/{id}``.
+
+The middleware is only installed when profiling is configured, so it costs
+nothing otherwise.
+"""
+
+import cProfile
+import hmac
+import io
+import pstats
+import random
+import time
+from collections import OrderedDict
+from itertools import zip_longest
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.logging import correlation_id_var, get_logger
+from app.db.query_guard import QueryStats, current_query_stats, use_query_stats
+from app.utils.common import generate_correlation_id, get_utc_now
+
+logger = get_logger(__name__)
+
+EVENT_STREAM = "text/event-stream"
+
+
+def profiling_enabled() -> bool:
+    return bool(settings.PROFILING_API_KEY) or settings.PROFILING_SAMPLE_RATE > 0
+
+
+def has_profiling_key(headers: Any) -> bool:
+    """Check a request's API key header against PROFILING_API_KEY"""
+    expected = settings.PROFILING_API_KEY
+    provided = headers.get(settings.API_KEY_HEADER.lower())
+    return bool(expected) and provided is not None and hmac.compare_digest(provided, expected)
+
+
+class ProfileStore:
+    """Most recent profiles, keyed by correlation id"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._profiles: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def add(self, profile: dict[str, Any]) -> None:
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def summaries(self) -> list[dict[str, Any]]:
+        keys = ("id", "method", "path", "status_code", "wall_ms", "cpu_ms", "created_at")
+        return [{key: profile[key] for key in keys} for profile in reversed(self._profiles.values())]
+
+
+_store: Optional[ProfileStore] = None
+
+
+def get_profile_store() -> ProfileStore:
+    global _store
+    if _store is None:
+        _store = ProfileStore(settings.PROFILING_STORE_SIZE)
+    return _store
+
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling selected requests
+
+    Only one request is profiled at a time: cProfile hooks the event loop
+    thread, so a concurrent profile would mix both requests. Other coroutines
+    running on the loop during a profiled request still show up in its
+    function stats; wall and SQL timings are attributed exactly.
+
+    Event streams are not profiled: they stay open for hours and would hold
+    the profiler for all of it. Streaming requests are skipped by their
+    ``Accept`` header, and profiling stops when a response turns out to be
+    ``text/event-stream`` anyway.
+    """
+
+    def __init__(self, app: Any, sample_rate: float = 0.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.header = settings.PROFILING_HEADER.lower()
+        self._active = False
+
+    def _requested(self, scope) -> bool:
+        headers = {name.decode("latin-1"): value.decode("latin-1") for name, value in scope["headers"]}
+        if EVENT_STREAM in headers.get("accept", ""):
+            return False
+        if headers.get(self.header) and has_profiling_key(headers):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or self._active or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = correlation_id_var.get() or generate_correlation_id()
+        status_code = 500
+        finished = False
+
+        outer = current_query_stats()
+        stats = QueryStats(capture=True, timed=True)
+        profiler = cProfile.Profile()
+
+        def finish() -> None:
+            """Stop profiling and store the profile, once"""
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            profiler.disable()
+            cpu_time = time.thread_time() - cpu_start
+            wall_time = time.perf_counter() - wall_start
+            self._active = False
+            if outer is not None:
+                # Keep the request's totals visible to the metrics/budget middleware
+                outer.count += stats.count
+                outer.duration += stats.duration
+
+            get_profile_store().add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status_code": status_code,
+                "wall_ms": round(wall_time * 1000, 3),
+                "cpu_ms": round(cpu_time * 1000, 3),
+                "created_at": get_utc_now().isoformat(),
+                "sql": {
+                    "count": stats.count,
+                    "total_ms": round(stats.duration * 1000, 3),
+                    "statements": [
+                        {"sql": sql, "ms": round(elapsed * 1000, 3) if elapsed is not None else None}
+                        for sql, elapsed in zip_longest(stats.statements, stats.timings)
+                    ],
+                },
+                "functions": _format_stats(profiler),
+            })
+            logger.info("Stored request profile", extra={"profile_id": profile_id, "path": scope["path"]})
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+                if _is_event_stream(message["headers"]):
+                    # Profile only up to the start of the stream and free the slot
+                    finish()
+            await send(message)
+
+        self._active = True
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        profiler.enable()
+        try:
+            with use_query_stats(stats):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            finish()
+
+
+def _is_event_stream(headers: list[tuple[bytes, bytes]]) -> bool:
+    return any(
+        name.lower() == b"content-type" and value.startswith(EVENT_STREAM.encode())
+        for name, value in headers
+    )
+
+
+def _format_stats(profiler: cProfile.Profile) -> str:
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(settings.PROFILING_TOP_FUNCTIONS)
+    return output.getvalue()
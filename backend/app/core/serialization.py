@@ -0,0 +1,58 @@
+"""orjson-backed JSON encoding with reusable pre-encoded fragments
+
+Hot endpoints return ``ORJSONResponse`` directly, which skips FastAPI's
+``jsonable_encoder`` pass. Parts of a payload that do not change between
+requests are encoded once and embedded as ``orjson.Fragment`` objects, so
+serialising them again is a memory copy.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+__all__ = ["ORJSONResponse", "FragmentCache", "encode_json", "json_fragment"]
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def encode_json(value: Any) -> bytes:
+    """Encode a value (which may contain fragments) to JSON bytes"""
+    return orjson.dumps(value, option=_OPTIONS)
+
+
+def json_fragment(value: Any) -> orjson.Fragment:
+    """Pre-encode a value so it can be embedded in later payloads as is"""
+    return orjson.Fragment(encode_json(value))
+
+
+class FragmentCache:
+    """Bounded LRU of encoded fragments, each tagged with the version it was built from
+
+    A lookup with a different version (e.g. a newer ``updated_at``) re-encodes
+    the entry, so no explicit invalidation is needed.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[Hashable, orjson.Fragment]] = OrderedDict()
+
+    def get_or_encode(self, key: Hashable, version: Hashable, build: Callable[[], Any]) -> orjson.Fragment:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        fragment = json_fragment(build())
+        self._entries[key] = (version, fragment)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return fragment
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,40 @@
+"""Named relationship loading profiles
+
+``Match`` joins its competition and both teams by default (``lazy="joined"``)
+while the reverse collections lazy-load one query per parent. Queries that
+load ORM entities pick a profile for their use case instead, and every
+profile ends with ``raiseload("*")`` so an accidental lazy load fails loudly
+instead of turning into an N+1 pattern. Listing, training and feature
+queries select plain columns and need no profile.
+"""
+
+from typing import Any
+
+from sqlalchemy.orm import raiseload
+from sqlalchemy.sql import Select
+
+from app.models.match import Match
+
+PROFILES: dict[Any, dict[str, tuple]] = {
+    Match: {
+        # Match columns only; teams and competition come from the reference cache
+        "core": (raiseload("*"),),
+    },
+}
+
+
+def profile_options(entity: Any, profile: str) -> tuple:
+    """Get the loader options of a named profile
+
+    Raises:
+        KeyError: If the entity has no such profile
+    """
+    try:
+        return PROFILES[entity][profile]
+    except KeyError:
+        raise KeyError(f"No loading profile '{profile}' for {getattr(entity, '__name__', entity)}") from None
+
+
+def with_profile(stmt: Select, entity: Any, profile: str) -> Select:
+    """Apply a named loading profile to a select statement"""
+    return stmt.options(*profile_options(entity, profile))
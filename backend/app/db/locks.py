@@ -0,0 +1,76 @@
+"""Cross-process mutual exclusion with Postgres advisory locks
+
+Every uvicorn worker runs its own scheduler, so a background job that must
+run once is guarded by a session-level advisory lock: the worker that gets
+it runs the job, the others skip. The lock is held on a dedicated pooled
+connection for the duration of the job and is released by Postgres if that
+connection dies.
+
+Long-running loops that only one worker may run (e.g. live result polling)
+hold the lock for as long as they run with ``try_hold_advisory_lock`` and
+check before each step that the connection, and so the lock, is still there.
+"""
+
+import hashlib
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.db.session import get_engine
+
+
+def lock_key(name: str) -> int:
+    """Stable signed 64-bit key for a lock name"""
+    return int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "big", signed=True)
+
+
+class HeldLock:
+    """An advisory lock held by this process"""
+
+    def __init__(self, connection: Optional[AsyncConnection] = None):
+        self._connection = connection
+
+    async def check(self) -> None:
+        """Raise if the connection holding the lock was lost, releasing the lock"""
+        if self._connection is not None:
+            await self._connection.execute(text("SELECT 1"))
+            await self._connection.commit()
+
+
+@asynccontextmanager
+async def try_hold_advisory_lock(name: str) -> AsyncIterator[Optional[HeldLock]]:
+    """Try to take a named lock without waiting
+
+    Yields:
+        The held lock, or None when another process holds it
+    """
+    engine = get_engine()
+    if engine.dialect.name != "postgresql":
+        # SQLite is only used by single-process setups (benchmarks, local runs)
+        yield HeldLock()
+        return
+
+    key = lock_key(name)
+    async with engine.connect() as connection:
+        acquired = bool(await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": key}))
+        # End the implicit transaction so the held connection does not sit idle in one
+        await connection.commit()
+        try:
+            yield HeldLock(connection) if acquired else None
+        finally:
+            if acquired:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": key})
+                await connection.commit()
+
+
+@asynccontextmanager
+async def try_advisory_lock(name: str) -> AsyncIterator[bool]:
+    """Try to take a named lock without waiting
+
+    Yields:
+        True when this process holds the lock; the body should skip its work otherwise
+    """
+    async with try_hold_advisory_lock(name) as lock:
+        yield lock is not None
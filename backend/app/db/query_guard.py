@@ -0,0 +1,140 @@
+"""Per-request SQL statement counting and budget enforcement
+
+Statements are counted by an engine event into a context variable, so every
+query issued while handling one request (including lazy loads) is attributed
+to that request. Setting ``SQL_QUERY_BUDGET`` (in tests or local runs) makes a
+request fail once it exceeds the budget. Scopes marked ``timed`` also sum the
+time spent executing statements.
+"""
+
+import time
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(RuntimeError):
+    """Raised when a request issues more SQL statements than allowed"""
+
+
+@dataclass
+class QueryStats:
+    """Statements issued within one counting scope"""
+
+    count: int = 0
+    capture: bool = False
+    statements: list[str] = field(default_factory=list)
+    timed: bool = False
+    duration: float = 0.0
+    timings: list[float] = field(default_factory=list)  # per captured statement, when timed
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Get the stats of the active counting scope, if any"""
+    return _current.get()
+
+
+@contextmanager
+def use_query_stats(stats: QueryStats) -> Iterator[QueryStats]:
+    """Make an existing stats object the active counting scope"""
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.count += 1
+        if stats.capture:
+            stats.statements.append(statement)
+        if stats.timed and context is not None:
+            context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at = getattr(context, "_query_started_at", None)
+    if started_at is not None:
+        stats = _current.get()
+        if stats is not None:
+            elapsed = time.perf_counter() - started_at
+            stats.duration += elapsed
+            if stats.capture:
+                stats.timings.append(elapsed)
+
+
+def install_query_counter(engine: Engine) -> None:
+    """Attach the statement counter and timer to a (sync) engine"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries(budget: Optional[int] = None, capture: bool = False) -> Iterator[QueryStats]:
+    """Count the statements issued inside the block
+
+    Args:
+        budget: Raise QueryBudgetExceeded on exit if more statements ran
+        capture: Also record the SQL text of each statement
+
+    Example:
+        with count_queries(budget=3) as stats:
+            await list_matches(session, filters)
+    """
+    stats = QueryStats(capture=capture)
+    with use_query_stats(stats):
+        yield stats
+
+    if budget is not None and stats.count > budget:
+        raise QueryBudgetExceeded(f"{stats.count} SQL statements issued, budget is {budget}")
+
+
+class QueryBudgetMiddleware:
+    """ASGI middleware failing requests that exceed a SQL statement budget
+
+    The budget is checked when the response starts, so an offending request
+    gets a 500 instead of its normal response; statements issued while a
+    streamed body is sent are checked once it is done. Meant for tests and
+    local runs; it is only installed when ``SQL_QUERY_BUDGET`` is set.
+    """
+
+    def __init__(self, app: Any, budget: int):
+        self.app = app
+        self.budget = budget
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Share the scope with an outer middleware (e.g. metrics) if there is one
+        stats = _current.get() or QueryStats()
+        counted_before = stats.count
+
+        def check() -> None:
+            issued = stats.count - counted_before
+            if issued > self.budget:
+                raise QueryBudgetExceeded(
+                    f"{scope['method']} {scope['path']} issued {issued} SQL statements, budget is {self.budget}"
+                )
+
+        async def send_checked(message) -> None:
+            if message["type"] == "http.response.start":
+                check()
+            await send(message)
+
+        with use_query_stats(stats):
+            await self.app(scope, receive, send_checked)
+        check()
@@ -1,20 +1,176 @@
-from sqlalchemy import create_engine, inspect
+from typing import AsyncGenerator, Optional, Any
+from sqlalchemy import create_engine, inspect, event
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from dotenv import load_dotenv
 import os
-from app.models.match import Match
+from app.core.config import settings
+from app.core.metrics import gauge
+from app.db.query_guard import install_query_counter
 from app.db.base import Base
 load_dotenv()
 
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+
+# Counters maintained by pool event listeners, see get_pool_stats()
+_pool_counters: dict[str, int] = {
+    "connects": 0,
+    "checkouts": 0,
+    "checkins": 0,
+    "invalidations": 0,
+    "peak_checked_out": 0,
+}
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to use the matching async driver"""
+    if url.startswith("postgresql+asyncpg://") or url.startswith("sqlite+aiosqlite://"):
+        return url
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url.split("://", 1)[1]
+    return url
+
+
+def _register_pool_listeners(engine: AsyncEngine) -> None:
+    """Track pool activity so utilisation can be reported without querying Postgres"""
+    pool = engine.sync_engine.pool
+
+    @event.listens_for(pool, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        _pool_counters["connects"] += 1
+
+    @event.listens_for(pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _pool_counters["checkouts"] += 1
+        checked_out = _pool_counters["checkouts"] - _pool_counters["checkins"]
+        if checked_out > _pool_counters["peak_checked_out"]:
+            _pool_counters["peak_checked_out"] = checked_out
+
+    @event.listens_for(pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        _pool_counters["checkins"] += 1
+
+    @event.listens_for(pool, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        _pool_counters["invalidations"] += 1
+
+
+def get_engine() -> AsyncEngine:
+    """Get the process-wide async engine, creating it on first use
+
+    The engine is created lazily so importing this module never opens a
+    connection or requires the async driver to be installed.
+
+    Returns:
+        The shared AsyncEngine
+    """
+    global _engine
+    if _engine is None:
+        url = to_async_url(settings.DATABASE_URL)
+        engine_kwargs: dict[str, Any] = {
+            "echo": settings.DB_ECHO,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        }
+        if not url.startswith("sqlite"):
+            engine_kwargs.update(
+                pool_size=settings.DB_POOL_SIZE,
+                max_overflow=settings.DB_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_recycle=settings.DB_POOL_RECYCLE,
+            )
+        _engine = create_async_engine(url, **engine_kwargs)
+        _register_pool_listeners(_engine)
+        install_query_counter(_engine.sync_engine)
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Get the session factory bound to the shared engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(
+            get_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+    return _session_factory
+
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """FastAPI dependency yielding a pooled AsyncSession per request
+
+    The session is rolled back if the request handler raises and is always
+    returned to the pool afterwards.
+    """
+    async with get_session_factory()() as session:
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections, called on application shutdown"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Get connection pool utilisation for health checks and metrics
+
+    Returns:
+        Dictionary with current pool occupancy and lifetime counters
+    """
+    stats: dict[str, Any] = dict(_pool_counters)
+    if _engine is None:
+        stats["initialized"] = False
+        return stats
+
+    pool = _engine.sync_engine.pool
+    stats["initialized"] = True
+    # Not every pool class (e.g. NullPool/StaticPool for SQLite) exposes sizing
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name] = method()
+    if "size" in stats and "checkedout" in stats:
+        capacity = stats["size"] + settings.DB_MAX_OVERFLOW
+        stats["capacity"] = capacity
+        stats["utilization"] = round(stats["checkedout"] / capacity, 4) if capacity else 0.0
+    return stats
+
+
+def _pool_gauge_values() -> dict[tuple, float]:
+    return {
+        (name,): value for name, value in get_pool_stats().items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    }
+
+
+gauge("db_pool", "Connection pool occupancy and lifetime counters", ("stat",), callback=_pool_gauge_values)
+
+
 def create_tables():
     """Create all tables defined in models"""
+    import app.models  # noqa: F401  registers every table on Base.metadata
+
     print("=" * 60)
     print("Creating Database Tables")
     print("=" * 60)
     
     try:
         # Create engine with echo=True to see SQL
-        engine = create_engine(os.getenv('DATABASE_URL'), echo=True)
+        engine = create_engine(os.getenv('DATABASE_URL', settings.DATABASE_URL), echo=True)
         
         # Drop all tables first (clean slate)
         print("\n🗑️  Dropping existing tables...\n")
@@ -124,17 +124,110 @@
 #         reload=settings.DEBUG
 #     )
 
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from app.api import debug, matches, predictions, stats, stream
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.logging import AccessLogMiddleware, get_logger, setup_logging, shutdown_logging
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.profiling import ProfilingMiddleware, profiling_enabled
+from app.core.serialization import ORJSONResponse
+from app.db.query_guard import QueryBudgetMiddleware
+from app.db.session import dispose_engine, get_pool_stats
+from app.ml.elo import start_rating_engine, stop_rating_engine
+from app.ml.poisson import get_scoreline_registry
+from app.ml.registry import get_registry
+from app.services.broadcast import get_hub
+from app.services.cache import close_cache
+from app.services.live_updates import LiveResultUpdater
+from app.services.reference import start_reference_cache, stop_reference_cache
+from app.services.scheduler import start_scheduler, stop_scheduler
+from app.utils.common import get_utc_now
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """Application lifespan manager for startup and shutdown events"""
+    # The previous shutdown (e.g. of an earlier test client) stopped the log writer
+    setup_logging()
+    await start_reference_cache()
+    start_rating_engine()
+    await get_hub().start()
+    start_scheduler()
+
+    live_updater = LiveResultUpdater() if settings.LIVE_UPDATES_ENABLED else None
+    if live_updater is not None:
+        live_updater.start()
+
+    yield
+
+    await stop_scheduler()
+    if live_updater is not None:
+        await live_updater.stop()
+    await get_hub().stop()
+    await stop_rating_engine()
+    await stop_reference_cache()
+    await get_registry().close()
+    await get_scoreline_registry().close()
+    await close_cache()
+
+    # Return pooled connections to Postgres before the worker exits
+    await dispose_engine()
+    logger.info("Shutting down application")
+    # Flush queued records last so the shutdown messages are written too
+    shutdown_logging()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="Backend API for football match predictions with ML-powered insights",
-    # lifespan=lifespan,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     debug=settings.DEBUG
 )
 
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+if settings.SQL_QUERY_BUDGET is not None:
+    app.add_middleware(QueryBudgetMiddleware, budget=settings.SQL_QUERY_BUDGET)
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware, sample_rate=settings.PROFILING_SAMPLE_RATE)
+app.add_middleware(AccessLogMiddleware)
+if settings.METRICS_ENABLED:
+    # Outermost, so latency includes compression and the other middleware
+    app.add_middleware(MetricsMiddleware, sample_rate=settings.METRICS_SAMPLE_RATE)
+
 @app.get("/")
 def root():
     return {"message": "Hello World!"}
+
+
+@app.get("/health")
+async def health_check():
+    """Health check endpoint including database pool utilisation"""
+    return {
+        "status": "healthy",
+        "timestamp": get_utc_now().isoformat(),
+        "db_pool": get_pool_stats()
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
+app.include_router(matches.router)
+app.include_router(predictions.router)
+app.include_router(stats.router)
+app.include_router(stream.router)
+if profiling_enabled():
+    app.include_router(debug.router)
@@ -0,0 +1,436 @@
+"""Incremental Elo ratings for every team
+
+Ratings live in a NumPy array indexed by ``Team.id``. A completed match
+moves both teams' ratings by
+
+    K(tier) * margin(goal difference) * (result - expected)
+
+where ``expected`` includes ``ELO_HOME_ADVANTAGE`` for the home side and
+``K`` comes from the competition's tier (``ELO_K_FACTORS``). Applying a
+result is O(1); a result that is corrected later is reverted and applied
+again, and a match that loses its result is reverted.
+
+History is replayed one match day at a time: a team plays at most once per
+day, so every match of a day is updated in one vectorised step. The replay
+also records each team's rating after every day it played, which lets
+training look up pre-match ratings for any date without recomputation.
+
+The process-wide engine is replayed from the database at startup and then
+kept current by ``MATCH_UPDATED`` events, plus a poll for results written
+by other workers.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.session import get_session_factory
+from app.ml.features import load_match_frame
+from app.models.competition import Competition
+from app.models.match import Match
+from app.services.events import MATCH_UPDATED, MatchEvent, subscribe
+from app.services.reference import get_reference_cache
+
+logger = get_logger(__name__)
+
+_DAY_BITS = 20  # days since 1970 fit in 20 bits until the year 4840
+_EPOCH = datetime(1970, 1, 1)
+
+
+def margin_multiplier(goal_difference: Any) -> Any:
+    """Larger wins move ratings more (World Football Elo weighting)"""
+    margin = np.abs(goal_difference)
+    return np.where(margin <= 1, 1.0, np.where(margin == 2, 1.5, (11 + margin) / 8))
+
+
+def match_result(home_scores: Any, away_scores: Any) -> Any:
+    """1 for a home win, 0.5 for a draw, 0 for an away win"""
+    return np.sign(np.asarray(home_scores) - np.asarray(away_scores)) * 0.5 + 0.5
+
+
+def _days(dates: Any) -> np.ndarray:
+    """Dates as whole days since the epoch"""
+    values = pd.to_datetime(dates, utc=True)
+    if isinstance(values, pd.Series):
+        values = values.dt.tz_convert(None).to_numpy()
+    else:
+        values = np.asarray(values.tz_convert(None))
+    return values.astype("datetime64[D]").astype(np.int64)
+
+
+def _day(value: datetime) -> int:
+    """One date as a whole day since the epoch, without going through pandas"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return (value - _EPOCH).days
+
+
+class RatingHistory:
+    """Each team's rating after every day it played, for point-in-time lookups"""
+
+    def __init__(self):
+        self._keys = np.empty(0, dtype=np.int64)
+        self._ratings = np.empty(0)
+        self._pending: list[tuple[np.ndarray, np.ndarray]] = []
+
+    @staticmethod
+    def _key(team_ids: Any, days: Any) -> np.ndarray:
+        return (np.asarray(team_ids, dtype=np.int64) << _DAY_BITS) + np.asarray(days, dtype=np.int64)
+
+    def reset(self, team_ids: np.ndarray, days: np.ndarray, ratings: np.ndarray) -> None:
+        keys = self._key(team_ids, days)
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._ratings = keys[order], np.asarray(ratings, dtype=np.float64)[order]
+        self._pending.clear()
+
+    def add(self, team_ids: Any, days: Any, ratings: Any) -> None:
+        """Record ratings after a day; merged into the sorted arrays on the next lookup"""
+        self._pending.append((self._key(team_ids, days), np.asarray(ratings, dtype=np.float64)))
+
+    def _merge(self) -> None:
+        keys = np.concatenate([self._keys, *(keys for keys, _ in self._pending)])
+        ratings = np.concatenate([self._ratings, *(ratings for _, ratings in self._pending)])
+        self._pending.clear()
+        # Stable sort: for a repeated (team, day) the latest record wins below
+        order = np.argsort(keys, kind="stable")
+        self._keys, self._ratings = keys[order], ratings[order]
+
+    def before(self, team_ids: Any, days: Any, default: float) -> np.ndarray:
+        """Rating of each team going into the given day"""
+        if self._pending:
+            self._merge()
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        if not len(self._keys):
+            return np.full(len(team_ids), default)
+        # Last record of the same team strictly before the day
+        position = np.searchsorted(self._keys, self._key(team_ids, days), side="left") - 1
+        safe = np.clip(position, 0, None)
+        found = (position >= 0) & ((self._keys[safe] >> _DAY_BITS) == team_ids)
+        return np.where(found, self._ratings[safe], default)
+
+    def __len__(self) -> int:
+        return len(self._keys) + sum(len(keys) for keys, _ in self._pending)
+
+
+class RatingEngine:
+    """Array-backed Elo ratings indexed by team id"""
+
+    def __init__(
+        self,
+        initial_rating: float = 1500.0,
+        home_advantage: float = 65.0,
+        k_factors: Optional[dict[int, float]] = None,
+        default_k: float = 20.0,
+    ):
+        self.initial_rating = initial_rating
+        self.home_advantage = home_advantage
+        self.k_factors = k_factors or {}
+        self.default_k = default_k
+        self.ratings = np.full(0, initial_rating)
+        self.history = RatingHistory()
+        self.ready = False
+        self.watermark: Optional[datetime] = None  # latest Match.updated_at reflected in the ratings
+        # match_id -> (home_team_id, away_team_id, home_score, away_score, day, delta)
+        self._applied: dict[int, tuple[int, int, int, int, int, float]] = {}
+
+    @classmethod
+    def from_settings(cls) -> "RatingEngine":
+        return cls(
+            initial_rating=settings.ELO_INITIAL_RATING,
+            home_advantage=settings.ELO_HOME_ADVANTAGE,
+            k_factors=settings.ELO_K_FACTORS,
+            default_k=settings.ELO_DEFAULT_K,
+        )
+
+    def k_factor(self, tier: Optional[int]) -> float:
+        return self.k_factors.get(tier, self.default_k) if tier is not None else self.default_k
+
+    def _ensure_capacity(self, max_team_id: int) -> None:
+        if max_team_id >= len(self.ratings):
+            size = max(max_team_id + 1, len(self.ratings) * 2)
+            grown = np.full(size, self.initial_rating)
+            grown[:len(self.ratings)] = self.ratings
+            self.ratings = grown
+
+    def expected_home(self, home_ratings: Any, away_ratings: Any) -> Any:
+        """Expected score of the home side"""
+        return 1.0 / (1.0 + 10.0 ** ((np.asarray(away_ratings) - home_ratings - self.home_advantage) / 400.0))
+
+    # Lookups
+
+    def current(self, team_ids: Any) -> np.ndarray:
+        """Current rating of each team"""
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        if len(team_ids):
+            self._ensure_capacity(int(team_ids.max()))
+        return self.ratings[team_ids]
+
+    def before(self, team_ids: Any, dates: Any) -> np.ndarray:
+        """Rating of each team going into the day of the given date"""
+        return self.history.before(team_ids, _days(dates), self.initial_rating)
+
+    # Updates
+
+    def replay(self, frame: pd.DataFrame, tiers: dict[int, Optional[int]]) -> pd.DataFrame:
+        """Recompute every rating from completed matches
+
+        Args:
+            frame: Completed matches in chronological order, as returned by load_match_frame
+            tiers: Competition id -> tier
+
+        Returns:
+            Pre-match home_rating and away_rating, indexed by match_id
+        """
+        n = len(frame)
+        home = frame["home_team_id"].to_numpy(dtype=np.int64)
+        away = frame["away_team_id"].to_numpy(dtype=np.int64)
+        home_scores = frame["home_score"].to_numpy(dtype=np.int64)
+        away_scores = frame["away_score"].to_numpy(dtype=np.int64)
+        days = _days(frame["match_date"])
+        # Built aside and swapped in at the end, so readers never see a partial replay
+        ratings = np.full(int(max(home.max(), away.max())) + 1 if n else 0, self.initial_rating)
+
+        k_by_competition = {competition_id: self.k_factor(tier) for competition_id, tier in tiers.items()}
+        k = frame["competition_id"].map(k_by_competition).fillna(self.default_k).to_numpy(dtype=np.float64)
+        weight = k * margin_multiplier(home_scores - away_scores)
+        result = match_result(home_scores, away_scores)
+
+        home_before = np.empty(n)
+        away_before = np.empty(n)
+        delta = np.empty(n)
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(days)) + 1, [n]]) if n else np.array([0])
+        for start, end in zip(starts[:-1], starts[1:]):
+            h, a = home[start:end], away[start:end]
+            teams = np.concatenate([h, a])
+            if len(np.unique(teams)) == len(teams):
+                rh, ra = ratings[h], ratings[a]
+                step = weight[start:end] * (result[start:end] - self.expected_home(rh, ra))
+                ratings[h] = rh + step
+                ratings[a] = ra - step
+                home_before[start:end], away_before[start:end], delta[start:end] = rh, ra, step
+                continue
+            # A team playing twice on one day: fall back to match order
+            for i in range(start, end):
+                rh, ra = ratings[home[i]], ratings[away[i]]
+                step = weight[i] * (result[i] - self.expected_home(rh, ra))
+                ratings[home[i]] += step
+                ratings[away[i]] -= step
+                home_before[i], away_before[i], delta[i] = rh, ra, step
+
+        match_ids = frame["id"].to_numpy(dtype=np.int64)
+        self.ratings = ratings
+        self._applied = dict(zip(
+            match_ids.tolist(),
+            zip(home.tolist(), away.tolist(), home_scores.tolist(), away_scores.tolist(), days.tolist(), delta.tolist()),
+        ))
+        self.history.reset(
+            np.concatenate([home, away]),
+            np.concatenate([days, days]),
+            np.concatenate([home_before + delta, away_before - delta]),
+        )
+        self.ready = True
+        return pd.DataFrame(
+            {"home_rating": home_before, "away_rating": away_before},
+            index=pd.Index(match_ids, name="match_id"),
+        )
+
+    def apply(self, event: MatchEvent, tier: Optional[int] = None) -> bool:
+        """Apply, correct or revert one match in O(1)
+
+        Returns:
+            True when any rating changed
+        """
+        previous = self._applied.get(event.match_id)
+        if not event.has_result:
+            if previous is None:
+                return False
+            self._revert(event.match_id, previous)
+            return True
+        if previous is not None:
+            if previous[2:4] == (event.home_score, event.away_score):
+                return False
+            # Corrected result: ratings of matches played since are not replayed
+            self._revert(event.match_id, previous)
+
+        home, away = event.home_team_id, event.away_team_id
+        self._ensure_capacity(max(home, away))
+        rh, ra = float(self.ratings[home]), float(self.ratings[away])
+        weight = self.k_factor(tier) * float(margin_multiplier(event.home_score - event.away_score))
+        step = weight * (float(match_result(event.home_score, event.away_score)) - float(self.expected_home(rh, ra)))
+        self.ratings[home] = rh + step
+        self.ratings[away] = ra - step
+
+        day = _day(event.match_date) if event.match_date is not None else 0
+        self._applied[event.match_id] = (home, away, event.home_score, event.away_score, day, step)
+        self.history.add([home, away], [day, day], [rh + step, ra - step])
+        return True
+
+    def _revert(self, match_id: int, applied: tuple[int, int, int, int, int, float]) -> None:
+        home, away, _, _, day, step = applied
+        self.ratings[home] -= step
+        self.ratings[away] += step
+        self.history.add([home, away], [day, day], [self.ratings[home], self.ratings[away]])
+        del self._applied[match_id]
+
+    async def load(self, session: AsyncSession) -> None:
+        """Replay every completed match from the database"""
+        watermark = await session.scalar(select(func.max(Match.updated_at)))
+        frame = await load_match_frame(session)
+        tiers = await load_tiers(session)
+        await asyncio.to_thread(self.replay, frame, tiers)
+        self.watermark = watermark
+        logger.info("Replayed Elo ratings", extra={"matches": len(frame)})
+
+    async def catch_up(self, session: AsyncSession) -> int:
+        """Apply results written since the watermark, e.g. by another worker
+
+        Returns:
+            Number of matches that changed ratings
+        """
+        if self.watermark is None:
+            await self.load(session)
+            return 0
+        result = await session.execute(
+            select(
+                Match.id,
+                Match.competition_id,
+                Match.season,
+                Match.home_team_id,
+                Match.away_team_id,
+                Match.status,
+                Match.home_score,
+                Match.away_score,
+                Match.match_date,
+                Match.updated_at,
+            ).where(Match.updated_at >= self.watermark)
+            .order_by(Match.match_date, Match.id)
+        )
+        rows = result.all()
+        if not rows:
+            return 0
+        tiers = await load_tiers(session)
+        changed = sum(self.apply(MatchEvent.from_match(row), tiers.get(row.competition_id)) for row in rows)
+        self.watermark = max(row.updated_at for row in rows)
+        return changed
+
+
+async def load_tiers(session: AsyncSession) -> dict[int, Optional[int]]:
+    result = await session.execute(select(Competition.id, Competition.tier))
+    return dict(result.all())
+
+
+_engine: Optional[RatingEngine] = None
+_pending_events: Optional[list[MatchEvent]] = None
+_load_task: Optional[asyncio.Task] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def get_rating_engine() -> RatingEngine:
+    """Get the process-wide rating engine"""
+    global _engine
+    if _engine is None:
+        _engine = RatingEngine.from_settings()
+    return _engine
+
+
+async def _load_engine() -> None:
+    """Replay history, retrying with backoff until the database answers"""
+    global _pending_events
+    _pending_events = []
+    attempt = 0
+    try:
+        while True:
+            try:
+                async with get_session_factory()() as session:
+                    await get_rating_engine().load(session)
+                break
+            except Exception:
+                delay = min(2 ** attempt, settings.ELO_REFRESH_SECONDS)
+                logger.warning("Elo replay failed, retrying", extra={"delay": delay}, exc_info=True)
+                attempt += 1
+                await asyncio.sleep(delay)
+    finally:
+        pending, _pending_events = _pending_events, None
+    if pending:
+        _apply_events(pending)
+
+
+async def _refresh_loop(interval: float) -> None:
+    """Pick up results written by other workers
+
+    Events only reach the worker that wrote the results, so the others poll
+    the watermark like the reference cache does.
+    """
+    await wait_for_rating_engine()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with get_session_factory()() as session:
+                changed = await get_rating_engine().catch_up(session)
+            if changed:
+                logger.info("Caught up Elo ratings", extra={"matches": changed})
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Elo catch-up failed", exc_info=True)
+
+
+def start_rating_engine() -> None:
+    """Replay ratings in the background and keep them current, called from the lifespan
+
+    Events arriving during the replay are buffered and applied afterwards;
+    results the replay already saw are recognised and skipped. Until the
+    replay finishes ``ready`` is False and predictions use a neutral rating.
+    """
+    global _load_task, _refresh_task
+    if _load_task is None:
+        _load_task = asyncio.create_task(_load_engine())
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop(settings.ELO_REFRESH_SECONDS))
+
+
+async def wait_for_rating_engine() -> None:
+    """Wait for the startup replay, if one is running"""
+    if _load_task is not None and not _load_task.done():
+        await asyncio.shield(_load_task)
+
+
+async def stop_rating_engine() -> None:
+    global _load_task, _refresh_task
+    for task in (_refresh_task, _load_task):
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    _load_task = None
+    _refresh_task = None
+
+
+def _apply_events(events: Iterable[MatchEvent]) -> int:
+    engine = get_rating_engine()
+    references = get_reference_cache()
+    changed = 0
+    for event in events:
+        competition = references.competition(event.competition_id)
+        changed += engine.apply(event, competition.tier if competition else None)
+    return changed
+
+
+@subscribe(MATCH_UPDATED)
+async def on_matches_updated(events: Sequence[MatchEvent]) -> None:
+    """Apply new, corrected and annulled results"""
+    if _pending_events is not None:
+        _pending_events.extend(events)
+        return
+    changed = _apply_events(events)
+    if changed:
+        logger.info("Updated Elo ratings", extra={"matches": changed})
@@ -0,0 +1,280 @@
+"""On-disk cache of the training feature matrix, keyed by data watermark
+
+Layout on disk::
+
+    {FEATURE_STORE_DIR}/{watermark}/X.npy              <- FEATURE_COLUMNS, float64
+    {FEATURE_STORE_DIR}/{watermark}/y.npy              <- outcome index, int64
+    {FEATURE_STORE_DIR}/{watermark}/match_ids.npy
+    {FEATURE_STORE_DIR}/{watermark}/match_dates.npy    <- datetime64[ns], UTC
+    {FEATURE_STORE_DIR}/{watermark}/manifest.json
+    {FEATURE_STORE_DIR}/CURRENT                        <- active watermark
+
+The watermark is the latest ``Match.updated_at`` the matrix has seen. A
+refresh only looks at matches updated since then: results played after the
+last stored match are appended. Their form, goal and head-to-head features
+depend only on the two teams' earlier matches, so only those teams' history
+is loaded; Elo ratings, which depend on every team, are looked up from the
+rating engine's snapshots. A change to a stored match, or a result dated
+before the last stored one, rebuilds the matrix from scratch.
+
+Arrays are plain ``.npy`` files so training workers can memory-map them
+instead of receiving a pickled copy each.
+"""
+
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.ml.elo import RatingEngine, get_rating_engine, load_tiers
+from app.ml.features import DEFAULT_FORM_WINDOW, FEATURE_COLUMNS, build_match_features, load_match_frame
+from app.models.match import Match
+
+logger = get_logger(__name__)
+
+MANIFEST_FILENAME = "manifest.json"
+CURRENT_FILENAME = "CURRENT"
+ARRAY_NAMES = ("X", "y", "match_ids", "match_dates")
+KEEP_VERSIONS = 2  # the previous matrix stays readable while workers finish with it
+
+
+def _utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes, Postgres aware ones"""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass(frozen=True)
+class FeatureMatrix:
+    """Pre-match features of every completed match, in chronological order"""
+
+    X: np.ndarray
+    y: np.ndarray
+    match_ids: np.ndarray
+    match_dates: np.ndarray
+    watermark: Optional[datetime]
+    path: Path
+
+    def __len__(self) -> int:
+        return len(self.y)
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "rows": len(self),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "path": str(self.path),
+        }
+
+
+class FeatureStore:
+    """Builds, caches and incrementally extends the training feature matrix"""
+
+    def __init__(self, root: str, last_n: int = DEFAULT_FORM_WINDOW):
+        self.path = Path(root)
+        self.last_n = last_n
+
+    # Storage
+
+    def load(self) -> Optional[FeatureMatrix]:
+        """Open the current matrix with memory-mapped arrays, if it is still valid"""
+        try:
+            key = (self.path / CURRENT_FILENAME).read_text().strip()
+            directory = self.path / key
+            manifest = json.loads((directory / MANIFEST_FILENAME).read_text())
+        except FileNotFoundError:
+            return None
+
+        # Matrices built with other feature definitions cannot be extended
+        if manifest.get("feature_columns") != FEATURE_COLUMNS or manifest.get("last_n") != self.last_n:
+            return None
+
+        arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r") for name in ARRAY_NAMES}
+        watermark = manifest.get("watermark")
+        return FeatureMatrix(
+            **arrays,
+            watermark=datetime.fromisoformat(watermark) if watermark else None,
+            path=directory,
+        )
+
+    def write(
+        self,
+        X: np.ndarray,
+        y: np.ndarray,
+        match_ids: np.ndarray,
+        match_dates: np.ndarray,
+        watermark: Optional[datetime],
+    ) -> FeatureMatrix:
+        """Store a matrix under its watermark and make it current
+
+        Arrays are written to a staging directory and renamed into place, so
+        readers never see a partially written matrix.
+        """
+        key = watermark.strftime("%Y%m%dT%H%M%S%f") if watermark else "empty"
+        target = self.path / key
+        staging = self.path / f".{key}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        arrays = {"X": X, "y": y, "match_ids": match_ids, "match_dates": match_dates}
+        for name, array in arrays.items():
+            np.save(staging / f"{name}.npy", np.ascontiguousarray(array))
+        manifest = {
+            "watermark": watermark.isoformat() if watermark else None,
+            "rows": int(len(y)),
+            "feature_columns": FEATURE_COLUMNS,
+            "last_n": self.last_n,
+        }
+        (staging / MANIFEST_FILENAME).write_text(json.dumps(manifest, indent=2))
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.rename(staging, target)
+        tmp = self.path / f"{CURRENT_FILENAME}.tmp"
+        tmp.write_text(key)
+        os.replace(tmp, self.path / CURRENT_FILENAME)
+        self._prune(keep=key)
+
+        matrix = self.load()
+        assert matrix is not None
+        return matrix
+
+    def _prune(self, keep: str) -> None:
+        versions = sorted(
+            p for p in self.path.iterdir()
+            if p.is_dir() and not p.name.startswith(".") and p.name != keep
+        )
+        for stale in versions[:max(len(versions) - (KEEP_VERSIONS - 1), 0)]:
+            shutil.rmtree(stale, ignore_errors=True)
+
+    # Building
+
+    @staticmethod
+    def _arrays(features: pd.DataFrame) -> dict[str, np.ndarray]:
+        return {
+            "X": features[FEATURE_COLUMNS].to_numpy(dtype=np.float64),
+            "y": features["outcome"].to_numpy(dtype=np.int64),
+            "match_ids": features.index.to_numpy(dtype=np.int64),
+            "match_dates": features["match_date"].dt.tz_convert(None).to_numpy(dtype="datetime64[ns]"),
+        }
+
+    async def _latest_update(self, session: AsyncSession) -> Optional[datetime]:
+        latest = await session.scalar(select(func.max(Match.updated_at)))
+        return _utc(latest) if latest is not None else None
+
+    async def rebuild(self, session: AsyncSession) -> FeatureMatrix:
+        """Compute features for every completed match"""
+        watermark = await self._latest_update(session)
+        frame = await load_match_frame(session)
+        if frame.empty:
+            arrays = {
+                "X": np.empty((0, len(FEATURE_COLUMNS))),
+                "y": np.empty(0, dtype=np.int64),
+                "match_ids": np.empty(0, dtype=np.int64),
+                "match_dates": np.empty(0, dtype="datetime64[ns]"),
+            }
+        else:
+            ratings = RatingEngine.from_settings().replay(frame, await load_tiers(session))
+            arrays = self._arrays(build_match_features(frame, last_n=self.last_n, ratings=ratings))
+        logger.info("Rebuilt feature matrix", extra={"rows": len(arrays["y"])})
+        return self.write(**arrays, watermark=watermark)
+
+    async def refresh(self, session: AsyncSession) -> FeatureMatrix:
+        """Bring the stored matrix up to date with the database
+
+        Returns:
+            The current matrix, extended or rebuilt as needed
+        """
+        current = self.load()
+        if current is None or current.watermark is None or len(current) == 0:
+            return await self.rebuild(session)
+
+        # >= so rows committed within the same timestamp are not missed
+        result = await session.execute(
+            select(Match.id, Match.status, Match.match_date, Match.updated_at)
+            .where(Match.updated_at >= current.watermark)
+        )
+        changed = result.all()
+        stored = set(current.match_ids.tolist())
+        last_date = pd.Timestamp(current.match_dates[-1], tz="UTC")
+
+        appended: list[int] = []
+        watermark = current.watermark
+        for match_id, status, match_date, updated_at in changed:
+            updated_at = _utc(updated_at)
+            watermark = max(watermark, updated_at)
+            if match_id in stored:
+                if updated_at == current.watermark:
+                    continue  # seen when the matrix was written
+                logger.info("Stored match changed, rebuilding feature matrix", extra={"match_id": match_id})
+                return await self.rebuild(session)
+            if status != "completed":
+                continue
+            if pd.Timestamp(_utc(match_date)) <= last_date:
+                logger.info("Result older than the feature matrix, rebuilding", extra={"match_id": match_id})
+                return await self.rebuild(session)
+            appended.append(match_id)
+
+        if not appended:
+            if watermark == current.watermark:
+                return current
+            return self.write(current.X, current.y, current.match_ids, current.match_dates, watermark)
+
+        new_rows = await self._features_for(session, appended)
+        arrays = self._arrays(new_rows)
+        logger.info("Appended to feature matrix", extra={"rows": len(new_rows), "total": len(current) + len(new_rows)})
+        return self.write(
+            X=np.concatenate([current.X, arrays["X"]]),
+            y=np.concatenate([current.y, arrays["y"]]),
+            match_ids=np.concatenate([current.match_ids, arrays["match_ids"]]),
+            match_dates=np.concatenate([current.match_dates, arrays["match_dates"]]),
+            watermark=watermark,
+        )
+
+    async def _features_for(self, session: AsyncSession, match_ids: list[int]) -> pd.DataFrame:
+        """Features of new matches, computed from their teams' history only
+
+        Elo ratings are looked up from the rating engine's snapshots rather
+        than replayed, since they depend on every team's history.
+        """
+        result = await session.execute(
+            select(Match.id, Match.home_team_id, Match.away_team_id, Match.match_date)
+            .where(Match.id.in_(match_ids))
+        )
+        fixtures = pd.DataFrame.from_records(
+            result.all(), columns=["id", "home_team_id", "away_team_id", "match_date"]
+        )
+        engine = get_rating_engine()
+        await engine.catch_up(session)
+        ratings = pd.DataFrame(
+            {
+                "home_rating": engine.before(fixtures["home_team_id"], fixtures["match_date"]),
+                "away_rating": engine.before(fixtures["away_team_id"], fixtures["match_date"]),
+            },
+            index=pd.Index(fixtures["id"].to_numpy(), name="match_id"),
+        )
+
+        team_ids = set(fixtures["home_team_id"]) | set(fixtures["away_team_id"])
+        frame = await load_match_frame(session, team_ids=team_ids)
+        features = build_match_features(frame, last_n=self.last_n, ratings=ratings)
+        # Matches without a final score are not in the frame
+        return features[features.index.isin(match_ids)]
+
+
+_store: Optional[FeatureStore] = None
+
+
+def get_feature_store() -> FeatureStore:
+    """Get the process-wide feature store"""
+    global _store
+    if _store is None:
+        _store = FeatureStore(settings.FEATURE_STORE_DIR)
+    return _store
+
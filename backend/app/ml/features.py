@@ -0,0 +1,489 @@
+"""Batched feature extraction for team form, goal averages and head-to-head records
+
+All features are computed from one DataFrame of completed matches loaded in a
+single query, so building features for a whole league season never walks the
+ORM one ``Match`` at a time.
+"""
+
+from datetime import datetime
+from typing import Iterable, Optional, Sequence, Any
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.competition import Competition
+from app.models.match import Match
+
+DEFAULT_FORM_WINDOW = 5
+
+MATCH_FRAME_COLUMNS = [
+    "id",
+    "competition_id",
+    "season",
+    "match_date",
+    "home_team_id",
+    "away_team_id",
+    "home_score",
+    "away_score",
+]
+
+# Order of the model input columns, shared by training and inference
+FEATURE_COLUMNS = [
+    "home_form_points",
+    "away_form_points",
+    "home_goals_scored_avg",
+    "home_goals_conceded_avg",
+    "away_goals_scored_avg",
+    "away_goals_conceded_avg",
+    "home_venue_win_rate",
+    "away_venue_win_rate",
+    "h2h_home_win_rate",
+    "h2h_draw_rate",
+    "h2h_matches",
+    "elo_diff",
+]
+
+# Inputs of models trained before the Elo feature, whose metadata lists no columns
+LEGACY_FEATURE_COLUMNS = [column for column in FEATURE_COLUMNS if column != "elo_diff"]
+
+# Neutral priors used when a team has no history yet
+DEFAULT_FEATURE_VALUES = {
+    "home_form_points": 1.4,
+    "away_form_points": 1.4,
+    "home_goals_scored_avg": 1.4,
+    "home_goals_conceded_avg": 1.4,
+    "away_goals_scored_avg": 1.4,
+    "away_goals_conceded_avg": 1.4,
+    "home_venue_win_rate": 0.45,
+    "away_venue_win_rate": 0.30,
+    "h2h_home_win_rate": 0.40,
+    "h2h_draw_rate": 0.25,
+    "h2h_matches": 0.0,
+    "elo_diff": 0.0,
+}
+
+# Class labels, indexed by the integer outcome stored in the "outcome" column
+OUTCOME_LABELS = ("home_win", "draw", "away_win")
+
+# Names reported to clients as "features_used"
+FEATURE_GROUPS = [
+    "team_form",
+    "head_to_head",
+    "home_advantage",
+    "goals_scored_avg",
+    "goals_conceded_avg",
+    "elo_rating",
+]
+
+
+async def load_match_frame(
+    session: AsyncSession,
+    team_ids: Optional[Iterable[int]] = None,
+    competition_id: Optional[int] = None,
+    season: Optional[int] = None,
+    before: Optional[datetime] = None,
+    seasons: Optional[Iterable[int]] = None,
+    competition_type: Optional[str] = None,
+) -> pd.DataFrame:
+    """Load completed matches into a DataFrame with a single query
+
+    Filtering by team uses ``home_team_id``/``away_team_id`` together with
+    ``match_date`` so Postgres can combine ``idx_matches_team_date_home`` and
+    ``idx_matches_team_date_away`` in one bitmap scan.
+
+    Args:
+        session: Database session
+        team_ids: Only load matches involving these teams
+        competition_id: Only load matches from this competition
+        season: Only load matches from this season
+        before: Only load matches played strictly before this time
+        seasons: Only load matches from any of these seasons
+        competition_type: Only load matches from competitions of this type,
+            e.g. ``"league"``
+
+    Returns:
+        DataFrame with MATCH_FRAME_COLUMNS ordered by match date
+    """
+    stmt = select(
+        Match.id,
+        Match.competition_id,
+        Match.season,
+        Match.match_date,
+        Match.home_team_id,
+        Match.away_team_id,
+        Match.home_score,
+        Match.away_score,
+    ).where(
+        Match.status == "completed",
+        Match.home_score.is_not(None),
+        Match.away_score.is_not(None),
+    )
+
+    if team_ids is not None:
+        ids = list(team_ids)
+        stmt = stmt.where(or_(Match.home_team_id.in_(ids), Match.away_team_id.in_(ids)))
+    if competition_id is not None:
+        stmt = stmt.where(Match.competition_id == competition_id)
+    if season is not None:
+        stmt = stmt.where(Match.season == season)
+    if seasons is not None:
+        stmt = stmt.where(Match.season.in_(list(seasons)))
+    if before is not None:
+        stmt = stmt.where(Match.match_date < before)
+    if competition_type is not None:
+        stmt = stmt.join(Competition, Competition.id == Match.competition_id).where(
+            Competition.type == competition_type
+        )
+
+    stmt = stmt.order_by(Match.match_date, Match.id)
+    result = await session.execute(stmt)
+    return matches_to_frame(result.all())
+
+
+def matches_to_frame(rows: Sequence[Sequence[Any]]) -> pd.DataFrame:
+    """Build a typed match DataFrame from rows in MATCH_FRAME_COLUMNS order"""
+    frame = pd.DataFrame.from_records(list(rows), columns=MATCH_FRAME_COLUMNS)
+    frame["match_date"] = pd.to_datetime(frame["match_date"], utc=True)
+    int_columns = [c for c in MATCH_FRAME_COLUMNS if c != "match_date"]
+    frame[int_columns] = frame[int_columns].astype("int64")
+    return frame
+
+
+def team_match_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Expand matches into one row per team per match
+
+    Each match appears twice, once from the home side and once from the away
+    side, so every per-team aggregate becomes a plain groupby.
+
+    Args:
+        frame: Match DataFrame as returned by load_match_frame
+
+    Returns:
+        DataFrame sorted by team and date with goals_for/goals_against,
+        result ("W"/"D"/"L"), points and win/draw/loss indicator columns
+    """
+    home = pd.DataFrame({
+        "match_id": frame["id"],
+        "competition_id": frame["competition_id"],
+        "season": frame["season"],
+        "match_date": frame["match_date"],
+        "team_id": frame["home_team_id"],
+        "opponent_id": frame["away_team_id"],
+        "is_home": True,
+        "goals_for": frame["home_score"],
+        "goals_against": frame["away_score"],
+    })
+    away = pd.DataFrame({
+        "match_id": frame["id"],
+        "competition_id": frame["competition_id"],
+        "season": frame["season"],
+        "match_date": frame["match_date"],
+        "team_id": frame["away_team_id"],
+        "opponent_id": frame["home_team_id"],
+        "is_home": False,
+        "goals_for": frame["away_score"],
+        "goals_against": frame["home_score"],
+    })
+    long = pd.concat([home, away], ignore_index=True)
+    long["is_home"] = long["is_home"].astype(bool)
+
+    diff = (long["goals_for"] - long["goals_against"]).to_numpy()
+    long["win"] = (diff > 0).astype("int64")
+    long["draw"] = (diff == 0).astype("int64")
+    long["loss"] = (diff < 0).astype("int64")
+    long["clean_sheet"] = (long["goals_against"].to_numpy() == 0).astype("int64")
+    long["points"] = long["win"] * 3 + long["draw"]
+    long["result"] = np.select([diff > 0, diff < 0], ["W", "L"], default="D")
+
+    long.sort_values(["team_id", "match_date", "match_id"], kind="mergesort", inplace=True, ignore_index=True)
+    return long
+
+
+def _aggregate_results(long: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """Sum played/won/drawn/lost and goals for each group"""
+    grouped = long.groupby(keys, sort=True)
+    return pd.DataFrame({
+        "matches_played": grouped.size(),
+        "wins": grouped["win"].sum(),
+        "draws": grouped["draw"].sum(),
+        "losses": grouped["loss"].sum(),
+        "goals_scored": grouped["goals_for"].sum(),
+        "goals_conceded": grouped["goals_against"].sum(),
+        "clean_sheets": grouped["clean_sheet"].sum(),
+    })
+
+
+def compute_team_features(
+    frame: pd.DataFrame,
+    last_n: int = DEFAULT_FORM_WINDOW,
+    team_ids: Optional[Iterable[int]] = None,
+    by_season: bool = False,
+) -> pd.DataFrame:
+    """Compute overall, home/away and recent-form aggregates for many teams
+
+    Args:
+        frame: Match DataFrame as returned by load_match_frame
+        last_n: Number of most recent matches used for form
+        team_ids: Restrict the output to these teams
+        by_season: Aggregate per (team_id, season) instead of per team
+
+    Returns:
+        DataFrame indexed by team_id (or team_id, season). ``form`` lists the
+        last results oldest first, e.g. "WWDWW".
+    """
+    long = team_match_frame(frame)
+    if team_ids is not None:
+        long = long[long["team_id"].isin(list(team_ids))]
+
+    keys = ["team_id", "season"] if by_season else ["team_id"]
+    overall = _aggregate_results(long, keys)
+    overall["goal_difference"] = overall["goals_scored"] - overall["goals_conceded"]
+    overall["points"] = overall["wins"] * 3 + overall["draws"]
+    played = overall["matches_played"].to_numpy()
+    overall["win_rate"] = np.round(overall["wins"].to_numpy() / np.maximum(played, 1), 4)
+    overall["goals_scored_avg"] = np.round(overall["goals_scored"].to_numpy() / np.maximum(played, 1), 4)
+    overall["goals_conceded_avg"] = np.round(overall["goals_conceded"].to_numpy() / np.maximum(played, 1), 4)
+
+    split_columns = ["matches_played", "wins", "draws", "losses", "goals_scored", "goals_conceded"]
+    home = _aggregate_results(long[long["is_home"]], keys)[split_columns]
+    away = _aggregate_results(long[~long["is_home"]], keys)[split_columns]
+    home = home.reindex(overall.index, fill_value=0).add_prefix("home_")
+    away = away.reindex(overall.index, fill_value=0).add_prefix("away_")
+
+    # long is sorted by team and date, so tail() keeps the most recent matches
+    recent = long.groupby(keys, sort=False).tail(last_n)
+    recent_grouped = recent.groupby(keys, sort=True)
+    form = pd.DataFrame({
+        "form": recent_grouped["result"].agg("".join),
+        "goals_last_n": recent_grouped["goals_for"].sum(),
+        "conceded_last_n": recent_grouped["goals_against"].sum(),
+    })
+
+    return pd.concat([overall, home, away, form], axis=1)
+
+
+def compute_head_to_head(
+    frame: pd.DataFrame,
+    pairs: Iterable[tuple[int, int]],
+    last_n: int = DEFAULT_FORM_WINDOW,
+) -> pd.DataFrame:
+    """Compute head-to-head records for many team pairs in one pass
+
+    Args:
+        frame: Match DataFrame containing the meetings between the teams
+        pairs: (team_id, opponent_id) pairs, results are from team_id's side
+        last_n: Number of most recent meetings listed in last_results
+
+    Returns:
+        DataFrame indexed by (team_id, opponent_id) with total_matches, wins,
+        draws, losses, goals and last_results (oldest first)
+    """
+    count_columns = ["total_matches", "wins", "draws", "losses", "goals_scored", "goals_conceded"]
+    pairs = list(pairs)
+    if not pairs:
+        # Nothing to look up; also keeps the empty index from relying on
+        # from_tuples inferring its levels from ``names``
+        empty_index = pd.MultiIndex.from_arrays([[], []], names=["team_id", "opponent_id"])
+        h2h = pd.DataFrame({column: pd.Series(dtype="int64") for column in count_columns}, index=empty_index)
+        h2h["last_results"] = pd.Series(dtype="object")
+        return h2h
+
+    pair_index = pd.MultiIndex.from_tuples(pairs, names=["team_id", "opponent_id"])
+    long = team_match_frame(frame)
+    keys = pd.MultiIndex.from_arrays([long["team_id"], long["opponent_id"]])
+    long = long[keys.isin(pair_index)]
+
+    grouped = long.groupby(["team_id", "opponent_id"], sort=True)
+    h2h = pd.DataFrame({
+        "total_matches": grouped.size(),
+        "wins": grouped["win"].sum(),
+        "draws": grouped["draw"].sum(),
+        "losses": grouped["loss"].sum(),
+        "goals_scored": grouped["goals_for"].sum(),
+        "goals_conceded": grouped["goals_against"].sum(),
+        "last_results": grouped.tail(last_n).groupby(["team_id", "opponent_id"])["result"].agg("".join),
+    })
+
+    h2h = h2h.reindex(pair_index)
+    h2h[count_columns] = h2h[count_columns].fillna(0).astype("int64")
+    h2h["last_results"] = h2h["last_results"].fillna("")
+    return h2h
+
+
+def _with_rolling_stats(long: pd.DataFrame, last_n: int, prior_only: bool) -> pd.DataFrame:
+    """Add rolling form, goal averages, venue and head-to-head rates per row
+
+    With ``prior_only`` each row only sees matches played before it, which is
+    what training needs to avoid leaking the result being predicted.
+    """
+    team = long["team_id"]
+
+    def rolling_mean(column: str) -> pd.Series:
+        values = long[column].astype("float64")
+        if prior_only:
+            values = values.groupby(team, sort=False).shift()
+        rolled = values.groupby(team, sort=False).rolling(last_n, min_periods=1).mean()
+        return rolled.reset_index(level=0, drop=True)
+
+    long = long.copy()
+    long["form_points"] = rolling_mean("points")
+    long["goals_scored_avg"] = rolling_mean("goals_for")
+    long["goals_conceded_avg"] = rolling_mean("goals_against")
+
+    offset = 1 if prior_only else 0
+
+    venue_keys = [team, long["is_home"]]
+    venue_played = long.groupby(venue_keys, sort=False).cumcount() + 1 - offset
+    venue_wins = long["win"].groupby(venue_keys, sort=False).cumsum() - offset * long["win"]
+    long["venue_win_rate"] = venue_wins / venue_played.replace(0, np.nan)
+
+    pair_keys = [team, long["opponent_id"]]
+    h2h_played = long.groupby(pair_keys, sort=False).cumcount() + 1 - offset
+    h2h_wins = long["win"].groupby(pair_keys, sort=False).cumsum() - offset * long["win"]
+    h2h_draws = long["draw"].groupby(pair_keys, sort=False).cumsum() - offset * long["draw"]
+    h2h_denominator = h2h_played.replace(0, np.nan)
+    long["h2h_win_rate"] = h2h_wins / h2h_denominator
+    long["h2h_draw_rate"] = h2h_draws / h2h_denominator
+    long["h2h_matches"] = h2h_played.astype("float64")
+    return long
+
+
+def _outcomes(home_scores: np.ndarray, away_scores: np.ndarray) -> np.ndarray:
+    """Encode results as indexes into OUTCOME_LABELS"""
+    return np.select([home_scores > away_scores, home_scores == away_scores], [0, 1], default=2)
+
+
+def build_match_features(
+    frame: pd.DataFrame,
+    last_n: int = DEFAULT_FORM_WINDOW,
+    ratings: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """Build pre-match features for every completed match, for training
+
+    Args:
+        frame: Match DataFrame as returned by load_match_frame
+        last_n: Rolling form window
+        ratings: Pre-match home_rating/away_rating indexed by match_id, see
+            app.ml.elo; elo_diff is neutral for matches without one
+
+    Returns:
+        DataFrame indexed by match_id in chronological order with
+        FEATURE_COLUMNS, plus "outcome" and "match_date"
+    """
+    long = _with_rolling_stats(team_match_frame(frame), last_n, prior_only=True)
+    home = long[long["is_home"]].set_index("match_id")
+    away = long[~long["is_home"]].set_index("match_id")
+
+    features = pd.DataFrame({
+        "home_form_points": home["form_points"],
+        "away_form_points": away["form_points"],
+        "home_goals_scored_avg": home["goals_scored_avg"],
+        "home_goals_conceded_avg": home["goals_conceded_avg"],
+        "away_goals_scored_avg": away["goals_scored_avg"],
+        "away_goals_conceded_avg": away["goals_conceded_avg"],
+        "home_venue_win_rate": home["venue_win_rate"],
+        "away_venue_win_rate": away["venue_win_rate"],
+        "h2h_home_win_rate": home["h2h_win_rate"],
+        "h2h_draw_rate": home["h2h_draw_rate"],
+        "h2h_matches": home["h2h_matches"],
+    })
+    features = features.reindex(pd.Index(frame["id"].to_numpy(), name="match_id"))
+    if ratings is not None:
+        ratings = ratings.reindex(features.index)
+        features["elo_diff"] = ratings["home_rating"] - ratings["away_rating"]
+    else:
+        features["elo_diff"] = np.nan
+    features = features[FEATURE_COLUMNS].fillna(DEFAULT_FEATURE_VALUES)
+    features["outcome"] = _outcomes(frame["home_score"].to_numpy(), frame["away_score"].to_numpy())
+    features["match_date"] = frame["match_date"].array
+    return features
+
+
+def _state_before(
+    states: pd.DataFrame,
+    queries: pd.DataFrame,
+    by: list[str],
+    columns: list[str],
+) -> pd.DataFrame:
+    """Latest state of each query's key strictly before the query's match_date
+
+    Args:
+        states: Rows with the ``by`` keys, match_date and ``columns``, sorted by match_date
+        queries: Rows with the ``by`` keys and match_date
+
+    Returns:
+        ``columns`` in query order, NaN where the key has no earlier state
+    """
+    right = states[by + ["match_date"] + columns]
+    left = queries[by + ["match_date"]].assign(_row=np.arange(len(queries)))
+    left = left.sort_values("match_date", kind="mergesort")
+    merged = pd.merge_asof(left, right, on="match_date", by=by, allow_exact_matches=False)
+    return merged.sort_values("_row")[columns].reset_index(drop=True)
+
+
+def build_fixture_features(
+    history: pd.DataFrame,
+    fixtures: pd.DataFrame,
+    last_n: int = DEFAULT_FORM_WINDOW,
+    ratings: Optional[tuple[np.ndarray, np.ndarray]] = None,
+) -> pd.DataFrame:
+    """Build features for matches as they stood before kick-off
+
+    Each fixture gets the state of its teams after their latest match in
+    ``history`` played before the fixture's ``match_date``, so a completed
+    match never sees its own result or later ones, as in training. Without
+    a match_date column every match in ``history`` counts.
+
+    Args:
+        history: Completed matches as returned by load_match_frame
+        fixtures: DataFrame with id, home_team_id, away_team_id and
+            optionally match_date columns
+        last_n: Rolling form window
+        ratings: Pre-match (home, away) Elo ratings aligned with ``fixtures``
+
+    Returns:
+        DataFrame indexed by match_id (in fixture order) with FEATURE_COLUMNS
+    """
+    index = pd.Index(fixtures["id"].to_numpy(), name="match_id")
+    features = pd.DataFrame(index=index, columns=FEATURE_COLUMNS, dtype="float64")
+    if ratings is not None:
+        features["elo_diff"] = np.asarray(ratings[0]) - np.asarray(ratings[1])
+    if history.empty or fixtures.empty:
+        return features.fillna(DEFAULT_FEATURE_VALUES)
+
+    if "match_date" in fixtures:
+        kickoffs = pd.DatetimeIndex(pd.to_datetime(fixtures["match_date"], utc=True))
+    else:
+        kickoffs = pd.DatetimeIndex([pd.Timestamp.max.tz_localize("UTC")] * len(fixtures))
+    home = pd.DataFrame({
+        "team_id": fixtures["home_team_id"].to_numpy(dtype=np.int64),
+        "opponent_id": fixtures["away_team_id"].to_numpy(dtype=np.int64),
+        "match_date": kickoffs,
+    })
+    away = pd.DataFrame({"team_id": fixtures["away_team_id"].to_numpy(dtype=np.int64), "match_date": kickoffs})
+
+    long = _with_rolling_stats(team_match_frame(history), last_n, prior_only=False)
+    long = long.sort_values("match_date", kind="mergesort", ignore_index=True)
+    form_columns = ["form_points", "goals_scored_avg", "goals_conceded_avg"]
+    home_state = _state_before(long, home, ["team_id"], form_columns)
+    away_state = _state_before(long, away, ["team_id"], form_columns)
+    home_venue = _state_before(long[long["is_home"]], home, ["team_id"], ["venue_win_rate"])
+    away_venue = _state_before(long[~long["is_home"]], away, ["team_id"], ["venue_win_rate"])
+    h2h = _state_before(
+        long, home, ["team_id", "opponent_id"], ["h2h_win_rate", "h2h_draw_rate", "h2h_matches"]
+    )
+
+    features["home_form_points"] = home_state["form_points"].to_numpy()
+    features["away_form_points"] = away_state["form_points"].to_numpy()
+    features["home_goals_scored_avg"] = home_state["goals_scored_avg"].to_numpy()
+    features["home_goals_conceded_avg"] = home_state["goals_conceded_avg"].to_numpy()
+    features["away_goals_scored_avg"] = away_state["goals_scored_avg"].to_numpy()
+    features["away_goals_conceded_avg"] = away_state["goals_conceded_avg"].to_numpy()
+    features["home_venue_win_rate"] = home_venue["venue_win_rate"].to_numpy()
+    features["away_venue_win_rate"] = away_venue["venue_win_rate"].to_numpy()
+    features["h2h_home_win_rate"] = h2h["h2h_win_rate"].to_numpy()
+    features["h2h_draw_rate"] = h2h["h2h_draw_rate"].to_numpy()
+    features["h2h_matches"] = h2h["h2h_matches"].to_numpy()
+    return features.fillna(DEFAULT_FEATURE_VALUES)
@@ -0,0 +1,307 @@
+"""Dixon-Coles scoreline model
+
+Goals are modelled as independent Poisson counts with
+
+    log(home rate) = intercept + home_advantage + attack[home] + defence[away]
+    log(away rate) = intercept + attack[away] + defence[home]
+
+plus the Dixon-Coles correction ``rho`` for the low-scoring results (0-0,
+1-0, 0-1, 1-1) that plain Poisson gets wrong. Older matches are down-weighted
+with an exponential half-life, and an L2 penalty shrinks teams with little
+history towards the average.
+
+Prediction is closed form: the scoreline grid of every fixture is one NumPy
+broadcast, and the outcome probabilities are its lower triangle, trace and
+upper triangle. That makes the model cheap enough to serve while the
+classifier is still loading, and lets the classifier's predicted outcome be
+paired with the most likely scoreline of that outcome.
+
+The fitted model is stored in its own registry (``SCORELINE_MODEL_NAME``)
+next to the classifier.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize, minimize_scalar
+from scipy.special import gammaln
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.ml.features import load_match_frame
+from app.ml.registry import ModelRegistry
+from app.models.match import Match
+
+logger = get_logger(__name__)
+
+MAX_GOALS = 10  # scorelines up to 10-10; the truncated tail is renormalised away
+L2_PENALTY = 1.0
+RHO_BOUNDS = (-0.2, 0.2)
+
+# Reported to clients as "features_used" for predictions made by this model
+SCORELINE_FEATURES = ["attack_strength", "defence_strength", "home_advantage"]
+
+
+@dataclass
+class ScorelinePrediction:
+    """Predictions for a batch of fixtures, row-aligned with the input"""
+
+    probabilities: np.ndarray  # (n, 3) in OUTCOME_LABELS order
+    home_goals: np.ndarray
+    away_goals: np.ndarray
+    home_rate: np.ndarray
+    away_rate: np.ndarray
+
+
+_GOALS = np.arange(MAX_GOALS + 1)
+_LOG_FACTORIALS = gammaln(_GOALS + 1)
+# Masks over the (home goals, away goals) grid
+_HOME_WIN = np.tril(np.ones((MAX_GOALS + 1, MAX_GOALS + 1), dtype=bool), k=-1)
+_DRAW = np.eye(MAX_GOALS + 1, dtype=bool)
+_AWAY_WIN = ~(_HOME_WIN | _DRAW)
+_OUTCOME_MASKS = np.stack([_HOME_WIN, _DRAW, _AWAY_WIN])
+
+
+def _poisson_loss(
+    theta: np.ndarray,
+    home: np.ndarray,
+    away: np.ndarray,
+    home_goals: np.ndarray,
+    away_goals: np.ndarray,
+    weights: np.ndarray,
+    penalty: float,
+) -> tuple[float, np.ndarray]:
+    """Penalised weighted Poisson negative log-likelihood and its gradient
+
+    ``theta`` is (intercept, home_advantage, attack..., defence...), with
+    ``home``/``away`` indexing teams into the attack and defence blocks.
+    """
+    n_teams = (len(theta) - 2) // 2
+    intercept, home_advantage = theta[0], theta[1]
+    attack, defence = theta[2:2 + n_teams], theta[2 + n_teams:]
+    log_home = intercept + home_advantage + attack[home] + defence[away]
+    log_away = intercept + attack[away] + defence[home]
+    home_rate, away_rate = np.exp(log_home), np.exp(log_away)
+
+    loss = np.sum(weights * (home_rate - home_goals * log_home + away_rate - away_goals * log_away))
+    loss += 0.5 * penalty * (attack @ attack + defence @ defence)
+
+    home_residual = weights * (home_rate - home_goals)
+    away_residual = weights * (away_rate - away_goals)
+    gradient = np.empty_like(theta)
+    gradient[0] = home_residual.sum() + away_residual.sum()
+    gradient[1] = home_residual.sum()
+    gradient[2:2 + n_teams] = (
+        np.bincount(home, home_residual, n_teams) + np.bincount(away, away_residual, n_teams) + penalty * attack
+    )
+    gradient[2 + n_teams:] = (
+        np.bincount(away, home_residual, n_teams) + np.bincount(home, away_residual, n_teams) + penalty * defence
+    )
+    return loss, gradient
+
+
+class DixonColesModel:
+    """Per-team attack/defence strengths fitted by weighted maximum likelihood"""
+
+    def __init__(self, half_life_days: float = 180.0, l2_penalty: float = L2_PENALTY):
+        self.half_life_days = half_life_days
+        self.l2_penalty = l2_penalty
+        self.team_ids = np.empty(0, dtype=np.int64)
+        self.attack = np.empty(0)
+        self.defence = np.empty(0)
+        self.intercept = 0.0
+        self.home_advantage = 0.0
+        self.rho = 0.0
+        self.samples = 0
+
+    # Fitting
+
+    def _weights(self, match_dates: pd.Series, reference: Optional[pd.Timestamp]) -> np.ndarray:
+        reference = reference if reference is not None else match_dates.max()
+        age_days = (reference - match_dates).dt.total_seconds().to_numpy() / 86400
+        return np.power(0.5, np.maximum(age_days, 0) / self.half_life_days)
+
+    def fit(self, frame: pd.DataFrame, reference: Optional[pd.Timestamp] = None) -> "DixonColesModel":
+        """Fit on completed matches as returned by load_match_frame
+
+        Args:
+            frame: Completed matches
+            reference: Time the decay is measured from, the latest match by default
+        """
+        if frame.empty:
+            raise ValueError("Cannot fit a scoreline model without completed matches")
+
+        self.team_ids, teams = np.unique(
+            np.concatenate([frame["home_team_id"].to_numpy(), frame["away_team_id"].to_numpy()]),
+            return_inverse=True,
+        )
+        n_teams = len(self.team_ids)
+        home, away = teams[:len(frame)], teams[len(frame):]
+        home_goals = frame["home_score"].to_numpy(dtype=np.float64)
+        away_goals = frame["away_score"].to_numpy(dtype=np.float64)
+        weights = self._weights(frame["match_date"], reference)
+
+        theta = np.zeros(2 + 2 * n_teams)
+        theta[0] = np.log(max((home_goals.mean() + away_goals.mean()) / 2, 0.1))
+        result = minimize(
+            _poisson_loss,
+            theta,
+            args=(home, away, home_goals, away_goals, weights, self.l2_penalty),
+            jac=True,
+            method="L-BFGS-B",
+        )
+        if not result.success:
+            logger.warning("Scoreline model fit did not converge", extra={"reason": str(result.message)})
+
+        theta = result.x
+        self.intercept, self.home_advantage = float(theta[0]), float(theta[1])
+        self.attack, self.defence = theta[2:2 + n_teams], theta[2 + n_teams:]
+        home_rate = np.exp(self.intercept + self.home_advantage + self.attack[home] + self.defence[away])
+        away_rate = np.exp(self.intercept + self.attack[away] + self.defence[home])
+        self.rho = self._fit_rho(home_goals, away_goals, home_rate, away_rate, weights)
+        self.samples = len(frame)
+        return self
+
+    @staticmethod
+    def _fit_rho(
+        home_goals: np.ndarray,
+        away_goals: np.ndarray,
+        home_rate: np.ndarray,
+        away_rate: np.ndarray,
+        weights: np.ndarray,
+    ) -> float:
+        """Fit the low-score correction with the rates held fixed"""
+        low = (home_goals <= 1) & (away_goals <= 1)
+        h, a = home_goals[low], away_goals[low]
+        lam, mu, w = home_rate[low], away_rate[low], weights[low]
+        if not len(h):
+            return 0.0
+
+        def negative_log_likelihood(rho: float) -> float:
+            tau = np.select(
+                [(h == 0) & (a == 0), (h == 0) & (a == 1), (h == 1) & (a == 0)],
+                [1 - lam * mu * rho, 1 + lam * rho, 1 + mu * rho],
+                default=1 - rho,
+            )
+            return -np.sum(w * np.log(np.maximum(tau, 1e-10)))
+
+        return float(minimize_scalar(negative_log_likelihood, bounds=RHO_BOUNDS, method="bounded").x)
+
+    # Prediction
+
+    def _strengths(self, team_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Attack and defence per team; unknown teams get the average (zero)"""
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        if not len(self.team_ids):
+            return np.zeros(len(team_ids)), np.zeros(len(team_ids))
+        position = np.clip(np.searchsorted(self.team_ids, team_ids), 0, len(self.team_ids) - 1)
+        known = self.team_ids[position] == team_ids
+        return np.where(known, self.attack[position], 0.0), np.where(known, self.defence[position], 0.0)
+
+    def rates(self, home_team_ids: np.ndarray, away_team_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Expected goals of each side"""
+        home_attack, home_defence = self._strengths(home_team_ids)
+        away_attack, away_defence = self._strengths(away_team_ids)
+        home_rate = np.exp(self.intercept + self.home_advantage + home_attack + away_defence)
+        away_rate = np.exp(self.intercept + away_attack + home_defence)
+        return home_rate, away_rate
+
+    def scoreline_grid(self, home_rate: np.ndarray, away_rate: np.ndarray) -> np.ndarray:
+        """Probability of every scoreline, shape (n, MAX_GOALS + 1, MAX_GOALS + 1)"""
+        log_home = _GOALS * np.log(home_rate)[:, None] - home_rate[:, None] - _LOG_FACTORIALS
+        log_away = _GOALS * np.log(away_rate)[:, None] - away_rate[:, None] - _LOG_FACTORIALS
+        grid = np.exp(log_home)[:, :, None] * np.exp(log_away)[:, None, :]
+
+        rho = self.rho
+        grid[:, 0, 0] *= 1 - home_rate * away_rate * rho
+        grid[:, 0, 1] *= 1 + home_rate * rho
+        grid[:, 1, 0] *= 1 + away_rate * rho
+        grid[:, 1, 1] *= 1 - rho
+        np.maximum(grid, 0, out=grid)
+        grid /= grid.sum(axis=(1, 2), keepdims=True)
+        return grid
+
+    def predict(
+        self,
+        home_team_ids: np.ndarray,
+        away_team_ids: np.ndarray,
+        outcomes: Optional[np.ndarray] = None,
+    ) -> ScorelinePrediction:
+        """Outcome probabilities and most likely scorelines for many fixtures
+
+        Args:
+            home_team_ids: Home team of each fixture
+            away_team_ids: Away team of each fixture
+            outcomes: Outcome to pick the scoreline within, e.g. a classifier's
+                prediction; defaults to this model's most likely outcome
+
+        Returns:
+            Row-aligned predictions
+        """
+        home_rate, away_rate = self.rates(home_team_ids, away_team_ids)
+        grid = self.scoreline_grid(home_rate, away_rate)
+        probabilities = np.einsum("nij,kij->nk", grid, _OUTCOME_MASKS)
+        if outcomes is None:
+            outcomes = probabilities.argmax(axis=1)
+
+        # Most likely scoreline consistent with each fixture's outcome
+        within = np.where(_OUTCOME_MASKS[outcomes], grid, -1.0)
+        best = within.reshape(len(grid), -1).argmax(axis=1)
+        home_goals, away_goals = np.divmod(best, MAX_GOALS + 1)
+        return ScorelinePrediction(
+            probabilities=probabilities,
+            home_goals=home_goals,
+            away_goals=away_goals,
+            home_rate=home_rate,
+            away_rate=away_rate,
+        )
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_scoreline_registry() -> ModelRegistry:
+    """Get the process-wide registry of scoreline models"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(
+            root=settings.MODEL_REGISTRY_DIR,
+            name=settings.SCORELINE_MODEL_NAME,
+            check_interval=settings.MODEL_RELOAD_CHECK_SECONDS,
+        )
+    return _registry
+
+
+async def refresh_scoreline_model(session: AsyncSession) -> Optional[str]:
+    """Fit a scoreline model on recent seasons and activate it
+
+    Returns:
+        The new version, or None when there are no completed matches
+    """
+    latest_season = await session.scalar(select(func.max(Match.season)).where(Match.status == "completed"))
+    if latest_season is None:
+        return None
+    seasons = range(latest_season - settings.PREDICTION_HISTORY_SEASONS + 1, latest_season + 1)
+    frame = await load_match_frame(session, seasons=seasons)
+    if frame.empty:
+        return None
+
+    model = DixonColesModel(half_life_days=settings.SCORELINE_HALF_LIFE_DAYS)
+    await asyncio.to_thread(model.fit, frame)
+    version = get_scoreline_registry().save(
+        model,
+        metadata={
+            "samples": model.samples,
+            "teams": len(model.team_ids),
+            "home_advantage": round(model.home_advantage, 4),
+            "rho": round(model.rho, 4),
+            "half_life_days": model.half_life_days,
+        },
+    )
+    logger.info("Fitted scoreline model", extra={"model_version": version, "samples": model.samples})
+    return version
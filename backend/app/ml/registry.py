@@ -0,0 +1,251 @@
+"""Versioned model registry with lazy, memory-mapped loading and hot swap
+
+Layout on disk::
+
+    {MODEL_REGISTRY_DIR}/{MODEL_NAME}/{version}/model.joblib
+    {MODEL_REGISTRY_DIR}/{MODEL_NAME}/{version}/metadata.json
+    {MODEL_REGISTRY_DIR}/{MODEL_NAME}/CURRENT      <- active version
+
+Artifacts are dumped uncompressed and loaded with ``mmap_mode="r"``, so the
+NumPy arrays inside a model are memory-mapped read-only and every uvicorn
+worker on the host shares the same page-cache pages instead of holding its own
+copy. Activating a new version rewrites ``CURRENT`` atomically; running
+workers notice within ``MODEL_RELOAD_CHECK_SECONDS``, load it in a background
+thread and swap the reference once it is ready, so requests keep being served
+by the old version while the new one loads.
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import joblib
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+ARTIFACT_FILENAME = "model.joblib"
+METADATA_FILENAME = "metadata.json"
+CURRENT_FILENAME = "CURRENT"
+
+
+class ModelNotAvailableError(RuntimeError):
+    """Raised when no trained model can be loaded"""
+
+
+@dataclass(frozen=True)
+class ModelHandle:
+    """A loaded model together with the version it was loaded from"""
+
+    model: Any
+    version: str
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+class ModelRegistry:
+    """Stores versioned model artifacts and serves the active one"""
+
+    def __init__(
+        self,
+        root: str,
+        name: str,
+        check_interval: float = 30.0,
+        legacy_path: Optional[str] = None,
+        legacy_version: str = "legacy",
+    ):
+        self.path = Path(root) / name
+        self.check_interval = check_interval
+        self.legacy_path = Path(legacy_path) if legacy_path else None
+        self.legacy_version = legacy_version
+
+        self._handle: Optional[ModelHandle] = None
+        self._next_check = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+        self._swap_task: Optional[asyncio.Task] = None
+
+    # Storage
+
+    def save(
+        self,
+        model: Any,
+        version: Optional[str] = None,
+        metadata: Optional[dict[str, Any]] = None,
+        activate: bool = True,
+    ) -> str:
+        """Store a model as a new version
+
+        The artifact is written to a temporary directory and renamed into
+        place, so readers never see a partially written version.
+
+        Returns:
+            The version identifier
+        """
+        version = version or get_utc_now().strftime("v%Y%m%d%H%M%S")
+        target = self.path / version
+        if target.exists():
+            raise ValueError(f"Model version {version} already exists")
+
+        staging = self.path / f".{version}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+
+        # Uncompressed on purpose: compressed artifacts cannot be memory-mapped
+        joblib.dump(model, staging / ARTIFACT_FILENAME)
+        metadata = {**(metadata or {}), "version": version, "created_at": get_utc_now().isoformat()}
+        (staging / METADATA_FILENAME).write_text(json.dumps(metadata, indent=2, default=str))
+        os.rename(staging, target)
+
+        logger.info("Saved model version", extra={"model_version": version, "path": str(target)})
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version: str) -> None:
+        """Point CURRENT at a stored version"""
+        if not (self.path / version / ARTIFACT_FILENAME).exists():
+            raise ValueError(f"Unknown model version {version}")
+        tmp = self.path / f"{CURRENT_FILENAME}.tmp"
+        tmp.write_text(version)
+        os.replace(tmp, self.path / CURRENT_FILENAME)
+        logger.info("Activated model version", extra={"model_version": version})
+
+    def list_versions(self) -> list[str]:
+        """List stored versions, oldest first"""
+        if not self.path.exists():
+            return []
+        return sorted(
+            p.name for p in self.path.iterdir()
+            if p.is_dir() and (p / ARTIFACT_FILENAME).exists()
+        )
+
+    def current_version(self) -> Optional[str]:
+        """Read the active version from disk"""
+        try:
+            return (self.path / CURRENT_FILENAME).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def read_metadata(self, version: str) -> dict[str, Any]:
+        try:
+            return json.loads((self.path / version / METADATA_FILENAME).read_text())
+        except FileNotFoundError:
+            return {}
+
+    def load(self, version: Optional[str]) -> ModelHandle:
+        """Load a version from disk, memory-mapping its arrays"""
+        if version is None:
+            if self.legacy_path is not None and self.legacy_path.exists():
+                model = joblib.load(self.legacy_path, mmap_mode="r")
+                return ModelHandle(model=model, version=self.legacy_version)
+            raise ModelNotAvailableError(f"No active model in {self.path}")
+
+        artifact = self.path / version / ARTIFACT_FILENAME
+        if not artifact.exists():
+            raise ModelNotAvailableError(f"Model version {version} not found in {self.path}")
+        model = joblib.load(artifact, mmap_mode="r")
+        return ModelHandle(model=model, version=version, metadata=self.read_metadata(version))
+
+    # Serving
+
+    def peek(self) -> Optional[ModelHandle]:
+        """Get the loaded model without triggering a load"""
+        return self._handle
+
+    async def get(self) -> ModelHandle:
+        """Get the active model, loading it on first use
+
+        Once a model is loaded, a newer active version is loaded in the
+        background and the current one keeps serving until the swap.
+        """
+        handle = self._handle
+        now = time.monotonic()
+        if handle is not None and now < self._next_check:
+            return handle
+        self._next_check = now + self.check_interval
+
+        version = self.current_version()
+        if handle is not None:
+            if version != handle.version and version is not None:
+                self._schedule_swap(version)
+            return handle
+
+        # A background warm-up may already be loading the model
+        if self._swap_task is not None and not self._swap_task.done():
+            await asyncio.shield(self._swap_task)
+            if self._handle is not None:
+                return self._handle
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._handle is None:
+                self._handle = await asyncio.to_thread(self.load, version)
+                logger.info("Loaded model", extra={"model_version": self._handle.version})
+            return self._handle
+
+    async def refresh(self) -> ModelHandle:
+        """Load a newly activated version now instead of at the next check"""
+        self._next_check = 0.0
+        handle = await self.get()
+        if self._swap_task is not None and not self._swap_task.done():
+            await asyncio.shield(self._swap_task)
+        return self._handle or handle
+
+    def _schedule_swap(self, version: Optional[str]) -> None:
+        if self._swap_task is not None and not self._swap_task.done():
+            return
+        self._swap_task = asyncio.create_task(self._swap(version))
+
+    async def _swap(self, version: Optional[str]) -> None:
+        try:
+            handle = await asyncio.to_thread(self.load, version)
+        except ModelNotAvailableError as e:
+            logger.warning("No model available", extra={"reason": str(e)})
+            return
+        except Exception:
+            logger.error("Failed to load model version", exc_info=True, extra={"model_version": version})
+            return
+        previous = self._handle
+        self._handle = handle
+        logger.info(
+            "Swapped model version",
+            extra={
+                "model_version": version,
+                "previous_version": previous.version if previous else None
+            }
+        )
+
+    def warm(self) -> None:
+        """Start loading the active model in the background"""
+        if self._handle is None:
+            self._schedule_swap(self.current_version())
+
+    async def close(self) -> None:
+        if self._swap_task is not None and not self._swap_task.done():
+            self._swap_task.cancel()
+        self._handle = None
+
+
+_registry: Optional[ModelRegistry] = None
+
+
+def get_registry() -> ModelRegistry:
+    """Get the process-wide model registry"""
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry(
+            root=settings.MODEL_REGISTRY_DIR,
+            name=settings.MODEL_NAME,
+            check_interval=settings.MODEL_RELOAD_CHECK_SECONDS,
+            legacy_path=settings.MODEL_PATH,
+            legacy_version=settings.MODEL_VERSION,
+        )
+    return _registry
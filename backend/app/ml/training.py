@@ -0,0 +1,343 @@
+"""Walk-forward model selection and training
+
+The feature matrix comes from the feature store, so a weekly run only
+computes features for the matches played since the last one. Every
+(candidate, fold) pair of the hyper-parameter grid is evaluated in a process
+pool; workers memory-map the matrix from the store instead of receiving a
+copy, and are limited to one BLAS thread each so the pool, not NumPy, owns
+the cores.
+
+Folds are walk-forward: each one trains on every match before a cut-off and
+is scored on the block that follows it, the way the model is used in
+production. The candidate with the lowest mean log loss is refitted on the
+whole matrix and activated in the registry, provided there are at least
+``MIN_TRAINING_SAMPLES`` rows and its walk-forward accuracy reaches
+``RETRAIN_THRESHOLD_ACCURACY``.
+
+Run by hand with ``python -m app.ml.training``; the scheduler runs the same
+command in a child process and reads the ``--result-file`` it writes.
+"""
+
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from sklearn.base import ClassifierMixin
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, log_loss
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sqlalchemy.ext.asyncio import AsyncSession
+from threadpoolctl import threadpool_limits
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.ml.feature_store import FeatureMatrix, get_feature_store
+from app.ml.features import FEATURE_COLUMNS, OUTCOME_LABELS
+from app.ml.poisson import refresh_scoreline_model
+from app.ml.registry import get_registry
+
+logger = get_logger(__name__)
+
+# Hyper-parameter grid per model family
+PARAM_GRID: dict[str, dict[str, list[Any]]] = {
+    "logistic_regression": {
+        "C": [0.03, 0.1, 0.3, 1.0, 3.0],
+    },
+    "hist_gradient_boosting": {
+        "learning_rate": [0.05, 0.1],
+        "max_depth": [3, 5],
+        "max_iter": [200],
+        "l2_regularization": [0.0, 1.0],
+    },
+}
+
+_LABELS = list(range(len(OUTCOME_LABELS)))
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """One point of the hyper-parameter grid"""
+
+    family: str
+    params: dict[str, Any] = field(default_factory=dict)
+
+    def build(self, random_state: int = 0) -> ClassifierMixin:
+        if self.family == "logistic_regression":
+            return make_pipeline(
+                StandardScaler(),
+                LogisticRegression(max_iter=1000, random_state=random_state, **self.params),
+            )
+        if self.family == "hist_gradient_boosting":
+            return HistGradientBoostingClassifier(random_state=random_state, **self.params)
+        raise ValueError(f"Unknown model family {self.family}")
+
+
+@dataclass
+class TrainingResult:
+    """Outcome of a training run"""
+
+    candidate: Candidate
+    samples: int
+    log_loss: float
+    accuracy: float
+    folds: list[dict[str, Any]]
+    version: Optional[str] = None
+    activated: bool = False
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "family": self.candidate.family,
+            "params": self.candidate.params,
+            "samples": self.samples,
+            "log_loss": self.log_loss,
+            "accuracy": self.accuracy,
+            "version": self.version,
+            "activated": self.activated,
+        }
+
+
+def expand_grid(grid: dict[str, dict[str, list[Any]]] = PARAM_GRID) -> list[Candidate]:
+    candidates = []
+    for family, params in grid.items():
+        names = list(params)
+        for values in itertools.product(*(params[name] for name in names)):
+            candidates.append(Candidate(family, dict(zip(names, values))))
+    return candidates
+
+
+def walk_forward_splits(match_dates: np.ndarray, n_splits: int, min_train: int) -> list[tuple[int, int]]:
+    """Expanding-window folds over a chronologically ordered matrix
+
+    Cut-offs are moved back to the first match of their day, so matches
+    played on the same day never end up on both sides of a fold.
+
+    Returns:
+        (train_end, test_end) row positions; fold k trains on
+        ``[:train_end]`` and is scored on ``[train_end:test_end]``
+    """
+    n = len(match_dates)
+    if n <= min_train:
+        return []
+    days = match_dates.astype("datetime64[D]")
+    cutoffs = np.linspace(min_train, n, n_splits + 1).astype(int)
+    cutoffs = [int(np.searchsorted(days, days[c], side="left")) if c < n else n for c in cutoffs]
+
+    splits = []
+    for train_end, test_end in zip(cutoffs, cutoffs[1:]):
+        if train_end > 0 and test_end > train_end:
+            splits.append((train_end, test_end))
+    return splits
+
+
+# Process pool workers
+
+_worker_X: Optional[np.ndarray] = None
+_worker_y: Optional[np.ndarray] = None
+
+
+def _init_worker(path: str) -> None:
+    """Memory-map the matrix once per worker and pin BLAS to one thread"""
+    global _worker_X, _worker_y
+    threadpool_limits(1)
+    _worker_X = np.load(Path(path) / "X.npy", mmap_mode="r")
+    _worker_y = np.load(Path(path) / "y.npy", mmap_mode="r")
+
+
+def _evaluate(candidate_index: int, candidate: Candidate, split: tuple[int, int]) -> dict[str, Any]:
+    train_end, test_end = split
+    started_at = time.perf_counter()
+    model = candidate.build()
+    model.fit(_worker_X[:train_end], _worker_y[:train_end])
+    probabilities = model.predict_proba(_worker_X[train_end:test_end])
+    y_test = _worker_y[train_end:test_end]
+    return {
+        "candidate": candidate_index,
+        "train_end": train_end,
+        "test_end": test_end,
+        "log_loss": float(log_loss(y_test, probabilities, labels=_LABELS)),
+        "accuracy": float(accuracy_score(y_test, probabilities.argmax(axis=1))),
+        "seconds": round(time.perf_counter() - started_at, 3),
+    }
+
+
+def default_workers() -> int:
+    """Pool size: TRAINING_WORKERS, or every core but one so the API keeps one"""
+    return settings.TRAINING_WORKERS or max(1, (os.cpu_count() or 1) - 1)
+
+
+def cross_validate(
+    matrix: FeatureMatrix,
+    candidates: list[Candidate],
+    splits: list[tuple[int, int]],
+    workers: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """Score every candidate on every fold in a process pool"""
+    # Spawned workers: forking a process with running threads (logging,
+    # event loop) can deadlock the child
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers or default_workers(),
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(str(matrix.path),),
+    ) as pool:
+        futures = [
+            pool.submit(_evaluate, index, candidate, split)
+            for index, candidate in enumerate(candidates)
+            for split in splits
+        ]
+        return [future.result() for future in futures]
+
+
+def train_from_matrix(
+    matrix: FeatureMatrix,
+    n_splits: int = settings.TRAINING_CV_SPLITS,
+    workers: Optional[int] = settings.TRAINING_WORKERS,
+    activate: bool = True,
+) -> Optional[TrainingResult]:
+    """Select, refit and store a model from a feature matrix
+
+    Returns:
+        The result, or None when there is not enough data to train
+    """
+    if len(matrix) < settings.MIN_TRAINING_SAMPLES:
+        logger.warning(
+            "Not enough completed matches to train",
+            extra={"samples": len(matrix), "required": settings.MIN_TRAINING_SAMPLES}
+        )
+        return None
+
+    min_train = max(settings.MIN_TRAINING_SAMPLES, len(matrix) // (n_splits + 1))
+    splits = walk_forward_splits(np.asarray(matrix.match_dates), n_splits, min_train)
+    if not splits:
+        logger.warning("Not enough completed matches for walk-forward validation", extra={"samples": len(matrix)})
+        return None
+
+    candidates = expand_grid()
+    started_at = time.perf_counter()
+    scores = cross_validate(matrix, candidates, splits, workers)
+    logger.info(
+        "Cross-validated candidates",
+        extra={
+            "candidates": len(candidates),
+            "folds": len(splits),
+            "duration_seconds": round(time.perf_counter() - started_at, 2),
+        }
+    )
+
+    by_candidate: dict[int, list[dict[str, Any]]] = {}
+    for score in scores:
+        by_candidate.setdefault(score["candidate"], []).append(score)
+    best_index = min(
+        by_candidate,
+        key=lambda index: (
+            np.mean([s["log_loss"] for s in by_candidate[index]]),
+            -np.mean([s["accuracy"] for s in by_candidate[index]]),
+        )
+    )
+    best = candidates[best_index]
+    folds = sorted(by_candidate[best_index], key=lambda s: s["train_end"])
+    result = TrainingResult(
+        candidate=best,
+        samples=len(matrix),
+        log_loss=round(float(np.mean([s["log_loss"] for s in folds])), 4),
+        accuracy=round(float(np.mean([s["accuracy"] for s in folds])), 4),
+        folds=folds,
+    )
+
+    if result.accuracy < settings.RETRAIN_THRESHOLD_ACCURACY:
+        logger.warning(
+            "Best candidate below accuracy threshold, keeping the current model",
+            extra={
+                "family": best.family,
+                "accuracy": result.accuracy,
+                "threshold": settings.RETRAIN_THRESHOLD_ACCURACY,
+            }
+        )
+        return result
+
+    model = best.build()
+    model.fit(np.asarray(matrix.X), np.asarray(matrix.y))
+    result.version = get_registry().save(
+        model,
+        metadata={
+            "family": best.family,
+            "params": best.params,
+            "samples": result.samples,
+            "feature_columns": FEATURE_COLUMNS,
+            "feature_matrix": matrix.summary(),
+            "walk_forward": {"log_loss": result.log_loss, "accuracy": result.accuracy, "folds": folds},
+        },
+        activate=activate,
+    )
+    result.activated = activate
+    logger.info(
+        "Trained model",
+        extra={
+            "model_version": result.version,
+            "family": best.family,
+            "params": best.params,
+            "log_loss": result.log_loss,
+            "accuracy": result.accuracy,
+        }
+    )
+    return result
+
+
+async def retrain_model(session: AsyncSession, activate: bool = True) -> Optional[TrainingResult]:
+    """Refresh the feature matrix and train new classifier and scoreline versions
+
+    Cross-validation and fitting run off the event loop.
+    """
+    matrix = await get_feature_store().refresh(session)
+    result = await asyncio.to_thread(train_from_matrix, matrix, activate=activate)
+    if activate:
+        await refresh_scoreline_model(session)
+    return result
+
+
+async def _main(result_file: Optional[str] = None) -> None:
+    from app.db.session import dispose_engine, get_session_factory
+
+    async with get_session_factory()() as session:
+        result = await retrain_model(session)
+    await dispose_engine()
+    if result_file is not None:
+        Path(result_file).write_text(json.dumps(result.summary() if result is not None else None))
+    if result is None:
+        print("Not enough data to train")
+    else:
+        print(
+            f"{result.candidate.family} {result.candidate.params}: log loss {result.log_loss}, "
+            f"accuracy {result.accuracy} over {len(result.folds)} folds, version {result.version}"
+        )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from app.core.logging import setup_logging, shutdown_logging
+
+    parser = argparse.ArgumentParser(description="Retrain the match outcome and scoreline models")
+    parser.add_argument("--result-file", help="Write the training summary to this JSON file")
+    parser.add_argument("--nice", type=int, default=0, help="Lower this process's and its workers' CPU priority")
+    args = parser.parse_args()
+    if args.nice and hasattr(os, "nice"):
+        # Inherited by the pool workers
+        os.nice(args.nice)
+
+    setup_logging()
+    try:
+        asyncio.run(_main(args.result_file))
+    finally:
+        shutdown_logging()
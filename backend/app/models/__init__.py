@@ -1,7 +1,11 @@
 """Models package - export all database models."""
 
+from app.models.api_validator import ApiValidator
 from app.models.competition import Competition
+from app.models.job_run import JobRun
 from app.models.match import Match
+from app.models.prediction import Prediction
 from app.models.team import Team
+from app.models.team_stats import TeamSeasonStats
 
-__all__ = ["Competition", "Team", "Match"]
\ No newline at end of file
+__all__ = ["Competition", "Team", "Match", "Prediction", "TeamSeasonStats", "JobRun", "ApiValidator"]
\ No newline at end of file
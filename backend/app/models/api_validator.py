@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Integer, DateTime
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db.base import Base
+
+class ApiValidator(Base):
+    """
+    Cache validators of the last persisted response to a football API request.
+
+    Written by app.services.football_api once a page has been stored, so the
+    next sync can send a conditional request however long ago it ran.
+    """
+    __tablename__ = "api_validators"
+
+    request_key: Mapped[str] = mapped_column(String(500), primary_key=True) # Path and sorted query, see request_key()
+
+    etag: Mapped[Optional[str]] = mapped_column(String(255))
+
+    last_modified: Mapped[Optional[str]] = mapped_column(String(64))
+
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+
+    total_pages: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ApiValidator(request_key='{self.request_key}')>"
+
+    def to_dict(self) -> dict:
+        return {
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "content_hash": self.content_hash,
+            "total_pages": self.total_pages,
+        }
@@ -0,0 +1,43 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import String, Integer, Float, DateTime, CheckConstraint, Index
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db.base import Base
+
+class JobRun(Base):
+    """
+    One execution of a scheduled background job.
+
+    Written by app.services.scheduler; the latest run of a job also tells the
+    other workers that it is not due yet.
+    """
+    __tablename__ = "job_runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    job_id: Mapped[str] = mapped_column(String(50), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(20), default="running", nullable=False)
+
+    worker: Mapped[str] = mapped_column(String(100), nullable=False) # host:pid of the process that ran the job
+
+    started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    duration_seconds: Mapped[Optional[float]] = mapped_column(Float)
+
+    rows: Mapped[Optional[int]] = mapped_column(Integer) # Rows processed, as reported by the job
+
+    error: Mapped[Optional[str]] = mapped_column(String(500))
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('running', 'succeeded', 'failed')",
+            name="check_job_status"
+        ),
+        Index("idx_job_runs_job_started", "job_id", "started_at"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<JobRun(id={self.id}, job_id='{self.job_id}', status='{self.status}')>"
@@ -42,7 +42,7 @@ class Match(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
 
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False, index=True) # Polled by the Elo engine
 
     competition: Mapped["Competition"] = relationship("Competition", back_populates="matches", lazy="joined")
 
@@ -50,7 +50,8 @@ class Match(Base):
 
     away_team: Mapped["Team"] = relationship("Team", foreign_keys=[away_team_id], back_populates="away_matches", lazy="joined")
 
-    # TODO: Add prediction relationship
+    # Loaded only on request: match reads should not pay for a join they rarely need
+    prediction: Mapped[Optional["Prediction"]] = relationship("Prediction", back_populates="match", uselist=False, lazy="noload", passive_deletes=True)
 
     # Table-level constraints
 
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Any
+from sqlalchemy import String, Integer, Float, DateTime, ForeignKey, JSON
+from sqlalchemy.orm import mapped_column, Mapped, relationship
+from app.db.base import Base
+
+class Prediction(Base):
+    """
+    Pre-generated prediction for an upcoming match.
+
+    Rows are written by the pre-generation job in app.services.prediction,
+    which recomputes a match only when its input_hash changes, so serving a
+    prediction is a primary key lookup.
+    """
+    __tablename__ = "predictions"
+
+    match_id: Mapped[int] = mapped_column(ForeignKey("matches.id", ondelete="CASCADE"), primary_key=True)
+
+    model_version: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+
+    input_hash: Mapped[str] = mapped_column(String(64), nullable=False) # Digest of the fixture, both teams' history and the model versions
+
+    predicted_outcome: Mapped[str] = mapped_column(String(10), nullable=False)
+
+    home_win_probability: Mapped[float] = mapped_column(Float, nullable=False)
+
+    draw_probability: Mapped[float] = mapped_column(Float, nullable=False)
+
+    away_win_probability: Mapped[float] = mapped_column(Float, nullable=False)
+
+    predicted_home_score: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    predicted_away_score: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    features_used: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
+
+    generated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    match: Mapped["Match"] = relationship("Match", back_populates="prediction")
+
+    def __repr__(self) -> str:
+        return f"<Prediction(match_id={self.match_id}, model_version='{self.model_version}')>"
+
+    @property
+    def probabilities(self) -> dict[str, float]:
+        return {
+            "home_win": self.home_win_probability,
+            "draw": self.draw_probability,
+            "away_win": self.away_win_probability,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """Shape the row like the prediction API payload"""
+        probabilities = self.probabilities
+        return {
+            "match_id": self.match_id,
+            "predicted_outcome": self.predicted_outcome,
+            "confidence": probabilities[self.predicted_outcome],
+            "predicted_score": {
+                "home": self.predicted_home_score,
+                "away": self.predicted_away_score
+            },
+            "probabilities": probabilities,
+            "model_version": self.model_version,
+            "generated_at": self.generated_at.isoformat(),
+            "features_used": list(self.features_used),
+        }
+
+    @staticmethod
+    def row_from_payload(payload: dict[str, Any], input_hash: str) -> dict[str, Any]:
+        """Column values for a prediction payload, for bulk upserts"""
+        return {
+            "match_id": payload["match_id"],
+            "model_version": payload["model_version"],
+            "input_hash": input_hash,
+            "predicted_outcome": payload["predicted_outcome"],
+            "home_win_probability": payload["probabilities"]["home_win"],
+            "draw_probability": payload["probabilities"]["draw"],
+            "away_win_probability": payload["probabilities"]["away_win"],
+            "predicted_home_score": payload["predicted_score"]["home"],
+            "predicted_away_score": payload["predicted_score"]["away"],
+            "features_used": payload["features_used"],
+            "generated_at": datetime.fromisoformat(payload["generated_at"]),
+        }
@@ -0,0 +1,127 @@
+from datetime import datetime
+from typing import Any
+from sqlalchemy import String, Integer, DateTime, ForeignKey
+from sqlalchemy.orm import mapped_column, Mapped
+from app.db.base import Base
+
+class TeamSeasonStats(Base):
+    """
+    Materialised per-team, per-season aggregates of league fixtures.
+
+    Cup and European games are left out so points, form and goal averages
+    describe one competition.
+
+    Rows are recomputed by app.services.team_stats only for the teams touched
+    by newly completed matches, so reads are a primary key lookup.
+    """
+    __tablename__ = "team_season_stats"
+
+    team_id: Mapped[int] = mapped_column(ForeignKey("teams.id", ondelete="CASCADE"), primary_key=True)
+
+    season: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    home_matches_played: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    home_wins: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    home_draws: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    home_losses: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    home_goals_scored: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    home_goals_conceded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    away_matches_played: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    away_wins: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    away_draws: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    away_losses: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    away_goals_scored: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    away_goals_conceded: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    clean_sheets: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    form: Mapped[str] = mapped_column(String(10), default="", nullable=False) # Most recent results, oldest first
+
+    goals_last_5: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    conceded_last_5: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<TeamSeasonStats(team_id={self.team_id}, season={self.season})>"
+
+    @property
+    def matches_played(self) -> int:
+        return self.home_matches_played + self.away_matches_played
+
+    @property
+    def wins(self) -> int:
+        return self.home_wins + self.away_wins
+
+    @property
+    def draws(self) -> int:
+        return self.home_draws + self.away_draws
+
+    @property
+    def losses(self) -> int:
+        return self.home_losses + self.away_losses
+
+    @property
+    def goals_scored(self) -> int:
+        return self.home_goals_scored + self.away_goals_scored
+
+    @property
+    def goals_conceded(self) -> int:
+        return self.home_goals_conceded + self.away_goals_conceded
+
+    @property
+    def points(self) -> int:
+        return self.wins * 3 + self.draws
+
+    def to_dict(self) -> dict[str, Any]:
+        """Shape the row like the team stats API payload"""
+        return {
+            "team_id": self.team_id,
+            "season": f"{self.season}/{self.season + 1}",
+            "overall": {
+                "matches_played": self.matches_played,
+                "wins": self.wins,
+                "draws": self.draws,
+                "losses": self.losses,
+                "goals_scored": self.goals_scored,
+                "goals_conceded": self.goals_conceded,
+                "goal_difference": self.goals_scored - self.goals_conceded,
+                "points": self.points,
+                "win_rate": round(self.wins / self.matches_played, 4) if self.matches_played else 0.0,
+                "clean_sheets": self.clean_sheets
+            },
+            "home": {
+                "matches_played": self.home_matches_played,
+                "wins": self.home_wins,
+                "draws": self.home_draws,
+                "losses": self.home_losses,
+                "goals_scored": self.home_goals_scored,
+                "goals_conceded": self.home_goals_conceded
+            },
+            "away": {
+                "matches_played": self.away_matches_played,
+                "wins": self.away_wins,
+                "draws": self.away_draws,
+                "losses": self.away_losses,
+                "goals_scored": self.away_goals_scored,
+                "goals_conceded": self.away_goals_conceded
+            },
+            "form": {
+                "current_form": self.form,
+                "last_5_results": list(self.form),
+                "goals_last_5": self.goals_last_5,
+                "conceded_last_5": self.conceded_last_5
+            }
+        }
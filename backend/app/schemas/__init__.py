@@ -1 +1,36 @@
 """Pydantic schemas for request/response validation"""
+
+from app.schemas.match import (
+    CompetitionSummary,
+    HeadToHead,
+    MatchDetail,
+    MatchDetailResponse,
+    MatchListResponse,
+    MatchSummary,
+    TeamDetail,
+    TeamSummary,
+)
+from app.schemas.prediction import (
+    BatchPredictionRequest,
+    BatchPredictionResponse,
+    Prediction,
+    PredictionResponse,
+)
+from app.schemas.stats import TeamStats, TeamStatsResponse
+
+__all__ = [
+    "BatchPredictionRequest",
+    "BatchPredictionResponse",
+    "CompetitionSummary",
+    "HeadToHead",
+    "MatchDetail",
+    "MatchDetailResponse",
+    "MatchListResponse",
+    "MatchSummary",
+    "Prediction",
+    "PredictionResponse",
+    "TeamDetail",
+    "TeamStats",
+    "TeamStatsResponse",
+    "TeamSummary",
+]
@@ -0,0 +1,79 @@
+"""Match response schemas"""
+
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class TeamSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    logo: Optional[str] = None
+
+
+class CompetitionSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+    country: Optional[str] = None
+
+
+class Score(BaseModel):
+    home: Optional[int] = None
+    away: Optional[int] = None
+
+
+class MatchSummary(BaseModel):
+    """A match as shown in listings"""
+
+    id: int
+    home_team: TeamSummary
+    away_team: TeamSummary
+    competition: CompetitionSummary
+    match_date: datetime
+    venue: Optional[str] = None
+    status: str
+    round: Optional[str] = None
+    season: int
+    score: Score
+
+
+class TeamRecord(BaseModel):
+    goals_scored: int
+    goals_conceded: int
+    wins: int
+    draws: int
+    losses: int
+
+
+class TeamDetail(TeamSummary):
+    form: str
+    stats: TeamRecord
+
+
+class HeadToHead(BaseModel):
+    total_matches: int
+    home_team_wins: int
+    away_team_wins: int
+    draws: int
+    last_5_results: list[str]
+
+
+class MatchDetail(MatchSummary):
+    """A match with team form, season stats and head-to-head record"""
+
+    home_team: TeamDetail
+    away_team: TeamDetail
+    head_to_head: HeadToHead
+
+
+class MatchListResponse(BaseModel):
+    success: bool = True
+    count: int
+    matches: list[MatchSummary]
+    next_cursor: Optional[str] = None
+
+
+class MatchDetailResponse(BaseModel):
+    success: bool = True
+    match: MatchDetail
@@ -0,0 +1,53 @@
+"""Prediction request and response schemas"""
+
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+MAX_BATCH_SIZE = 500
+
+
+class BatchPredictionRequest(BaseModel):
+    """Request body for predicting a list of fixtures at once"""
+
+    match_ids: list[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class PredictedScore(BaseModel):
+    home: int
+    away: int
+
+
+class OutcomeProbabilities(BaseModel):
+    home_win: float
+    draw: float
+    away_win: float
+
+
+class Prediction(BaseModel):
+    """Model output for one fixture"""
+
+    # model_version is a field, not pydantic's model_ namespace
+    model_config = ConfigDict(protected_namespaces=())
+
+    match_id: int
+    predicted_outcome: Literal["home_win", "draw", "away_win"]
+    confidence: float
+    predicted_score: PredictedScore
+    probabilities: OutcomeProbabilities
+    model_version: str
+    generated_at: datetime
+    features_used: list[str]
+
+
+class PredictionResponse(BaseModel):
+    success: bool = True
+    prediction: Prediction
+
+
+class BatchPredictionResponse(BaseModel):
+    success: bool = True
+    count: int
+    predictions: list[Prediction]
+    not_found: list[int]
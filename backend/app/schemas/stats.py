@@ -0,0 +1,45 @@
+"""Team statistics response schemas"""
+
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class VenueRecord(BaseModel):
+    matches_played: int
+    wins: int
+    draws: int
+    losses: int
+    goals_scored: int
+    goals_conceded: int
+
+
+class OverallRecord(VenueRecord):
+    goal_difference: int
+    points: int
+    win_rate: float
+    clean_sheets: int
+
+
+class FormRecord(BaseModel):
+    current_form: str
+    last_5_results: list[str]
+    goals_last_5: int
+    conceded_last_5: int
+
+
+class TeamStats(BaseModel):
+    """A team's record for one season"""
+
+    team_id: int
+    team_name: Optional[str] = None
+    season: str
+    overall: OverallRecord
+    home: VenueRecord
+    away: VenueRecord
+    form: FormRecord
+
+
+class TeamStatsResponse(BaseModel):
+    success: bool = True
+    stats: TeamStats
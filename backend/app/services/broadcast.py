@@ -0,0 +1,205 @@
+"""Broadcast hub pushing live score and prediction deltas to connected clients
+
+Each change is encoded to JSON once and the same string is queued for every
+subscribed connection. Slow consumers have their oldest queued messages
+dropped instead of growing memory without bound. With REDIS_URL configured,
+messages go through Redis pub/sub so every uvicorn worker delivers changes
+published by any other worker. The Redis listener reconnects with backoff
+after errors, and a failed publish falls back to this worker's subscribers.
+"""
+
+import asyncio
+import json
+from typing import Any, Optional, Sequence
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.services.events import MATCH_UPDATED, PREDICTION_UPDATED, MatchEvent, subscribe
+
+logger = get_logger(__name__)
+
+_RECONNECT_MAX_DELAY = 30.0  # seconds between Redis reconnect attempts, at most
+
+
+class Subscription:
+    """One connected client, optionally filtered to a set of matches"""
+
+    def __init__(self, match_ids: Optional[set[int]] = None, maxsize: int = 100):
+        self.match_ids = match_ids
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def wants(self, match_id: Optional[int]) -> bool:
+        return self.match_ids is None or match_id is None or match_id in self.match_ids
+
+    def offer(self, data: str) -> None:
+        """Queue a message, dropping the oldest one if the client is behind"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(data)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait for the next message, returning None on timeout"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class RedisPubSubBackend:
+    """Relays hub messages between workers through a Redis channel"""
+
+    def __init__(self, url: str, channel: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed") from e
+        self.channel = channel
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def publish(self, data: str) -> None:
+        await self._client.publish(self.channel, data)
+
+    async def listen(self, deliver) -> None:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(self.channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    deliver(message["data"])
+        finally:
+            await pubsub.unsubscribe(self.channel)
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class BroadcastHub:
+    """Fans out messages to every local subscription"""
+
+    def __init__(self, backend: Optional[RedisPubSubBackend] = None, queue_size: int = 100):
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subscriptions: set[Subscription] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, match_ids: Optional[set[int]] = None) -> Subscription:
+        subscription = Subscription(match_ids, self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    def deliver(self, data: str) -> None:
+        """Queue an encoded message for the local subscribers that want it"""
+        match_id = None
+        if any(s.match_ids is not None for s in self._subscriptions):
+            try:
+                message = json.loads(data)
+            except ValueError:
+                logger.warning("Dropping malformed broadcast message")
+                return
+            match_id = message.get("match_id") if isinstance(message, dict) else None
+        for subscription in self._subscriptions:
+            if subscription.wants(match_id):
+                subscription.offer(data)
+
+    async def publish(self, messages: Sequence[dict[str, Any]]) -> None:
+        """Encode messages once and send them to every worker's subscribers"""
+        for message in messages:
+            data = json.dumps(message, separators=(",", ":"), default=str)
+            if self.backend is not None:
+                try:
+                    await self.backend.publish(data)
+                    continue
+                except Exception:
+                    # Other workers miss this one, but local clients still get it
+                    logger.warning("Broadcast publish failed, delivering locally", exc_info=True)
+            self.deliver(data)
+
+    async def _listen_forever(self) -> None:
+        """Keep the backend listener running, reconnecting with backoff"""
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            started = loop.time()
+            try:
+                await self.backend.listen(self.deliver)
+                logger.warning("Broadcast listener stopped, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Broadcast listener failed, reconnecting", exc_info=True)
+            if loop.time() - started > _RECONNECT_MAX_DELAY:
+                # The connection was up for a while, so this is a fresh failure
+                attempt = 0
+            await asyncio.sleep(min(2 ** attempt, _RECONNECT_MAX_DELAY))
+            attempt += 1
+
+    async def start(self) -> None:
+        if self.backend is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_forever())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.backend is not None:
+            await self.backend.close()
+        self._subscriptions.clear()
+
+
+_hub: Optional[BroadcastHub] = None
+
+
+def get_hub() -> BroadcastHub:
+    """Get the process-wide broadcast hub"""
+    global _hub
+    if _hub is None:
+        backend = RedisPubSubBackend(settings.REDIS_URL, settings.STREAM_REDIS_CHANNEL) if settings.REDIS_URL else None
+        _hub = BroadcastHub(backend=backend, queue_size=settings.STREAM_QUEUE_SIZE)
+    return _hub
+
+
+def score_delta(event: MatchEvent) -> dict[str, Any]:
+    """Compact score change message"""
+    return {
+        "type": "score",
+        "match_id": event.match_id,
+        "status": event.status,
+        "home_score": event.home_score,
+        "away_score": event.away_score,
+    }
+
+
+def prediction_delta(prediction: dict[str, Any]) -> dict[str, Any]:
+    """Compact prediction change message"""
+    return {
+        "type": "prediction",
+        "match_id": prediction["match_id"],
+        "predicted_outcome": prediction["predicted_outcome"],
+        "probabilities": prediction["probabilities"],
+        "predicted_score": prediction["predicted_score"],
+        "model_version": prediction["model_version"],
+    }
+
+
+@subscribe(MATCH_UPDATED)
+async def on_matches_updated(events: Sequence[MatchEvent]) -> None:
+    await get_hub().publish([score_delta(event) for event in events])
+
+
+@subscribe(PREDICTION_UPDATED)
+async def on_predictions_updated(predictions: Sequence[dict[str, Any]]) -> None:
+    await get_hub().publish([prediction_delta(prediction) for prediction in predictions])
@@ -0,0 +1,360 @@
+"""Two-tier cache: bounded in-process LRU in front of an optional Redis backend
+
+Each namespace (prediction, match, stats) has its own TTL taken from settings.
+Misses are single-flight: concurrent requests for the same key share one
+loader call instead of all hitting the database or the model.
+
+Values are stored in their JSON form (encoded with orjson) in both tiers, so
+a hit returns the same types whichever tier served it: datetimes come back
+as ISO strings and dict keys as strings.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Protocol, Sequence
+
+import orjson
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import counter, gauge
+from app.core.serialization import encode_json
+from app.services.events import MATCH_COMPLETED, MATCH_UPDATED, MatchEvent, subscribe
+
+logger = get_logger(__name__)
+
+PREDICTION = "prediction"
+MATCH = "match"
+STATS = "stats"
+
+_MISSING = object()
+
+
+def stats_key(team_id: int, season: Optional[int] = None) -> str:
+    """Key of a team's stats entry, ``latest`` when no season is given"""
+    return f"{team_id}:{season if season is not None else 'latest'}"
+
+
+def namespace_ttl(namespace: str) -> int:
+    """Get the TTL in seconds configured for a namespace"""
+    return {
+        PREDICTION: settings.PREDICTION_CACHE_TTL,
+        MATCH: settings.MATCH_CACHE_TTL,
+        STATS: settings.STATS_CACHE_TTL,
+    }.get(namespace, settings.CACHE_TTL_SECONDS)
+
+
+class LRUCache:
+    """Bounded in-process LRU cache with per-entry expiry"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class CacheBackend(Protocol):
+    """Shared (cross-worker) cache backend storing JSON strings"""
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[str]]: ...
+
+    async def set_many(self, items: dict[str, str], ttl: int) -> None: ...
+
+    async def delete_many(self, keys: Sequence[str]) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryBackend:
+    """Dict-backed stand-in for Redis, for tests and single-process setups"""
+
+    def __init__(self):
+        self._data: dict[str, tuple[float, str]] = {}
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[str]]:
+        now = time.monotonic()
+        values: list[Optional[str]] = []
+        for key in keys:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                self._data.pop(key, None)
+                values.append(None)
+            else:
+                values.append(entry[1])
+        return values
+
+    async def set_many(self, items: dict[str, str], ttl: int) -> None:
+        expires_at = time.monotonic() + ttl
+        for key, value in items.items():
+            self._data[key] = (expires_at, value)
+
+    async def delete_many(self, keys: Sequence[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisBackend:
+    """Redis backend using redis-py's asyncio client"""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed") from e
+        self._client = redis_asyncio.from_url(url, decode_responses=True)
+
+    async def get_many(self, keys: Sequence[str]) -> list[Optional[str]]:
+        if not keys:
+            return []
+        return await self._client.mget(list(keys))
+
+    async def set_many(self, items: dict[str, str], ttl: int) -> None:
+        if not items:
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=ttl)
+            await pipe.execute()
+
+    async def delete_many(self, keys: Sequence[str]) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class TwoTierCache:
+    """Namespaced cache reading the local LRU first, then the shared backend
+
+    Local entries live at most ``LOCAL_CACHE_TTL_SECONDS`` so invalidations
+    issued by other workers through the shared backend take effect quickly.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        max_local_entries: int = 10000,
+        local_ttl: Optional[int] = None,
+    ):
+        self.backend = backend
+        self.local = LRUCache(max_local_entries)
+        self.local_ttl = local_ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.stats = {"local_hits": 0, "backend_hits": 0, "misses": 0, "loads": 0}
+
+    @staticmethod
+    def make_key(namespace: str, key: Any) -> str:
+        return f"{namespace}:{key}"
+
+    def _local_ttl(self, namespace: str) -> int:
+        ttl = namespace_ttl(namespace)
+        return min(ttl, self.local_ttl) if self.local_ttl else ttl
+
+    async def get_many(self, namespace: str, keys: Iterable[Any]) -> dict[Any, Any]:
+        """Get cached values for many keys, returning only the hits"""
+        found: dict[Any, Any] = {}
+        remote_keys: list[Any] = []
+        for key in keys:
+            value = self.local.get(self.make_key(namespace, key), _MISSING)
+            if value is _MISSING:
+                remote_keys.append(key)
+            else:
+                found[key] = value
+        self.stats["local_hits"] += len(found)
+
+        if remote_keys and self.backend is not None:
+            try:
+                raw_values = await self.backend.get_many([self.make_key(namespace, k) for k in remote_keys])
+            except Exception:
+                logger.warning("Cache backend read failed", exc_info=True)
+                raw_values = [None] * len(remote_keys)
+            local_ttl = self._local_ttl(namespace)
+            for key, raw in zip(remote_keys, raw_values):
+                if raw is None:
+                    continue
+                value = orjson.loads(raw)
+                found[key] = value
+                self.local.set(self.make_key(namespace, key), value, local_ttl)
+                self.stats["backend_hits"] += 1
+
+        self.stats["misses"] += sum(1 for key in remote_keys if key not in found)
+        return found
+
+    async def get(self, namespace: str, key: Any, default: Any = None) -> Any:
+        return (await self.get_many(namespace, [key])).get(key, default)
+
+    async def set_many(self, namespace: str, items: dict[Any, Any], ttl: Optional[int] = None) -> None:
+        """Store values in both tiers"""
+        await self._store(namespace, items, ttl)
+
+    async def _store(self, namespace: str, items: dict[Any, Any], ttl: Optional[int]) -> dict[Any, Any]:
+        """Store values in both tiers, returning them in the JSON form hits return"""
+        if not items:
+            return {}
+        ttl = ttl or namespace_ttl(namespace)
+        local_ttl = min(ttl, self._local_ttl(namespace))
+        encoded = {key: encode_json(value) for key, value in items.items()}
+        stored = {key: orjson.loads(raw) for key, raw in encoded.items()}
+        for key, value in stored.items():
+            self.local.set(self.make_key(namespace, key), value, local_ttl)
+
+        if self.backend is not None:
+            try:
+                await self.backend.set_many(
+                    {self.make_key(namespace, key): raw.decode() for key, raw in encoded.items()},
+                    ttl
+                )
+            except Exception:
+                logger.warning("Cache backend write failed", exc_info=True)
+        return stored
+
+    async def set(self, namespace: str, key: Any, value: Any, ttl: Optional[int] = None) -> None:
+        await self.set_many(namespace, {key: value}, ttl)
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: Any,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+    ) -> Any:
+        """Get a value, calling ``loader`` once on a miss even under concurrency
+
+        ``None`` results are not cached.
+        """
+        value = await self.get(namespace, key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        full_key = self.make_key(namespace, key)
+        inflight = self._inflight.get(full_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            self.stats["loads"] += 1
+            value = await loader()
+            if value is not None:
+                value = (await self._store(namespace, {key: value}, ttl))[key]
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(full_key, None)
+
+    async def invalidate(self, namespace: str, keys: Iterable[Any]) -> None:
+        """Drop keys from both tiers"""
+        full_keys = [self.make_key(namespace, key) for key in keys]
+        for full_key in full_keys:
+            self.local.delete(full_key)
+        if self.backend is not None and full_keys:
+            try:
+                await self.backend.delete_many(full_keys)
+            except Exception:
+                logger.warning("Cache backend delete failed", exc_info=True)
+
+    async def invalidate_matches(self, events: Iterable[MatchEvent]) -> None:
+        """Drop every entry derived from the given matches"""
+        events = list(events)
+        match_ids = {event.match_id for event in events}
+        stats_keys = {
+            key
+            for event in events
+            for team_id in (event.home_team_id, event.away_team_id)
+            for key in (stats_key(team_id, event.season), stats_key(team_id))
+        }
+        await self.invalidate(MATCH, match_ids)
+        await self.invalidate(PREDICTION, match_ids)
+        await self.invalidate(STATS, stats_keys)
+
+    def hit_ratio(self) -> float:
+        hits = self.stats["local_hits"] + self.stats["backend_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    async def close(self) -> None:
+        self.local.clear()
+        if self.backend is not None:
+            await self.backend.close()
+
+
+_cache: Optional[TwoTierCache] = None
+
+
+def get_cache() -> TwoTierCache:
+    """Get the process-wide cache, using Redis when REDIS_URL is configured"""
+    global _cache
+    if _cache is None:
+        backend = RedisBackend(settings.REDIS_URL) if settings.REDIS_URL else None
+        _cache = TwoTierCache(
+            backend=backend,
+            max_local_entries=settings.LOCAL_CACHE_MAX_ENTRIES,
+            local_ttl=settings.LOCAL_CACHE_TTL_SECONDS if backend is not None else None,
+        )
+    return _cache
+
+
+gauge("cache_hit_ratio", "Share of cache lookups served from either tier", callback=lambda: get_cache().hit_ratio())
+counter(
+    "cache_operations_total",
+    "Cache lookups and loads since start, by outcome",
+    ("outcome",),
+    callback=lambda: {(outcome,): count for outcome, count in get_cache().stats.items()}
+)
+
+
+def set_cache(cache: Optional[TwoTierCache]) -> None:
+    """Replace the process-wide cache, e.g. with an InMemoryBackend in tests"""
+    global _cache
+    _cache = cache
+
+
+async def close_cache() -> None:
+    """Release the cache backend, called on application shutdown"""
+    global _cache
+    if _cache is not None:
+        await _cache.close()
+    _cache = None
+
+
+@subscribe(MATCH_UPDATED)
+@subscribe(MATCH_COMPLETED)
+async def on_matches_changed(events: Sequence[MatchEvent]) -> None:
+    """Invalidate cached match, prediction and stats entries for changed matches"""
+    await get_cache().invalidate_matches(events)
@@ -0,0 +1,110 @@
+"""In-process event bus used to propagate data changes to dependent services"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Topics
+MATCH_UPDATED = "match.updated"
+MATCH_COMPLETED = "match.completed"
+PREDICTION_UPDATED = "prediction.updated"
+REFERENCE_UPDATED = "reference.updated"
+
+Handler = Callable[[Sequence[Any]], Awaitable[None]]
+
+_subscribers: dict[str, list[Handler]] = defaultdict(list)
+
+
+@dataclass(frozen=True)
+class MatchEvent:
+    """Snapshot of a match at the time it changed"""
+
+    match_id: int
+    competition_id: int
+    season: int
+    home_team_id: int
+    away_team_id: int
+    status: str
+    home_score: Optional[int] = None
+    away_score: Optional[int] = None
+    match_date: Optional[datetime] = None
+
+    @classmethod
+    def from_match(cls, match: Any) -> "MatchEvent":
+        """Build an event from a Match instance or a row with the same attributes"""
+        return cls(
+            match_id=match.id,
+            competition_id=match.competition_id,
+            season=match.season,
+            home_team_id=match.home_team_id,
+            away_team_id=match.away_team_id,
+            status=match.status,
+            home_score=match.home_score,
+            away_score=match.away_score,
+            match_date=match.match_date,
+        )
+
+    @property
+    def has_result(self) -> bool:
+        """Check if the event carries a final result"""
+        return (
+            self.status == "completed"
+            and self.home_score is not None
+            and self.away_score is not None
+        )
+
+
+@dataclass(frozen=True)
+class ReferenceEvent:
+    """A team or competition row that was inserted or changed"""
+
+    kind: str  # "team" or "competition"
+    id: int
+
+
+def subscribe(topic: str) -> Callable[[Handler], Handler]:
+    """Decorator registering an async handler for a topic
+
+    Handlers receive the whole batch of events published at once so they can
+    do their work in bulk.
+    """
+    def decorator(handler: Handler) -> Handler:
+        if handler not in _subscribers[topic]:
+            _subscribers[topic].append(handler)
+        return handler
+    return decorator
+
+
+def unsubscribe(topic: str, handler: Handler) -> None:
+    """Remove a previously registered handler"""
+    if handler in _subscribers[topic]:
+        _subscribers[topic].remove(handler)
+
+
+async def publish(topic: str, events: Sequence[Any]) -> None:
+    """Deliver a batch of events to every handler of a topic
+
+    Handlers run concurrently; a failing handler is logged and does not
+    prevent the others from running.
+    """
+    handlers = list(_subscribers.get(topic, ()))
+    if not events or not handlers:
+        return
+
+    results = await asyncio.gather(
+        *(handler(events) for handler in handlers),
+        return_exceptions=True
+    )
+    for handler, result in zip(handlers, results):
+        if isinstance(result, Exception):
+            logger.error(
+                "Event handler failed",
+                exc_info=result,
+                extra={"topic": topic, "handler": handler.__qualname__, "events": len(events)}
+            )
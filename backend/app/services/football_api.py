@@ -0,0 +1,309 @@
+"""Async client for the external football data API
+
+All requests share one connection pool and go through a token-bucket rate
+limiter, are retried with jittered exponential backoff on throttling, server
+errors and timeouts, and identical requests issued concurrently share a single
+HTTP call. Conditional fetches send ``If-None-Match``/``If-Modified-Since`` and
+compare a content hash, so unchanged fixtures and standings are not downloaded
+or written again on every sync run.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.session import get_session_factory
+from app.models.api_validator import ApiValidator
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class FootballAPIError(RuntimeError):
+    """Raised when the football API returns an unusable response"""
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by all requests of a client"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class FetchResult:
+    """Outcome of a conditional fetch
+
+    ``data`` is None when the resource did not change since it was last
+    remembered with FootballAPIClient.remember().
+    """
+
+    key: str
+    data: Optional[dict[str, Any]]
+    not_modified: bool
+    validators: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def total_pages(self) -> int:
+        return int(self.validators.get("total_pages") or 1)
+
+
+def request_key(path: str, params: Optional[dict[str, Any]] = None) -> str:
+    """Stable identity of a request, used for dedupe and validators"""
+    query = "&".join(f"{k}={params[k]}" for k in sorted(params or {}))
+    return f"{path}?{query}"
+
+
+async def load_validators(key: str) -> dict[str, Any]:
+    """Validators remembered for a request, empty when unknown or expired
+
+    They are kept in the database rather than the cache: syncs run hours or
+    days apart, far longer than any cache entry is kept.
+    """
+    cutoff = get_utc_now() - timedelta(seconds=settings.EXTERNAL_API_VALIDATOR_TTL)
+    async with get_session_factory()() as session:
+        row = await session.scalar(
+            select(ApiValidator).where(ApiValidator.request_key == key, ApiValidator.updated_at >= cutoff)
+        )
+    return row.to_dict() if row is not None else {}
+
+
+async def save_validators(key: str, validators: dict[str, Any]) -> None:
+    values = {
+        "etag": validators.get("etag"),
+        "last_modified": validators.get("last_modified"),
+        "content_hash": validators["content_hash"],
+        "total_pages": int(validators.get("total_pages") or 1),
+        "updated_at": get_utc_now(),
+    }
+    stmt = pg_insert(ApiValidator).values(request_key=key, **values)
+    stmt = stmt.on_conflict_do_update(index_elements=[ApiValidator.request_key], set_=values)
+    async with get_session_factory()() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+class FootballAPIClient:
+    """Pooled, rate-limited async client for the football API
+
+    One client (and its connection pool) is meant to be shared by every sync
+    task in the process. Pass an ``httpx.MockTransport`` as ``transport`` to
+    serve recorded responses in tests.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        base_url = base_url or settings.FOOTBALL_API_BASE_URL
+        max_connections = max_connections or settings.EXTERNAL_API_MAX_CONNECTIONS
+        self.max_retries = max_retries if max_retries is not None else settings.EXTERNAL_API_MAX_RETRIES
+        self._bucket = TokenBucket(
+            rate=rate_per_second or settings.EXTERNAL_API_RATE_PER_SECOND,
+            capacity=burst or settings.EXTERNAL_API_BURST,
+        )
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={
+                "x-rapidapi-key": api_key if api_key is not None else settings.FOOTBALL_API_KEY,
+                "x-rapidapi-host": httpx.URL(base_url).host,
+            },
+            timeout=httpx.Timeout(timeout or settings.EXTERNAL_API_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            transport=transport,
+        )
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before retrying, honouring Retry-After"""
+        if retry_after:
+            try:
+                return min(float(retry_after), settings.EXTERNAL_API_BACKOFF_MAX)
+            except ValueError:
+                pass
+        ceiling = min(settings.EXTERNAL_API_BACKOFF_MAX, settings.EXTERNAL_API_BACKOFF_BASE * 2 ** attempt)
+        # Full jitter keeps concurrent retries from hitting the API in lockstep
+        return random.uniform(0, ceiling)
+
+    async def _request(
+        self,
+        path: str,
+        params: Optional[dict[str, Any]],
+        headers: Optional[dict[str, str]] = None,
+    ) -> tuple[int, httpx.Headers, bytes]:
+        """Send one GET with rate limiting and retries
+
+        The body is streamed into a single bytes buffer and decoded once by
+        the caller, skipping httpx's intermediate text decoding.
+        """
+        attempt = 0
+        while True:
+            await self._bucket.acquire()
+            retry_after = None
+            try:
+                async with self._client.stream("GET", path, params=params, headers=headers) as response:
+                    if response.status_code not in RETRY_STATUS_CODES:
+                        if response.status_code != 304:
+                            response.raise_for_status()
+                        return response.status_code, response.headers, await response.aread()
+                    retry_after = response.headers.get("Retry-After")
+                    error: Exception = httpx.HTTPStatusError(
+                        f"Retryable status {response.status_code}", request=response.request, response=response
+                    )
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                error = e
+
+            if attempt >= self.max_retries:
+                raise error
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(
+                "Retrying football API request",
+                extra={"path": path, "attempt": attempt + 1, "delay": round(delay, 3), "error": str(error)}
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one in-flight call between identical concurrent requests"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await factory()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    @staticmethod
+    def _decode(path: str, body: bytes) -> dict[str, Any]:
+        data = json.loads(body)
+        errors = data.get("errors")
+        if errors:
+            raise FootballAPIError(f"Football API error for {path}: {errors}")
+        return data
+
+    async def get(self, path: str, params: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+        """GET an endpoint and decode its JSON body"""
+        async def fetch() -> dict[str, Any]:
+            _, _, body = await self._request(path, params)
+            return self._decode(path, body)
+
+        return await self._single_flight("get:" + request_key(path, params), fetch)
+
+    async def fetch(self, path: str, params: Optional[dict[str, Any]] = None) -> FetchResult:
+        """Conditionally GET an endpoint
+
+        Sends the validators remembered for this request and reports
+        ``not_modified`` on a 304 or when the body hash is unchanged. New
+        validators are only stored once the caller calls remember(), i.e.
+        after the data has been persisted.
+        """
+        key = request_key(path, params)
+
+        async def fetch() -> FetchResult:
+            previous = await load_validators(key)
+            headers = {}
+            if previous.get("etag"):
+                headers["If-None-Match"] = previous["etag"]
+            if previous.get("last_modified"):
+                headers["If-Modified-Since"] = previous["last_modified"]
+
+            status_code, response_headers, body = await self._request(path, params, headers)
+            if status_code == 304:
+                return FetchResult(key=key, data=None, not_modified=True, validators=previous)
+
+            digest = hashlib.sha256(body).hexdigest()
+            if digest == previous.get("content_hash"):
+                return FetchResult(key=key, data=None, not_modified=True, validators=previous)
+
+            data = self._decode(path, body)
+            validators = {
+                "etag": response_headers.get("ETag"),
+                "last_modified": response_headers.get("Last-Modified"),
+                "content_hash": digest,
+                "total_pages": int(data.get("paging", {}).get("total", 1) or 1),
+            }
+            return FetchResult(key=key, data=data, not_modified=False, validators=validators)
+
+        return await self._single_flight("fetch:" + key, fetch)
+
+    async def remember(self, result: FetchResult) -> None:
+        """Store a fetch's validators so the next identical fetch can be skipped"""
+        if result.not_modified:
+            return
+        await save_validators(result.key, result.validators)
+
+    async def fetch_many(self, requests: list[tuple[str, Optional[dict[str, Any]]]]) -> list[dict[str, Any]]:
+        """GET many endpoints concurrently under the shared rate limit"""
+        return await asyncio.gather(*(self.get(path, params) for path, params in requests))
+
+    async def iter_pages(self, path: str, params: Optional[dict[str, Any]] = None) -> AsyncIterator[FetchResult]:
+        """Conditionally fetch every page of a paginated endpoint
+
+        The next page is requested while the caller processes the current
+        one, so network and database work overlap. Unchanged pages are
+        yielded with ``not_modified`` set and no data.
+        """
+        params = dict(params or {})
+        page = await self.fetch(path, params)
+        total_pages = page.total_pages
+
+        for page_number in range(2, total_pages + 1):
+            next_page = asyncio.create_task(self.fetch(path, {**params, "page": page_number}))
+            try:
+                yield page
+            except BaseException:
+                next_page.cancel()
+                raise
+            page = await next_page
+        yield page
+
+    async def close(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,417 @@
+"""Fixture ingestion from the football API
+
+Fixtures are written in bulk with ``INSERT ... ON CONFLICT (external_id) DO
+UPDATE`` statements, one per batch, instead of row-by-row ORM adds. Rows whose
+values did not change are left untouched so ``updated_at`` keeps meaning "the
+data changed". A fixture landing on another row's ``unique_match`` slot is
+reconciled before the batch is written, so it cannot fail the whole page.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.session import get_session_factory
+from app.models.competition import Competition
+from app.models.match import Match
+from app.models.team import Team
+from app.services.events import (
+    MATCH_COMPLETED,
+    MATCH_UPDATED,
+    REFERENCE_UPDATED,
+    MatchEvent,
+    ReferenceEvent,
+    publish,
+)
+from app.services.football_api import FootballAPIClient
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+# API-Football short status codes -> Match.status
+STATUS_MAP = {
+    "TBD": "scheduled",
+    "NS": "scheduled",
+    "1H": "live",
+    "HT": "live",
+    "2H": "live",
+    "ET": "live",
+    "BT": "live",
+    "P": "live",
+    "INT": "live",
+    "LIVE": "live",
+    "FT": "completed",
+    "AET": "completed",
+    "PEN": "completed",
+    "PST": "postponed",
+    "SUSP": "postponed",
+    "CANC": "cancelled",
+    "ABD": "cancelled",
+    "AWD": "cancelled",
+    "WO": "cancelled",
+}
+
+_CUP_KEYWORDS = ("cup", "copa", "coppa", "coupe", "pokal", "trophy", "super")
+
+_MATCH_UPDATE_COLUMNS = [
+    "competition_id",
+    "home_team_id",
+    "away_team_id",
+    "match_date",
+    "venue",
+    "season",
+    "round",
+    "home_score",
+    "away_score",
+    "status",
+    "referee",
+]
+
+
+@dataclass
+class SyncResult:
+    """Counters reported by a sync run"""
+
+    pages: int = 0
+    fixtures: int = 0
+    matches_written: int = 0
+
+    def add(self, other: "SyncResult") -> None:
+        self.pages += other.pages
+        self.fixtures += other.fixtures
+        self.matches_written += other.matches_written
+
+
+@dataclass
+class FixtureChanges:
+    """Rows actually inserted or changed by one upsert batch"""
+
+    matches: list[MatchEvent] = field(default_factory=list)
+    references: list[ReferenceEvent] = field(default_factory=list)
+
+
+def current_season(now: Optional[datetime] = None) -> int:
+    """European seasons start in July and are named after their first year"""
+    now = now or get_utc_now()
+    return now.year if now.month >= 7 else now.year - 1
+
+
+def map_status(short_status: Optional[str]) -> str:
+    return STATUS_MAP.get((short_status or "").upper(), "scheduled")
+
+
+def _competition_type(name: str) -> str:
+    lowered = name.lower()
+    if "friendl" in lowered:
+        return "friendly"
+    if any(keyword in lowered for keyword in _CUP_KEYWORDS):
+        return "cup"
+    return "league"
+
+
+def parse_fixture(item: dict[str, Any]) -> tuple[dict[str, Any], list[dict[str, Any]], dict[str, Any]]:
+    """Split one API fixture into competition, team and match rows
+
+    The match row still references external ids; they are resolved to
+    primary keys after the competitions and teams are upserted.
+    """
+    fixture = item["fixture"]
+    league = item["league"]
+    teams = item["teams"]
+    goals = item.get("goals") or {}
+
+    competition = {
+        "external_id": league["id"],
+        "name": league["name"],
+        "type": _competition_type(league["name"]),
+        "logo_url": league.get("logo"),
+        "country": league.get("country"),
+    }
+    team_rows = [
+        {"external_id": teams[side]["id"], "name": teams[side]["name"], "logo_url": teams[side].get("logo")}
+        for side in ("home", "away")
+    ]
+    match = {
+        "external_id": fixture["id"],
+        "competition_external_id": league["id"],
+        "home_team_external_id": teams["home"]["id"],
+        "away_team_external_id": teams["away"]["id"],
+        "match_date": datetime.fromisoformat(fixture["date"]),
+        "venue": ((fixture.get("venue") or {}).get("name") or None),
+        "season": league["season"],
+        "round": league.get("round"),
+        "home_score": goals.get("home"),
+        "away_score": goals.get("away"),
+        "status": map_status((fixture.get("status") or {}).get("short")),
+        "referee": fixture.get("referee"),
+    }
+    return competition, team_rows, match
+
+
+def _dedupe(rows: Iterable[dict[str, Any]], key: str) -> list[dict[str, Any]]:
+    """Keep the last row per key; Postgres rejects an upsert touching a row twice"""
+    return list({row[key]: row for row in rows}.values())
+
+
+def _utc(value: datetime) -> datetime:
+    """Aware UTC datetime; SQLite hands timestamps back naive"""
+    return value.astimezone(timezone.utc) if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _unique_match_key(row: Any) -> tuple:
+    return row["competition_id"], row["season"], row["home_team_id"], row["away_team_id"], _utc(row["match_date"])
+
+
+async def _resolve_unique_collisions(session: AsyncSession, rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Reconcile fixtures whose unique_match slot is held by a row with another external_id
+
+    The upsert only handles conflicts on external_id, so such a fixture
+    would fail the whole batch. The existing row takes over the new
+    external_id and is then updated by the upsert like any other; a fixture
+    whose external_id already belongs to yet another row is dropped instead,
+    as writing it would still collide.
+    """
+    if not rows:
+        return rows
+    external_ids = [row["external_id"] for row in rows]
+    result = await session.execute(
+        select(
+            Match.id,
+            Match.external_id,
+            Match.competition_id,
+            Match.season,
+            Match.home_team_id,
+            Match.away_team_id,
+            Match.match_date,
+        ).where(
+            tuple_(Match.competition_id, Match.season, Match.home_team_id, Match.away_team_id).in_(
+                {(r["competition_id"], r["season"], r["home_team_id"], r["away_team_id"]) for r in rows}
+            ),
+            Match.external_id.not_in(external_ids),
+        )
+    )
+    holders = {_unique_match_key(row._mapping): row for row in result}
+    if not holders:
+        return rows
+
+    known = set((await session.execute(
+        select(Match.external_id).where(Match.external_id.in_(external_ids))
+    )).scalars())
+    kept = []
+    for row in rows:
+        holder = holders.get(_unique_match_key(row))
+        if holder is None:
+            kept.append(row)
+        elif row["external_id"] in known:
+            logger.warning(
+                "Skipping fixture colliding with another match",
+                extra={"external_id": row["external_id"], "match_id": holder.id}
+            )
+        else:
+            await session.execute(
+                update(Match).where(Match.id == holder.id).values(external_id=row["external_id"])
+            )
+            logger.info(
+                "Re-keyed match to the fixture's external id",
+                extra={"match_id": holder.id, "old_external_id": holder.external_id, "external_id": row["external_id"]}
+            )
+            kept.append(row)
+    return kept
+
+
+async def _upsert_reference(
+    session: AsyncSession,
+    model: Any,
+    rows: Sequence[dict[str, Any]],
+    update_columns: Sequence[str],
+) -> tuple[dict[int, int], list[int]]:
+    """Upsert competitions or teams
+
+    Returns:
+        Tuple of (external id -> primary key, ids of rows inserted or changed)
+    """
+    rows = _dedupe(rows, "external_id")
+    if not rows:
+        return {}, []
+
+    now = get_utc_now()
+    for row in rows:
+        row.setdefault("created_at", now)
+        row.setdefault("updated_at", now)
+
+    stmt = pg_insert(model).values(rows)
+    table = model.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.external_id],
+        set_={**{c: stmt.excluded[c] for c in update_columns}, "updated_at": stmt.excluded.updated_at},
+        where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in update_columns))
+    ).returning(table.c.id)
+    changed = list((await session.execute(stmt)).scalars())
+
+    external_ids = [row["external_id"] for row in rows]
+    result = await session.execute(
+        select(table.c.external_id, table.c.id).where(table.c.external_id.in_(external_ids))
+    )
+    return dict(result.all()), changed
+
+
+async def upsert_fixtures(session: AsyncSession, items: Sequence[dict[str, Any]]) -> FixtureChanges:
+    """Bulk upsert one batch of API fixtures
+
+    Returns:
+        Events for the matches, teams and competitions that were inserted or
+        actually changed
+    """
+    changes = FixtureChanges()
+    if not items:
+        return changes
+
+    competitions, teams, matches = [], [], []
+    for item in items:
+        competition, team_rows, match = parse_fixture(item)
+        competitions.append(competition)
+        teams.extend(team_rows)
+        matches.append(match)
+
+    competition_ids, changed_competitions = await _upsert_reference(
+        session, Competition, competitions, ["name", "logo_url", "country"]
+    )
+    team_ids, changed_teams = await _upsert_reference(session, Team, teams, ["name", "logo_url"])
+    changes.references.extend(ReferenceEvent("competition", i) for i in changed_competitions)
+    changes.references.extend(ReferenceEvent("team", i) for i in changed_teams)
+
+    now = get_utc_now()
+    rows = []
+    for match in matches:
+        row = {key: value for key, value in match.items() if not key.endswith("_external_id")}
+        row["competition_id"] = competition_ids[match["competition_external_id"]]
+        row["home_team_id"] = team_ids[match["home_team_external_id"]]
+        row["away_team_id"] = team_ids[match["away_team_external_id"]]
+        row["created_at"] = now
+        row["updated_at"] = now
+        rows.append(row)
+
+    # Respect unique_match as well as external_id within the batch
+    rows = _dedupe(rows, "external_id")
+    rows = list({_unique_match_key(r): r for r in rows}.values())
+    rows = await _resolve_unique_collisions(session, rows)
+
+    table = Match.__table__
+    for start in range(0, len(rows), settings.INGESTION_BATCH_SIZE):
+        stmt = pg_insert(Match).values(rows[start:start + settings.INGESTION_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.external_id],
+            set_={**{c: stmt.excluded[c] for c in _MATCH_UPDATE_COLUMNS}, "updated_at": stmt.excluded.updated_at},
+            where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in _MATCH_UPDATE_COLUMNS))
+        ).returning(
+            table.c.id,
+            table.c.competition_id,
+            table.c.season,
+            table.c.home_team_id,
+            table.c.away_team_id,
+            table.c.status,
+            table.c.home_score,
+            table.c.away_score,
+            table.c.match_date,
+        )
+        result = await session.execute(stmt)
+        changes.matches.extend(MatchEvent(*row) for row in result.all())
+    return changes
+
+
+async def publish_match_events(events: Sequence[MatchEvent]) -> None:
+    """Notify dependent caches and aggregates about written matches"""
+    if not events:
+        return
+    await publish(MATCH_UPDATED, events)
+    completed = [event for event in events if event.has_result]
+    if completed:
+        await publish(MATCH_COMPLETED, completed)
+
+
+async def sync_league_season(
+    client: FootballAPIClient,
+    session: AsyncSession,
+    league_id: int,
+    season: int,
+) -> SyncResult:
+    """Fetch and store every fixture of one league season
+
+    Each page is committed on its own so a long backfill never holds one
+    giant transaction. Pages the API reports as unchanged are skipped.
+    """
+    result = SyncResult()
+    async for page in client.iter_pages("/fixtures", {"league": league_id, "season": season}):
+        result.pages += 1
+        if page.not_modified:
+            continue
+
+        items = page.data.get("response") or []
+        changes = await upsert_fixtures(session, items)
+        await session.commit()
+        await client.remember(page)
+        if changes.references:
+            await publish(REFERENCE_UPDATED, changes.references)
+        await publish_match_events(changes.matches)
+
+        result.fixtures += len(items)
+        result.matches_written += len(changes.matches)
+
+    logger.info(
+        "Synced fixtures",
+        extra={
+            "league_id": league_id,
+            "season": season,
+            "fixtures": result.fixtures,
+            "matches_written": result.matches_written
+        }
+    )
+    return result
+
+
+async def sync_fixtures(
+    league_ids: Optional[Iterable[int]] = None,
+    seasons: Optional[Iterable[int]] = None,
+    client: Optional[FootballAPIClient] = None,
+) -> SyncResult:
+    """Sync fixtures for every (league, season) pair concurrently
+
+    Defaults to SYNC_LEAGUE_IDS and the current season. Pass several seasons
+    for a backfill; at most INGESTION_CONCURRENCY pairs run at once, each with
+    its own database session.
+    """
+    league_ids = list(league_ids or settings.SYNC_LEAGUE_IDS)
+    seasons = list(seasons or [current_season()])
+    owns_client = client is None
+    client = client or FootballAPIClient()
+    semaphore = asyncio.Semaphore(settings.INGESTION_CONCURRENCY)
+    session_factory = get_session_factory()
+
+    async def run(league_id: int, season: int) -> SyncResult:
+        async with semaphore:
+            async with session_factory() as session:
+                return await sync_league_season(client, session, league_id, season)
+
+    total = SyncResult()
+    try:
+        results = await asyncio.gather(
+            *(run(league_id, season) for league_id in league_ids for season in seasons),
+            return_exceptions=True
+        )
+    finally:
+        if owns_client:
+            await client.close()
+
+    for result in results:
+        if isinstance(result, Exception):
+            logger.error("Fixture sync failed", exc_info=result)
+        else:
+            total.add(result)
+    return total
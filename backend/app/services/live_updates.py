@@ -0,0 +1,199 @@
+"""Live match result updater
+
+Polls only matches that are live or kicked off recently, diffs the API scores
+against the stored ones and writes the changed rows with a single bulk UPDATE,
+so database writes stay proportional to actual score changes. Only one
+uvicorn worker polls: the updater holds an advisory lock while it runs and
+the other workers wait to take over.
+"""
+
+import asyncio
+from datetime import timedelta
+from typing import Any, Optional
+
+from sqlalchemy import and_, bindparam, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.db.locks import try_hold_advisory_lock
+from app.db.session import get_session_factory
+from app.models.match import Match
+from app.services.events import MatchEvent
+from app.services.football_api import FootballAPIClient
+from app.services.ingestion import map_status, publish_match_events
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+# API-Football accepts up to 20 fixture ids per request
+FIXTURE_IDS_PER_REQUEST = 20
+
+LIVE_UPDATES_LOCK = "live_updates"
+
+_bulk_update = (
+    update(Match.__table__)
+    .where(Match.__table__.c.id == bindparam("b_id"))
+    .values(
+        status=bindparam("b_status"),
+        home_score=bindparam("b_home_score"),
+        away_score=bindparam("b_away_score"),
+        updated_at=bindparam("b_updated_at"),
+    )
+)
+
+
+async def load_live_window(session: AsyncSession, window_minutes: Optional[int] = None) -> list[Any]:
+    """Load matches that are live, or scheduled to kick off within the window
+
+    Live matches are loaded however long ago they kicked off, so delayed or
+    suspended games keep being polled until they finish. Both conditions
+    lead with a status equality, which ``idx_matches_status_date`` answers
+    without scanning the table.
+    """
+    now = get_utc_now()
+    window_start = now - timedelta(minutes=window_minutes or settings.LIVE_WINDOW_MINUTES)
+    result = await session.execute(
+        select(
+            Match.id,
+            Match.external_id,
+            Match.competition_id,
+            Match.season,
+            Match.home_team_id,
+            Match.away_team_id,
+            Match.status,
+            Match.home_score,
+            Match.away_score,
+            Match.match_date,
+        ).where(
+            or_(
+                Match.status == "live",
+                and_(
+                    Match.status == "scheduled",
+                    Match.match_date.between(window_start, now + timedelta(minutes=5)),
+                ),
+            )
+        )
+    )
+    return result.all()
+
+
+def diff_results(stored: list[Any], fixtures: list[dict[str, Any]]) -> list[MatchEvent]:
+    """Compare API fixtures with stored rows and return only the changed matches"""
+    by_external_id = {row.external_id: row for row in stored}
+    changed: list[MatchEvent] = []
+    for item in fixtures:
+        row = by_external_id.get(item["fixture"]["id"])
+        if row is None:
+            continue
+        goals = item.get("goals") or {}
+        status = map_status((item["fixture"].get("status") or {}).get("short"))
+        home_score, away_score = goals.get("home"), goals.get("away")
+        if (status, home_score, away_score) == (row.status, row.home_score, row.away_score):
+            continue
+        changed.append(MatchEvent(
+            match_id=row.id,
+            competition_id=row.competition_id,
+            season=row.season,
+            home_team_id=row.home_team_id,
+            away_team_id=row.away_team_id,
+            status=status,
+            home_score=home_score,
+            away_score=away_score,
+            match_date=row.match_date,
+        ))
+    return changed
+
+
+async def apply_changes(session: AsyncSession, changes: list[MatchEvent]) -> None:
+    """Write changed scores and statuses with one executemany UPDATE"""
+    if not changes:
+        return
+    now = get_utc_now()
+    await session.execute(_bulk_update, [
+        {
+            "b_id": change.match_id,
+            "b_status": change.status,
+            "b_home_score": change.home_score,
+            "b_away_score": change.away_score,
+            "b_updated_at": now,
+        }
+        for change in changes
+    ])
+
+
+class LiveResultUpdater:
+    """Background worker keeping live scores seconds behind the API"""
+
+    def __init__(self, client: Optional[FootballAPIClient] = None, interval: Optional[float] = None):
+        self.client = client
+        self.interval = interval or settings.LIVE_UPDATE_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self, window_minutes: Optional[int] = None) -> int:
+        """Poll the live window once
+
+        Returns:
+            Number of matches whose result changed
+        """
+        async with get_session_factory()() as session:
+            stored = await load_live_window(session, window_minutes)
+            if not stored:
+                return 0
+
+            if self.client is None:
+                self.client = FootballAPIClient()
+            external_ids = [row.external_id for row in stored]
+            responses = await self.client.fetch_many([
+                ("/fixtures", {"ids": "-".join(str(i) for i in external_ids[start:start + FIXTURE_IDS_PER_REQUEST])})
+                for start in range(0, len(external_ids), FIXTURE_IDS_PER_REQUEST)
+            ])
+            fixtures = [item for response in responses for item in response.get("response") or []]
+
+            changes = diff_results(stored, fixtures)
+            await apply_changes(session, changes)
+            await session.commit()
+
+        await publish_match_events(changes)
+        if changes:
+            logger.info("Updated live results", extra={"polled": len(stored), "changed": len(changes)})
+        return len(changes)
+
+    async def _poll(self) -> None:
+        try:
+            await self.run_once()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.error("Live result update failed", exc_info=True)
+
+    async def run_forever(self) -> None:
+        """Poll while this worker holds the live updates lock, otherwise wait to take it over"""
+        while True:
+            try:
+                async with try_hold_advisory_lock(LIVE_UPDATES_LOCK) as lock:
+                    while lock is not None:
+                        await lock.check()
+                        await self._poll()
+                        await asyncio.sleep(self.interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Lost the live updates lock", exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
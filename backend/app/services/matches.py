@@ -0,0 +1,424 @@
+"""Match listing queries"""
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.fieldsets import Selection, prune, selects
+from app.core.serialization import FragmentCache
+from app.db.loading import with_profile
+from app.ml.features import DEFAULT_FORM_WINDOW
+from app.models.match import Match
+from app.models.team_stats import TeamSeasonStats
+from app.services.reference import ReferenceCache, get_reference_cache
+
+# Statuses after which a match no longer changes
+FINAL_STATUSES = ("completed", "cancelled")
+
+# Encoded listing rows of completed matches, keyed by match id
+_completed_fragments = FragmentCache(settings.LOCAL_CACHE_MAX_ENTRIES)
+
+
+@dataclass
+class MatchFilters:
+    """Filters accepted by the match listing"""
+
+    competition_id: Optional[int] = None
+    team_id: Optional[int] = None
+    season: Optional[int] = None
+    status: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+
+def encode_cursor(match_date: datetime, match_id: int) -> str:
+    """Encode the (match_date, id) keyset position of the last row of a page"""
+    raw = f"{match_date.isoformat()}|{match_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        match_date, match_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(match_date), int(match_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def fetch_match_page(
+    session: AsyncSession,
+    filters: MatchFilters,
+    limit: int = 20,
+    after: Optional[tuple[datetime, int]] = None,
+    descending: bool = False,
+) -> tuple[list[Any], Optional[str]]:
+    """Fetch one page of match rows with keyset pagination over (match_date, id)
+
+    Only the columns shown in the list view are selected, so no ``Match``
+    objects are hydrated, and team and competition blocks come from the
+    reference cache instead of joins. The keyset predicate lets the
+    competition/status date indexes jump straight to the page, so deep pages
+    cost the same as the first one.
+
+    Args:
+        session: Database session
+        filters: Listing filters
+        limit: Page size
+        after: Decoded cursor, the (match_date, id) of the previous page's last row
+        descending: Newest matches first
+
+    Returns:
+        Tuple of (page of rows, cursor of the next page or None)
+    """
+    stmt = select(
+        Match.id,
+        Match.competition_id,
+        Match.home_team_id,
+        Match.away_team_id,
+        Match.match_date,
+        Match.venue,
+        Match.status,
+        Match.round,
+        Match.season,
+        Match.home_score,
+        Match.away_score,
+        Match.updated_at,
+    )
+
+    if filters.competition_id is not None:
+        stmt = stmt.where(Match.competition_id == filters.competition_id)
+    if filters.team_id is not None:
+        stmt = stmt.where(or_(Match.home_team_id == filters.team_id, Match.away_team_id == filters.team_id))
+    if filters.season is not None:
+        stmt = stmt.where(Match.season == filters.season)
+    if filters.status is not None:
+        stmt = stmt.where(Match.status == filters.status)
+    if filters.date_from is not None:
+        stmt = stmt.where(Match.match_date >= filters.date_from)
+    if filters.date_to is not None:
+        stmt = stmt.where(Match.match_date < filters.date_to)
+
+    position = tuple_(Match.match_date, Match.id)
+    if after is not None:
+        boundary = tuple_(*after)
+        stmt = stmt.where(position < boundary if descending else position > boundary)
+
+    if descending:
+        stmt = stmt.order_by(Match.match_date.desc(), Match.id.desc())
+    else:
+        stmt = stmt.order_by(Match.match_date, Match.id)
+
+    result = await session.execute(stmt.limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].match_date, rows[-1].id)
+
+    await get_reference_cache().ensure(
+        session,
+        team_ids={team_id for row in rows for team_id in (row.home_team_id, row.away_team_id)},
+        competition_ids={row.competition_id for row in rows},
+    )
+    return rows, next_cursor
+
+
+async def list_matches(
+    session: AsyncSession,
+    filters: MatchFilters,
+    limit: int = 20,
+    after: Optional[tuple[datetime, int]] = None,
+    descending: bool = False,
+    selection: Optional[Selection] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """List matches shaped like the match list payload
+
+    Completed matches are returned as pre-encoded JSON fragments, so the page
+    must be rendered with an orjson response.
+
+    Returns:
+        Tuple of (page of matches, cursor of the next page or None)
+    """
+    rows, next_cursor = await fetch_match_page(session, filters, limit, after, descending)
+    references = get_reference_cache()
+    return [serialize_list_row(row, references, selection) for row in rows], next_cursor
+
+
+@dataclass(frozen=True)
+class PayloadVersion:
+    """What a match payload depends on, used to derive HTTP validators"""
+
+    parts: tuple
+    last_modified: Optional[datetime]
+    final: bool  # the payload can no longer change, so it may be cached for MATCH_CACHE_TTL
+
+
+def _latest(*values: Optional[datetime]) -> Optional[datetime]:
+    present = [value for value in values if value is not None]
+    return max(present) if present else None
+
+
+def _reference_versions(references: ReferenceCache, row: Any) -> tuple:
+    home = references.team(row.home_team_id)
+    away = references.team(row.away_team_id)
+    competition = references.competition(row.competition_id)
+    return tuple(ref.updated_at if ref else None for ref in (home, away, competition))
+
+
+def page_version(rows: list[Any], next_cursor: Optional[str]) -> PayloadVersion:
+    """Version of a listing page fetched with fetch_match_page
+
+    Listing pages are never final: new rows can enter any page, even one of
+    only completed matches or an empty one, so they are always revalidated.
+    """
+    references = get_reference_cache()
+    parts = [next_cursor]
+    last_modified = None
+    for row in rows:
+        ref_versions = _reference_versions(references, row)
+        parts.append((row.id, row.updated_at, ref_versions))
+        last_modified = _latest(last_modified, row.updated_at, *ref_versions)
+    return PayloadVersion(
+        parts=tuple(parts),
+        last_modified=last_modified,
+        final=False,
+    )
+
+
+async def get_match_version(session: AsyncSession, match_id: int) -> Optional[PayloadVersion]:
+    """Version of a match's detail payload, in one small query
+
+    Besides the match row this covers both teams' stats rows, which are
+    refreshed whenever one of their matches completes and so also track
+    changes to form and head-to-head records. The payload is only final
+    once those stats are too, i.e. neither team has an open fixture left in
+    the match's season.
+    """
+    other = aliased(Match)
+    teams = [Match.home_team_id, Match.away_team_id]
+    season_open = (
+        select(other.id)
+        .where(
+            other.season == Match.season,
+            or_(other.home_team_id.in_(teams), other.away_team_id.in_(teams)),
+            other.status.not_in(FINAL_STATUSES),
+        )
+        .exists()
+    )
+    stats_updated_at = (
+        select(func.max(TeamSeasonStats.updated_at))
+        .where(TeamSeasonStats.team_id.in_([Match.home_team_id, Match.away_team_id]))
+        .scalar_subquery()
+    )
+    result = await session.execute(
+        select(
+            Match.id,
+            Match.status,
+            Match.updated_at,
+            Match.competition_id,
+            Match.home_team_id,
+            Match.away_team_id,
+            stats_updated_at.label("stats_updated_at"),
+            season_open.label("season_open"),
+        ).where(Match.id == match_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    references = get_reference_cache()
+    await references.ensure(
+        session,
+        team_ids=(row.home_team_id, row.away_team_id),
+        competition_ids=(row.competition_id,),
+    )
+    ref_versions = _reference_versions(references, row)
+    return PayloadVersion(
+        parts=(row.id, row.updated_at, row.stats_updated_at, ref_versions),
+        last_modified=_latest(row.updated_at, row.stats_updated_at, *ref_versions),
+        final=row.status in FINAL_STATUSES and not row.season_open,
+    )
+
+
+def _team_ref_block(references: ReferenceCache, team_id: int) -> dict[str, Any]:
+    team = references.team(team_id)
+    return team.to_dict() if team else {"id": team_id, "name": None, "logo": None}
+
+
+def _competition_ref_block(references: ReferenceCache, competition_id: int) -> dict[str, Any]:
+    competition = references.competition(competition_id)
+    return competition.to_dict() if competition else {"id": competition_id, "name": None, "country": None}
+
+
+def _team_ref_fragment(references: ReferenceCache, team_id: int) -> Any:
+    team = references.team(team_id)
+    return team.fragment if team else {"id": team_id, "name": None, "logo": None}
+
+
+def _competition_ref_fragment(references: ReferenceCache, competition_id: int) -> Any:
+    competition = references.competition(competition_id)
+    return competition.fragment if competition else {"id": competition_id, "name": None, "country": None}
+
+
+def serialize_list_row(row: Any, references: ReferenceCache, selection: Optional[Selection] = None) -> Any:
+    """Shape a listing row like the match list payload
+
+    Completed matches no longer change, so their encoded JSON is kept and
+    reused until the match or one of its teams or competition is updated.
+    Rows pruned to a sparse fieldset are plain dicts.
+    """
+    if selection is not None:
+        return prune(_list_payload(row, references, fragments=False), selection)
+    if row.status != "completed":
+        return _list_payload(row, references)
+
+    home = references.team(row.home_team_id)
+    away = references.team(row.away_team_id)
+    competition = references.competition(row.competition_id)
+    if home is None or away is None or competition is None:
+        return _list_payload(row, references)
+
+    version = (row.updated_at, home.updated_at, away.updated_at, competition.updated_at)
+    return _completed_fragments.get_or_encode(row.id, version, lambda: _list_payload(row, references))
+
+
+def _list_payload(row: Any, references: ReferenceCache, fragments: bool = True) -> dict[str, Any]:
+    team_block = _team_ref_fragment if fragments else _team_ref_block
+    competition_block = _competition_ref_fragment if fragments else _competition_ref_block
+    return {
+        "id": row.id,
+        "home_team": team_block(references, row.home_team_id),
+        "away_team": team_block(references, row.away_team_id),
+        "competition": competition_block(references, row.competition_id),
+        "match_date": row.match_date.isoformat(),
+        "venue": row.venue,
+        "status": row.status,
+        "round": row.round,
+        "season": row.season,
+        "score": {
+            "home": row.home_score,
+            "away": row.away_score
+        }
+    }
+
+
+async def _head_to_head(session: AsyncSession, match: Match) -> dict[str, Any]:
+    """Record of earlier meetings, from the match's home team's side
+
+    Only the meetings between the two teams are read, filtered in SQL, and
+    tallied directly: there are few enough that a DataFrame costs more than
+    the query.
+    """
+    pair = (match.home_team_id, match.away_team_id)
+    result = await session.execute(
+        select(Match.home_team_id, Match.home_score, Match.away_score)
+        .where(
+            Match.home_team_id.in_(pair),
+            Match.away_team_id.in_(pair),
+            Match.status == "completed",
+            Match.home_score.is_not(None),
+            Match.away_score.is_not(None),
+            Match.match_date < match.match_date,
+        )
+        .order_by(Match.match_date, Match.id)
+    )
+    results = []
+    for home_team_id, home_score, away_score in result:
+        goals_for, goals_against = (
+            (home_score, away_score) if home_team_id == match.home_team_id else (away_score, home_score)
+        )
+        results.append("W" if goals_for > goals_against else "D" if goals_for == goals_against else "L")
+    return {
+        "total_matches": len(results),
+        "home_team_wins": results.count("W"),
+        "away_team_wins": results.count("L"),
+        "draws": results.count("D"),
+        "last_5_results": results[-DEFAULT_FORM_WINDOW:]
+    }
+
+
+async def get_match_detail(
+    session: AsyncSession,
+    match_id: int,
+    selection: Optional[Selection] = None,
+) -> Optional[dict[str, Any]]:
+    """Load a match with team form, season stats and head-to-head record
+
+    Runs a fixed number of statements regardless of history size: the match
+    row, both teams' stats rows, and one query for the meetings between the
+    two teams. Team and competition data come from the reference cache. With
+    a sparse fieldset, the stats and head-to-head queries only run when their
+    blocks are selected.
+    """
+    result = await session.execute(
+        with_profile(select(Match).where(Match.id == match_id), Match, "core")
+    )
+    match = result.scalar_one_or_none()
+    if match is None:
+        return None
+
+    team_ids = (match.home_team_id, match.away_team_id)
+    references = get_reference_cache()
+    await references.ensure(session, team_ids=team_ids, competition_ids=(match.competition_id,))
+
+    stats_by_team = {}
+    if any(selects(selection, side, block) for side in ("home_team", "away_team") for block in ("form", "stats")):
+        stats_result = await session.execute(
+            select(TeamSeasonStats).where(
+                TeamSeasonStats.team_id.in_(team_ids),
+                TeamSeasonStats.season == match.season
+            )
+        )
+        stats_by_team = {stats.team_id: stats for stats in stats_result.scalars()}
+
+    head_to_head = None
+    if selects(selection, "head_to_head"):
+        head_to_head = await _head_to_head(session, match)
+
+    def team_block(team_id: int) -> dict[str, Any]:
+        stats = stats_by_team.get(team_id)
+        return {
+            **_team_ref_block(references, team_id),
+            "form": stats.form if stats else "",
+            "stats": {
+                "goals_scored": stats.goals_scored if stats else 0,
+                "goals_conceded": stats.goals_conceded if stats else 0,
+                "wins": stats.wins if stats else 0,
+                "draws": stats.draws if stats else 0,
+                "losses": stats.losses if stats else 0
+            }
+        }
+
+    payload = {
+        "id": match.id,
+        "home_team": team_block(match.home_team_id),
+        "away_team": team_block(match.away_team_id),
+        "competition": (
+            _competition_ref_fragment(references, match.competition_id) if selection is None
+            else _competition_ref_block(references, match.competition_id)
+        ),
+        "match_date": match.match_date.isoformat(),
+        "venue": match.venue,
+        "status": match.status,
+        "round": match.round,
+        "season": match.season,
+        "score": {
+            "home": match.home_score,
+            "away": match.away_score
+        },
+        "head_to_head": head_to_head
+    }
+    return prune(payload, selection)
@@ -0,0 +1,328 @@
+"""Match outcome predictions computed in vectorised batches
+
+A batch of fixtures is turned into one feature matrix from a single history
+query, and the model is called once with ``predict_proba`` for the whole batch.
+The Dixon-Coles scoreline model (app.ml.poisson) serves while the classifier
+is still loading and supplies the predicted score.
+
+Upcoming matches are predicted ahead of time by a scheduled job and stored
+(app.services.prediction_store), so requests for them are reads; only
+matches outside the pre-generation window are computed on demand.
+"""
+
+import time
+from datetime import timedelta
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import MODEL_INFERENCE
+from app.ml.features import (
+    FEATURE_GROUPS,
+    LEGACY_FEATURE_COLUMNS,
+    OUTCOME_LABELS,
+    build_fixture_features,
+    load_match_frame,
+)
+from app.ml.elo import get_rating_engine
+from app.ml.poisson import SCORELINE_FEATURES, get_scoreline_registry
+from app.ml.registry import ModelHandle, ModelNotAvailableError, get_registry
+from app.models.match import Match
+from app.services.cache import PREDICTION, get_cache
+from app.services.events import PREDICTION_UPDATED, publish
+from app.services.prediction_store import (
+    get_stored_predictions,
+    input_hash,
+    store_predictions,
+    stored_hashes,
+    team_signatures,
+)
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+
+def outcome_probabilities(model: Any, X: np.ndarray) -> np.ndarray:
+    """Run predict_proba and reorder the columns to match OUTCOME_LABELS
+
+    Works for models trained on either integer outcomes or label strings.
+    """
+    raw = model.predict_proba(X)
+    classes = list(getattr(model, "classes_", range(raw.shape[1])))
+    probabilities = np.zeros((len(X), len(OUTCOME_LABELS)))
+    for outcome, label in enumerate(OUTCOME_LABELS):
+        for class_key in (outcome, label):
+            if class_key in classes:
+                probabilities[:, outcome] = raw[:, classes.index(class_key)]
+    return probabilities
+
+
+def expected_scores(features: pd.DataFrame, outcomes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Derive a scoreline consistent with the predicted outcome from goal averages
+
+    Used when no scoreline model has been fitted yet.
+    """
+    home_goals = np.rint(
+        (features["home_goals_scored_avg"].to_numpy() + features["away_goals_conceded_avg"].to_numpy()) / 2
+    ).astype(int)
+    away_goals = np.rint(
+        (features["away_goals_scored_avg"].to_numpy() + features["home_goals_conceded_avg"].to_numpy()) / 2
+    ).astype(int)
+
+    home_goals = np.where((outcomes == 0) & (home_goals <= away_goals), away_goals + 1, home_goals)
+    away_goals = np.where((outcomes == 2) & (away_goals <= home_goals), home_goals + 1, away_goals)
+    level = np.rint((home_goals + away_goals) / 2).astype(int)
+    home_goals = np.where(outcomes == 1, level, home_goals)
+    away_goals = np.where(outcomes == 1, level, away_goals)
+    return home_goals, away_goals
+
+
+async def _load_fixtures(session: AsyncSession, match_ids: list[int]) -> pd.DataFrame:
+    result = await session.execute(
+        select(Match.id, Match.home_team_id, Match.away_team_id, Match.season, Match.match_date)
+        .where(Match.id.in_(match_ids))
+    )
+    fixtures = pd.DataFrame.from_records(
+        result.all(),
+        columns=["id", "home_team_id", "away_team_id", "season", "match_date"]
+    )
+    fixtures["match_date"] = pd.to_datetime(fixtures["match_date"], utc=True)
+    return fixtures
+
+
+def _payloads(
+    match_ids: list[int],
+    probabilities: np.ndarray,
+    outcomes: np.ndarray,
+    home_goals: np.ndarray,
+    away_goals: np.ndarray,
+    model_version: str,
+    features_used: list[str],
+) -> dict[int, dict[str, Any]]:
+    generated_at = get_utc_now().isoformat()
+    predictions: dict[int, dict[str, Any]] = {}
+    for row, match_id in enumerate(match_ids):
+        predictions[match_id] = {
+            "match_id": match_id,
+            "predicted_outcome": OUTCOME_LABELS[outcomes[row]],
+            "confidence": round(float(probabilities[row, outcomes[row]]), 4),
+            "predicted_score": {
+                "home": int(home_goals[row]),
+                "away": int(away_goals[row])
+            },
+            "probabilities": {
+                label: round(float(probabilities[row, i]), 4)
+                for i, label in enumerate(OUTCOME_LABELS)
+            },
+            "model_version": model_version,
+            "generated_at": generated_at,
+            "features_used": features_used,
+        }
+    return predictions
+
+
+async def _scoreline_handle() -> Optional[ModelHandle]:
+    registry = get_scoreline_registry()
+    if registry.peek() is None and registry.current_version() is None:
+        return None
+    try:
+        return await registry.get()
+    except ModelNotAvailableError:
+        return None
+
+
+async def compute_predictions(session: AsyncSession, match_ids: list[int]) -> dict[int, dict[str, Any]]:
+    """Compute predictions for matches that are neither cached nor stored
+
+    While the classifier is not loaded yet, the scoreline model answers
+    instead; it only needs the team ids, not a history query. Otherwise the
+    classifier picks the outcome and, when available, the scoreline model
+    picks the most likely score of that outcome.
+    """
+    fixtures = await _load_fixtures(session, match_ids)
+    if fixtures.empty:
+        return {}
+
+    registry = get_registry()
+    handle = registry.peek()
+    scoreline = await _scoreline_handle()
+    home_ids = fixtures["home_team_id"].to_numpy()
+    away_ids = fixtures["away_team_id"].to_numpy()
+
+    if handle is None and scoreline is not None:
+        if registry.current_version() is not None:
+            registry.warm()
+        started_at = time.perf_counter()
+        result = scoreline.model.predict(home_ids, away_ids)
+        MODEL_INFERENCE.observe(time.perf_counter() - started_at)
+        return _payloads(
+            fixtures["id"].tolist(),
+            result.probabilities,
+            result.probabilities.argmax(axis=1),
+            result.home_goals,
+            result.away_goals,
+            f"{settings.SCORELINE_MODEL_NAME}-{scoreline.version}",
+            SCORELINE_FEATURES,
+        )
+
+    handle = await registry.get()
+
+    team_ids = set(fixtures["home_team_id"]) | set(fixtures["away_team_id"])
+    latest_season = int(fixtures["season"].max())
+    seasons = range(latest_season - settings.PREDICTION_HISTORY_SEASONS + 1, latest_season + 1)
+    # Each fixture only sees matches played before it kicks off, as in training
+    kickoffs = fixtures["match_date"]
+    history = await load_match_frame(
+        session, team_ids=team_ids, seasons=seasons, before=kickoffs.max().to_pydatetime()
+    )
+
+    engine = get_rating_engine()
+    ratings = (engine.before(home_ids, kickoffs), engine.before(away_ids, kickoffs)) if engine.ready else None
+    features = build_fixture_features(history, fixtures, ratings=ratings)
+    # Models carry the columns they were trained on; older ones predate elo_diff
+    columns = handle.metadata.get("feature_columns") or LEGACY_FEATURE_COLUMNS
+    X = features[columns].to_numpy(dtype=np.float64)
+    started_at = time.perf_counter()
+    probabilities = outcome_probabilities(handle.model, X)
+    MODEL_INFERENCE.observe(time.perf_counter() - started_at)
+    outcomes = probabilities.argmax(axis=1)
+    if scoreline is not None:
+        result = scoreline.model.predict(home_ids, away_ids, outcomes)
+        home_goals, away_goals = result.home_goals, result.away_goals
+    else:
+        home_goals, away_goals = expected_scores(features, outcomes)
+
+    return _payloads(
+        features.index.tolist(),
+        probabilities,
+        outcomes,
+        home_goals,
+        away_goals,
+        handle.version,
+        FEATURE_GROUPS if "elo_diff" in columns else [group for group in FEATURE_GROUPS if group != "elo_rating"],
+    )
+
+
+async def predict_matches(
+    session: AsyncSession,
+    match_ids: Iterable[int]
+) -> tuple[list[dict[str, Any]], list[int]]:
+    """Predict many matches with one feature matrix and one model call
+
+    Cached predictions are reused, then stored ones; only the rest are
+    computed.
+
+    Args:
+        session: Database session
+        match_ids: Ids of the matches to predict
+
+    Returns:
+        Tuple of (predictions in request order, ids of unknown matches)
+    """
+    match_ids = list(dict.fromkeys(match_ids))
+    cache = get_cache()
+    predictions = await cache.get_many(PREDICTION, match_ids)
+
+    # Entries produced by a model that has since been swapped out are stale
+    loaded = get_registry().peek()
+    if loaded is not None:
+        predictions = {
+            match_id: prediction for match_id, prediction in predictions.items()
+            if prediction.get("model_version") == loaded.version
+        }
+
+    misses = [match_id for match_id in match_ids if match_id not in predictions]
+    if misses:
+        stored = await get_stored_predictions(session, misses, loaded.version if loaded is not None else None)
+        if stored:
+            await cache.set_many(PREDICTION, stored)
+            predictions.update(stored)
+            misses = [match_id for match_id in misses if match_id not in stored]
+    if misses:
+        computed = await compute_predictions(session, misses)
+        await cache.set_many(PREDICTION, computed)
+        predictions.update(computed)
+
+    found = [predictions[match_id] for match_id in match_ids if match_id in predictions]
+    missing = [match_id for match_id in match_ids if match_id not in predictions]
+    return found, missing
+
+
+async def _model_versions() -> tuple[Optional[str], Optional[str], bool]:
+    """Versions a pre-generation run predicts with, loading the classifier first
+
+    Without the wait, a run right after startup would store scoreline
+    fallback predictions for every match and redo them once the classifier
+    is loaded.
+    """
+    registry = get_registry()
+    try:
+        handle = await registry.get()
+    except ModelNotAvailableError:
+        handle = None
+    scoreline = await _scoreline_handle()
+    return (
+        handle.version if handle is not None else None,
+        scoreline.version if scoreline is not None else None,
+        get_rating_engine().ready,
+    )
+
+
+async def pregenerate_predictions(session: AsyncSession) -> int:
+    """Predict and store every upcoming match whose inputs changed
+
+    Covers scheduled matches kicking off within PREDICTION_PREGENERATE_DAYS.
+    Recomputed predictions are cached and published as PREDICTION_UPDATED.
+
+    Returns:
+        Number of predictions recomputed
+    """
+    now = get_utc_now()
+    result = await session.execute(
+        select(Match.id, Match.home_team_id, Match.away_team_id, Match.season, Match.match_date, Match.updated_at)
+        .where(
+            Match.status == "scheduled",
+            Match.match_date > now,
+            Match.match_date <= now + timedelta(days=settings.PREDICTION_PREGENERATE_DAYS),
+        )
+        .order_by(Match.match_date)
+    )
+    fixtures = result.all()
+    if not fixtures:
+        return 0
+
+    versions = await _model_versions()
+    if versions[0] is None and versions[1] is None:
+        logger.warning("No model available, skipping prediction pre-generation")
+        return 0
+
+    # History window of every fixture, as used when computing its features
+    latest_season = max(fixture.season for fixture in fixtures)
+    earliest_season = min(fixture.season for fixture in fixtures)
+    signatures = await team_signatures(
+        session,
+        {team_id for fixture in fixtures for team_id in (fixture.home_team_id, fixture.away_team_id)},
+        range(earliest_season - settings.PREDICTION_HISTORY_SEASONS + 1, latest_season + 1),
+    )
+    hashes = {fixture.id: input_hash(fixture, signatures, versions) for fixture in fixtures}
+    stored = await stored_hashes(session, list(hashes))
+    changed = [match_id for match_id, digest in hashes.items() if stored.get(match_id) != digest]
+
+    batch_size = settings.PREDICTION_PREGENERATE_BATCH_SIZE
+    for start in range(0, len(changed), batch_size):
+        computed = await compute_predictions(session, changed[start:start + batch_size])
+        await store_predictions(session, computed, hashes)
+        await session.commit()
+        await get_cache().set_many(PREDICTION, computed)
+        await publish(PREDICTION_UPDATED, list(computed.values()))
+
+    logger.info(
+        "Pre-generated predictions",
+        extra={"upcoming": len(fixtures), "recomputed": len(changed), "model_version": versions[0] or versions[1]}
+    )
+    return len(changed)
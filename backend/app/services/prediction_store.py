@@ -0,0 +1,122 @@
+"""Stored predictions and the input hashes that decide when to recompute them
+
+A prediction depends on the fixture, both teams' completed matches in the
+history window (form, goals, head-to-head and Elo are all derived from them)
+and the model versions. Each stored row carries a digest of those inputs:
+
+- the fixture's teams, season, kick-off and ``Match.updated_at``
+- per team, the number of completed matches and their latest ``updated_at``
+- the classifier and scoreline model versions, and whether Elo ratings were
+  available
+
+so a pre-generation run finds the matches to recompute with two aggregate
+queries instead of building any features.
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import func, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.match import Match
+from app.models.prediction import Prediction
+
+# Team with no completed matches in the window
+_NO_HISTORY = (0, None)
+
+
+async def team_signatures(
+    session: AsyncSession,
+    team_ids: Iterable[int],
+    seasons: Iterable[int],
+) -> dict[int, tuple[int, Optional[datetime]]]:
+    """Count and latest update of each team's completed matches in the given seasons"""
+    team_ids, seasons = list(set(team_ids)), list(seasons)
+    if not team_ids:
+        return {}
+    completed = (Match.status == "completed", Match.season.in_(seasons))
+    sides = union_all(
+        select(Match.home_team_id.label("team_id"), Match.updated_at)
+        .where(Match.home_team_id.in_(team_ids), *completed),
+        select(Match.away_team_id.label("team_id"), Match.updated_at)
+        .where(Match.away_team_id.in_(team_ids), *completed),
+    ).subquery()
+    result = await session.execute(
+        select(sides.c.team_id, func.count(), func.max(sides.c.updated_at)).group_by(sides.c.team_id)
+    )
+    return {team_id: (count, latest) for team_id, count, latest in result.all()}
+
+
+def input_hash(fixture: Any, signatures: dict[int, tuple[int, Optional[datetime]]], versions: Sequence[Any]) -> str:
+    """Digest of everything a fixture's prediction is computed from
+
+    Args:
+        fixture: Row with id, home_team_id, away_team_id, season, match_date and updated_at
+        signatures: Output of team_signatures
+        versions: Model versions and flags that change every prediction
+    """
+    parts = (
+        fixture.id,
+        fixture.home_team_id,
+        fixture.away_team_id,
+        fixture.season,
+        fixture.match_date,
+        fixture.updated_at,
+        signatures.get(fixture.home_team_id, _NO_HISTORY),
+        signatures.get(fixture.away_team_id, _NO_HISTORY),
+        *versions,
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+async def stored_hashes(session: AsyncSession, match_ids: list[int]) -> dict[int, str]:
+    result = await session.execute(
+        select(Prediction.match_id, Prediction.input_hash).where(Prediction.match_id.in_(match_ids))
+    )
+    return dict(result.all())
+
+
+async def get_stored_predictions(
+    session: AsyncSession,
+    match_ids: list[int],
+    model_version: Optional[str] = None,
+) -> dict[int, dict[str, Any]]:
+    """Read stored predictions as API payloads
+
+    Args:
+        session: Database session
+        match_ids: Matches to look up
+        model_version: Only return predictions made by this version
+    """
+    if not match_ids:
+        return {}
+    stmt = select(Prediction).where(Prediction.match_id.in_(match_ids))
+    if model_version is not None:
+        stmt = stmt.where(Prediction.model_version == model_version)
+    result = await session.execute(stmt)
+    return {row.match_id: row.to_dict() for row in result.scalars()}
+
+
+async def store_predictions(
+    session: AsyncSession,
+    predictions: dict[int, dict[str, Any]],
+    hashes: dict[int, str],
+) -> int:
+    """Upsert predictions with their input hashes; the caller commits
+
+    Returns:
+        Number of rows written
+    """
+    rows = [Prediction.row_from_payload(payload, hashes[match_id]) for match_id, payload in predictions.items()]
+    if not rows:
+        return 0
+    stmt = pg_insert(Prediction).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["match_id"],
+        set_={column: stmt.excluded[column] for column in rows[0] if column != "match_id"}
+    )
+    await session.execute(stmt)
+    return len(rows)
@@ -0,0 +1,243 @@
+"""In-memory reference data for teams and competitions
+
+Team and competition rows change rarely but are embedded in every match
+payload. They are loaded once at startup into compact ``__slots__`` records
+keyed by both ``id`` and ``external_id``, refreshed when ingestion reports a
+change and polled for rows updated by other workers.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.serialization import json_fragment
+from app.db.session import get_session_factory
+from app.models.competition import Competition
+from app.models.team import Team
+from app.services.events import REFERENCE_UPDATED, ReferenceEvent, subscribe
+
+logger = get_logger(__name__)
+
+
+class TeamRef:
+    __slots__ = ("id", "external_id", "name", "short_name", "logo_url", "country", "updated_at", "_fragment")
+
+    def __init__(self, id, external_id, name, short_name, logo_url, country, updated_at):
+        self.id = id
+        self.external_id = external_id
+        self.name = name
+        self.short_name = short_name
+        self.logo_url = logo_url
+        self.country = country
+        self.updated_at = updated_at
+        self._fragment = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Team block embedded in match payloads"""
+        return {"id": self.id, "name": self.name, "logo": self.logo_url}
+
+    @property
+    def fragment(self) -> Any:
+        """The team block, encoded once per record"""
+        if self._fragment is None:
+            self._fragment = json_fragment(self.to_dict())
+        return self._fragment
+
+
+class CompetitionRef:
+    __slots__ = ("id", "external_id", "name", "type", "logo_url", "country", "tier", "updated_at", "_fragment")
+
+    def __init__(self, id, external_id, name, type, logo_url, country, tier, updated_at):
+        self.id = id
+        self.external_id = external_id
+        self.name = name
+        self.type = type
+        self.logo_url = logo_url
+        self.country = country
+        self.tier = tier
+        self.updated_at = updated_at
+        self._fragment = None
+
+    def to_dict(self) -> dict[str, Any]:
+        """Competition block embedded in match payloads"""
+        return {"id": self.id, "name": self.name, "country": self.country}
+
+    @property
+    def fragment(self) -> Any:
+        """The competition block, encoded once per record"""
+        if self._fragment is None:
+            self._fragment = json_fragment(self.to_dict())
+        return self._fragment
+
+
+_TEAM_COLUMNS = (Team.id, Team.external_id, Team.name, Team.short_name, Team.logo_url, Team.country, Team.updated_at)
+_COMPETITION_COLUMNS = (
+    Competition.id,
+    Competition.external_id,
+    Competition.name,
+    Competition.type,
+    Competition.logo_url,
+    Competition.country,
+    Competition.tier,
+    Competition.updated_at,
+)
+
+
+class ReferenceCache:
+    """Teams and competitions indexed by id and external_id"""
+
+    def __init__(self):
+        self.teams: dict[int, TeamRef] = {}
+        self.teams_by_external_id: dict[int, TeamRef] = {}
+        self.competitions: dict[int, CompetitionRef] = {}
+        self.competitions_by_external_id: dict[int, CompetitionRef] = {}
+        self.watermark: Optional[datetime] = None
+
+    def _store_team(self, team: TeamRef) -> None:
+        self.teams[team.id] = team
+        self.teams_by_external_id[team.external_id] = team
+        self._advance(team.updated_at)
+
+    def _store_competition(self, competition: CompetitionRef) -> None:
+        self.competitions[competition.id] = competition
+        self.competitions_by_external_id[competition.external_id] = competition
+        self._advance(competition.updated_at)
+
+    def _advance(self, updated_at: Optional[datetime]) -> None:
+        if updated_at is not None and (self.watermark is None or updated_at > self.watermark):
+            self.watermark = updated_at
+
+    async def load_teams(self, session: AsyncSession, ids: Optional[Iterable[int]] = None) -> int:
+        stmt = select(*_TEAM_COLUMNS)
+        if ids is not None:
+            stmt = stmt.where(Team.id.in_(list(ids)))
+        rows = (await session.execute(stmt)).all()
+        for row in rows:
+            self._store_team(TeamRef(*row))
+        return len(rows)
+
+    async def load_competitions(self, session: AsyncSession, ids: Optional[Iterable[int]] = None) -> int:
+        stmt = select(*_COMPETITION_COLUMNS)
+        if ids is not None:
+            stmt = stmt.where(Competition.id.in_(list(ids)))
+        rows = (await session.execute(stmt)).all()
+        for row in rows:
+            self._store_competition(CompetitionRef(*row))
+        return len(rows)
+
+    async def warm(self, session: AsyncSession) -> None:
+        """Load every team and competition"""
+        teams = await self.load_teams(session)
+        competitions = await self.load_competitions(session)
+        logger.info("Warmed reference cache", extra={"teams": teams, "competitions": competitions})
+
+    async def refresh_changed(self, session: AsyncSession) -> int:
+        """Reload rows updated since the newest row already cached"""
+        if self.watermark is None:
+            await self.warm(session)
+            return len(self.teams) + len(self.competitions)
+
+        # Inclusive so rows committed late with the same timestamp are not missed
+        since = self.watermark
+        team_rows = (await session.execute(select(*_TEAM_COLUMNS).where(Team.updated_at >= since))).all()
+        competition_rows = (await session.execute(
+            select(*_COMPETITION_COLUMNS).where(Competition.updated_at >= since)
+        )).all()
+        for row in team_rows:
+            self._store_team(TeamRef(*row))
+        for row in competition_rows:
+            self._store_competition(CompetitionRef(*row))
+        return len(team_rows) + len(competition_rows)
+
+    async def ensure(
+        self,
+        session: AsyncSession,
+        team_ids: Iterable[int] = (),
+        competition_ids: Iterable[int] = (),
+    ) -> None:
+        """Load any of the given rows that are not cached yet"""
+        missing_teams = {i for i in team_ids if i not in self.teams}
+        missing_competitions = {i for i in competition_ids if i not in self.competitions}
+        if missing_teams:
+            await self.load_teams(session, missing_teams)
+        if missing_competitions:
+            await self.load_competitions(session, missing_competitions)
+
+    def team(self, team_id: int) -> Optional[TeamRef]:
+        return self.teams.get(team_id)
+
+    def team_by_external_id(self, external_id: int) -> Optional[TeamRef]:
+        return self.teams_by_external_id.get(external_id)
+
+    def competition(self, competition_id: int) -> Optional[CompetitionRef]:
+        return self.competitions.get(competition_id)
+
+    def competition_by_external_id(self, external_id: int) -> Optional[CompetitionRef]:
+        return self.competitions_by_external_id.get(external_id)
+
+
+_reference_cache: Optional[ReferenceCache] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def get_reference_cache() -> ReferenceCache:
+    """Get the process-wide reference cache"""
+    global _reference_cache
+    if _reference_cache is None:
+        _reference_cache = ReferenceCache()
+    return _reference_cache
+
+
+async def _refresh_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with get_session_factory()() as session:
+                await get_reference_cache().refresh_changed(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning("Reference cache refresh failed", exc_info=True)
+
+
+async def start_reference_cache() -> None:
+    """Warm the cache and start polling for changes, called from the lifespan"""
+    global _refresh_task
+    try:
+        async with get_session_factory()() as session:
+            await get_reference_cache().warm(session)
+    except Exception:
+        # Entries are loaded on demand until the database is reachable
+        logger.warning("Reference cache warm-up failed", exc_info=True)
+
+    if _refresh_task is None:
+        _refresh_task = asyncio.create_task(_refresh_loop(settings.REFERENCE_REFRESH_SECONDS))
+
+
+async def stop_reference_cache() -> None:
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
+
+
+@subscribe(REFERENCE_UPDATED)
+async def on_reference_updated(events: Sequence[ReferenceEvent]) -> None:
+    """Reload teams and competitions reported as changed"""
+    team_ids = {event.id for event in events if event.kind == "team"}
+    competition_ids = {event.id for event in events if event.kind == "competition"}
+    cache = get_reference_cache()
+    async with get_session_factory()() as session:
+        if team_ids:
+            await cache.load_teams(session, team_ids)
+        if competition_ids:
+            await cache.load_competitions(session, competition_ids)
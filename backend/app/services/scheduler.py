@@ -0,0 +1,370 @@
+"""Background jobs run by an in-process APScheduler
+
+Jobs:
+
+- pregenerate_predictions: predicts upcoming matches whose inputs changed
+  (app.services.prediction), every PREDICTION_PREGENERATE_INTERVAL_MINUTES
+  and shortly after match updates
+- sync_fixtures: fetches the configured leagues' fixtures, every
+  SYNC_FIXTURES_INTERVAL_HOURS
+- update_results: catches results the live updater missed and refreshes the
+  stats they touch, every UPDATE_RESULTS_INTERVAL_HOURS
+- retrain_model: retrains the classifier and scoreline model every
+  RETRAIN_MODEL_INTERVAL_DAYS, at RETRAIN_MODEL_HOUR
+
+I/O-bound jobs are coroutines on the application's event loop; the CPU-bound
+parts they contain already run in threads. Retraining runs the training
+command in a child process, so cross-validation and fitting never compete
+with requests for the GIL and a shutdown can kill it; the process is
+niced and leaves a core free.
+
+Each job has at most one running instance per worker, and missed runs are
+coalesced into one. Across uvicorn workers a Postgres advisory lock per job
+prevents overlapping runs, and the job_runs table (also the record of every
+run's duration, rows and failure) lets a worker skip a job another worker
+started recently. Every job runs once at startup unless it is not due,
+except retraining: it is only checked daily at an off-peak hour, so neither
+a deploy nor a restart starts it.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, Sequence
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import delete, select, update
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import counter, gauge, histogram
+from app.db.locks import try_advisory_lock
+from app.db.session import get_session_factory
+from app.ml.elo import wait_for_rating_engine
+from app.ml.poisson import get_scoreline_registry
+from app.ml.registry import ModelNotAvailableError, get_registry
+from app.models.job_run import JobRun
+from app.services.events import MATCH_UPDATED, MatchEvent, subscribe
+from app.services.ingestion import sync_fixtures
+from app.services.live_updates import LiveResultUpdater
+from app.services.prediction import pregenerate_predictions
+from app.services.team_stats import refresh_recent_results
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+PREGENERATE_PREDICTIONS = "pregenerate_predictions"
+SYNC_FIXTURES = "sync_fixtures"
+UPDATE_RESULTS = "update_results"
+RETRAIN_MODEL = "retrain_model"
+
+JOB_DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0)
+
+JOB_RUNS = counter("scheduler_job_runs_total", "Scheduled job runs by outcome", ("job", "status"))
+JOB_DURATION = histogram(
+    "scheduler_job_duration_seconds", "Duration of scheduled job runs", ("job",), JOB_DURATION_BUCKETS
+)
+JOB_ROWS = counter("scheduler_job_rows_total", "Rows processed by scheduled jobs", ("job",))
+JOB_LAST_SUCCESS = gauge(
+    "scheduler_job_last_success_timestamp_seconds", "Completion time of the last successful run", ("job",)
+)
+
+_BACKEND_ROOT = Path(__file__).resolve().parents[2]
+_WORKER = f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass(frozen=True)
+class Job:
+    """A recurring job and how it is scheduled"""
+
+    id: str
+    func: Callable[[], Awaitable[int]]  # returns the number of rows processed
+    interval: timedelta
+    # Skip the run when a worker started this job more recently than this;
+    # None for jobs that are cheap to repeat and triggered by events
+    min_spacing: Optional[timedelta] = None
+    # Check daily at this UTC hour instead of at startup and every interval;
+    # min_spacing then decides whether the check runs the job
+    at_hour: Optional[int] = None
+
+
+# Jobs
+
+
+async def pregenerate_predictions_job() -> int:
+    # Predictions made before the replay would all be redone once it is ready
+    await wait_for_rating_engine()
+    async with get_session_factory()() as session:
+        return await pregenerate_predictions(session)
+
+
+async def sync_fixtures_job() -> int:
+    result = await sync_fixtures()
+    return result.matches_written
+
+
+async def update_results_job() -> int:
+    """Poll matches that kicked off since the previous run, then refresh their stats
+
+    The stats refresh is the safety net for results written without an
+    event, e.g. by another worker that crashed before publishing.
+    """
+    updater = LiveResultUpdater()
+    try:
+        changed = await updater.run_once(
+            window_minutes=settings.UPDATE_RESULTS_INTERVAL_HOURS * 60 + settings.LIVE_WINDOW_MINUTES
+        )
+    finally:
+        await updater.stop()
+
+    since = get_utc_now() - timedelta(hours=2 * settings.UPDATE_RESULTS_INTERVAL_HOURS)
+    async with get_session_factory()() as session:
+        stats_rows = await refresh_recent_results(session, since)
+        await session.commit()
+    return changed + stats_rows
+
+
+async def retrain_model_job() -> int:
+    """Run ``python -m app.ml.training`` in a child process and load what it activated"""
+    with tempfile.TemporaryDirectory() as directory:
+        result_file = Path(directory) / "result.json"
+        env = {
+            **os.environ,
+            "PYTHONPATH": os.pathsep.join(filter(None, [str(_BACKEND_ROOT), os.environ.get("PYTHONPATH")])),
+        }
+        # A session of its own, so the cross-validation workers are killed with it
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "app.ml.training",
+            "--result-file", str(result_file),
+            "--nice", str(settings.RETRAIN_NICE),
+            env=env,
+            start_new_session=True,
+        )
+        try:
+            returncode = await asyncio.wait_for(process.wait(), settings.RETRAIN_TIMEOUT_MINUTES * 60)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            os.killpg(process.pid, signal.SIGKILL)
+            await process.wait()
+            raise
+        if returncode != 0:
+            raise RuntimeError(f"Training process exited with status {returncode}")
+        summary = json.loads(result_file.read_text())
+
+    if summary is None:
+        return 0
+    if summary["activated"]:
+        # Serve the new versions from this worker now; the others pick them
+        # up within MODEL_RELOAD_CHECK_SECONDS
+        for registry in (get_registry(), get_scoreline_registry()):
+            try:
+                await registry.refresh()
+            except ModelNotAvailableError:
+                pass
+        run_soon(PREGENERATE_PREDICTIONS)
+    return summary["samples"]
+
+
+def configured_jobs() -> list[Job]:
+    """Jobs to schedule with the current settings"""
+    jobs = [
+        Job(
+            PREGENERATE_PREDICTIONS,
+            pregenerate_predictions_job,
+            timedelta(minutes=settings.PREDICTION_PREGENERATE_INTERVAL_MINUTES),
+        ),
+    ]
+    if settings.FOOTBALL_API_KEY:
+        sync_interval = timedelta(hours=settings.SYNC_FIXTURES_INTERVAL_HOURS)
+        results_interval = timedelta(hours=settings.UPDATE_RESULTS_INTERVAL_HOURS)
+        jobs.append(Job(SYNC_FIXTURES, sync_fixtures_job, sync_interval, min_spacing=sync_interval / 2))
+        jobs.append(Job(UPDATE_RESULTS, update_results_job, results_interval, min_spacing=results_interval / 2))
+    else:
+        logger.info("FOOTBALL_API_KEY is not set, not scheduling the fixture sync and result update jobs")
+    retrain_interval = timedelta(days=settings.RETRAIN_MODEL_INTERVAL_DAYS)
+    jobs.append(Job(
+        RETRAIN_MODEL,
+        retrain_model_job,
+        retrain_interval,
+        # Slack for the daily check firing a little earlier than a week ago
+        min_spacing=retrain_interval - timedelta(hours=12),
+        at_hour=settings.RETRAIN_MODEL_HOUR,
+    ))
+    return jobs
+
+
+# Running
+
+
+async def _started_since(job_id: str, since: datetime) -> bool:
+    """Check if a run that did not fail started at or after a time"""
+    async with get_session_factory()() as session:
+        run_id = await session.scalar(
+            select(JobRun.id)
+            .where(JobRun.job_id == job_id, JobRun.status != "failed", JobRun.started_at >= since)
+            .limit(1)
+        )
+    return run_id is not None
+
+
+async def _record_start(job_id: str) -> int:
+    async with get_session_factory()() as session:
+        run = JobRun(job_id=job_id, status="running", worker=_WORKER, started_at=get_utc_now())
+        session.add(run)
+        await session.commit()
+        return run.id
+
+
+async def _record_finish(
+    run_id: int,
+    job_id: str,
+    status: str,
+    duration: float,
+    rows: Optional[int],
+    error: Optional[str],
+) -> None:
+    now = get_utc_now()
+    async with get_session_factory()() as session:
+        await session.execute(
+            update(JobRun).where(JobRun.id == run_id).values(
+                status=status, finished_at=now, duration_seconds=round(duration, 3), rows=rows, error=error
+            )
+        )
+        await session.execute(
+            delete(JobRun).where(
+                JobRun.job_id == job_id,
+                JobRun.started_at < now - timedelta(days=settings.JOB_HISTORY_DAYS),
+            )
+        )
+        await session.commit()
+
+
+_running: set[asyncio.Task] = set()
+
+
+async def run_job(job: Job) -> None:
+    """Run a job unless another worker holds it or ran it recently, recording the outcome"""
+    task = asyncio.current_task()
+    _running.add(task)
+    try:
+        async with try_advisory_lock(f"job:{job.id}") as acquired:
+            if not acquired:
+                JOB_RUNS.labels(job.id, "skipped").inc()
+                logger.info("Job is running in another worker, skipping", extra={"job": job.id})
+                return
+            if job.min_spacing is not None and await _started_since(job.id, get_utc_now() - job.min_spacing):
+                JOB_RUNS.labels(job.id, "skipped").inc()
+                logger.info("Job ran recently, skipping", extra={"job": job.id})
+                return
+            await _execute(job)
+    finally:
+        _running.discard(task)
+
+
+async def _execute(job: Job) -> None:
+    run_id = await _record_start(job.id)
+    started_at = time.perf_counter()
+    status, rows, error = "failed", None, None
+    try:
+        rows = await job.func()
+        status = "succeeded"
+    except asyncio.CancelledError:
+        error = "cancelled"
+        raise
+    except Exception as e:
+        error = repr(e)[:500]
+        logger.error("Job failed", exc_info=True, extra={"job": job.id})
+    finally:
+        duration = time.perf_counter() - started_at
+        JOB_RUNS.labels(job.id, status).inc()
+        JOB_DURATION.labels(job.id).observe(duration)
+        if rows:
+            JOB_ROWS.labels(job.id).inc(rows)
+        if status == "succeeded":
+            JOB_LAST_SUCCESS.labels(job.id).set(time.time())
+        try:
+            await _record_finish(run_id, job.id, status, duration, rows, error)
+        except Exception:
+            logger.warning("Could not record job run", exc_info=True, extra={"job": job.id})
+
+    logger.info(
+        "Job finished",
+        extra={"job": job.id, "status": status, "rows": rows, "duration_seconds": round(duration, 3)}
+    )
+
+
+# Lifecycle
+
+
+_scheduler: Optional[AsyncIOScheduler] = None
+
+
+def get_scheduler() -> AsyncIOScheduler:
+    """Get the process-wide scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AsyncIOScheduler(
+            timezone=timezone.utc,
+            job_defaults={"max_instances": 1, "coalesce": True, "misfire_grace_time": 60},
+        )
+    return _scheduler
+
+
+def start_scheduler() -> None:
+    """Register the jobs and start the scheduler, called from the lifespan"""
+    if not settings.SCHEDULER_ENABLED:
+        return
+    scheduler = get_scheduler()
+    now = get_utc_now()
+    for job in configured_jobs():
+        if job.at_hour is not None:
+            timing = {"trigger": CronTrigger(hour=job.at_hour, timezone=timezone.utc)}
+        else:
+            timing = {"trigger": IntervalTrigger(seconds=job.interval.total_seconds()), "next_run_time": now}
+        scheduler.add_job(
+            run_job,
+            args=[job],
+            id=job.id,
+            name=job.id,
+            replace_existing=True,
+            **timing,
+        )
+    scheduler.start()
+    logger.info("Started scheduler", extra={"jobs": [job.id for job in scheduler.get_jobs()]})
+
+
+async def stop_scheduler() -> None:
+    """Stop scheduling, cancel running jobs and wait for them to clean up"""
+    global _scheduler
+    if _scheduler is not None and _scheduler.running:
+        _scheduler.shutdown(wait=False)
+    _scheduler = None
+    if _running:
+        await asyncio.gather(*_running, return_exceptions=True)
+
+
+def run_soon(job_id: str, delay_seconds: float = 0) -> None:
+    """Bring a job's next run forward, unless it is due sooner anyway"""
+    if _scheduler is None or not _scheduler.running:
+        return
+    job = _scheduler.get_job(job_id)
+    if job is None:
+        return
+    run_at = get_utc_now() + timedelta(seconds=delay_seconds)
+    if job.next_run_time is None or job.next_run_time > run_at:
+        job.modify(next_run_time=run_at)
+
+
+@subscribe(MATCH_UPDATED)
+async def on_matches_updated(events: Sequence[MatchEvent]) -> None:
+    """Re-predict fixtures affected by new results or rescheduled matches"""
+    run_soon(PREGENERATE_PREDICTIONS, settings.PREDICTION_PREGENERATE_DELAY_SECONDS)
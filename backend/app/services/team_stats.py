@@ -0,0 +1,192 @@
+"""Materialised team season statistics
+
+Stats rows are recomputed only for the (team, season) pairs touched by newly
+completed matches, and reads are a primary key lookup.
+
+Only league fixtures are aggregated. A team plays in one league per season,
+so keying rows by (team, season) gives its league record; cup and European
+games would otherwise be summed into the same points, form and goal
+averages. A cup result still triggers a refresh of the team's row, which
+simply recomputes the league figures.
+"""
+
+from datetime import datetime
+from typing import Any, Iterable, Optional, Sequence
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logging import get_logger
+from app.db.session import get_session_factory
+from app.ml.features import compute_team_features, load_match_frame
+from app.models.match import Match
+from app.models.team_stats import TeamSeasonStats
+from app.services.cache import STATS, get_cache, stats_key
+from app.services.events import MATCH_COMPLETED, MatchEvent, subscribe
+from app.utils.common import get_utc_now
+
+logger = get_logger(__name__)
+
+FORM_WINDOW = 5
+
+# Competition type whose fixtures are aggregated into the stats rows
+STATS_COMPETITION_TYPE = "league"
+
+# Feature engine column -> TeamSeasonStats column
+_STAT_COLUMNS = {
+    "home_matches_played": "home_matches_played",
+    "home_wins": "home_wins",
+    "home_draws": "home_draws",
+    "home_losses": "home_losses",
+    "home_goals_scored": "home_goals_scored",
+    "home_goals_conceded": "home_goals_conceded",
+    "away_matches_played": "away_matches_played",
+    "away_wins": "away_wins",
+    "away_draws": "away_draws",
+    "away_losses": "away_losses",
+    "away_goals_scored": "away_goals_scored",
+    "away_goals_conceded": "away_goals_conceded",
+    "clean_sheets": "clean_sheets",
+    "goals_last_n": "goals_last_5",
+    "conceded_last_n": "conceded_last_5",
+}
+
+
+def touched_team_seasons(events: Iterable[MatchEvent]) -> set[tuple[int, int]]:
+    """Collect the (team_id, season) pairs affected by completed matches"""
+    keys: set[tuple[int, int]] = set()
+    for event in events:
+        if event.has_result:
+            keys.add((event.home_team_id, event.season))
+            keys.add((event.away_team_id, event.season))
+    return keys
+
+
+def build_stats_rows(
+    frame: pd.DataFrame,
+    team_seasons: Iterable[tuple[int, int]],
+    updated_at: Optional[datetime] = None,
+) -> list[dict[str, Any]]:
+    """Aggregate completed matches into TeamSeasonStats rows
+
+    Args:
+        frame: Completed league matches as returned by load_match_frame
+            with ``competition_type=STATS_COMPETITION_TYPE``
+        team_seasons: (team_id, season) pairs to build rows for
+        updated_at: Timestamp stored on the rows, defaults to now
+
+    Returns:
+        One row per pair; pairs without completed matches get zeroed rows
+    """
+    keys = sorted(set(team_seasons))
+    team_ids = {team_id for team_id, _ in keys}
+    features = compute_team_features(frame, last_n=FORM_WINDOW, team_ids=team_ids, by_season=True)
+
+    updated_at = updated_at or get_utc_now()
+    rows = []
+    for team_id, season in keys:
+        if (team_id, season) in features.index:
+            team_features = features.loc[(team_id, season)]
+            row = {column: int(team_features[source]) for source, column in _STAT_COLUMNS.items()}
+            row["form"] = team_features["form"]
+        else:
+            # No completed matches left, e.g. a result was annulled
+            row = {column: 0 for column in _STAT_COLUMNS.values()}
+            row["form"] = ""
+        row.update(team_id=team_id, season=season, updated_at=updated_at)
+        rows.append(row)
+    return rows
+
+
+async def refresh_team_stats(session: AsyncSession, team_seasons: Iterable[tuple[int, int]]) -> int:
+    """Recompute and upsert stats rows for the given (team_id, season) pairs
+
+    All touched teams are loaded with one match query and aggregated in one
+    vectorised pass. The caller is responsible for committing.
+
+    Args:
+        session: Database session
+        team_seasons: (team_id, season) pairs to recompute
+
+    Returns:
+        Number of stats rows written
+    """
+    keys = sorted(set(team_seasons))
+    if not keys:
+        return 0
+
+    team_ids = {team_id for team_id, _ in keys}
+    seasons = {season for _, season in keys}
+    frame = await load_match_frame(
+        session,
+        team_ids=team_ids,
+        seasons=seasons,
+        competition_type=STATS_COMPETITION_TYPE,
+    )
+    rows = build_stats_rows(frame, keys)
+
+    stmt = pg_insert(TeamSeasonStats).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["team_id", "season"],
+        set_={column: stmt.excluded[column] for column in [*_STAT_COLUMNS.values(), "form", "updated_at"]}
+    )
+    await session.execute(stmt)
+    return len(rows)
+
+
+async def refresh_recent_results(session: AsyncSession, since: datetime) -> int:
+    """Refresh stats for teams whose matches were completed or corrected since a time
+
+    Safety net for result updates that bypass the event bus.
+    """
+    result = await session.execute(
+        select(Match.home_team_id, Match.away_team_id, Match.season).where(
+            Match.status == "completed",
+            Match.updated_at >= since
+        )
+    )
+    keys: set[tuple[int, int]] = set()
+    for home_team_id, away_team_id, season in result.all():
+        keys.add((home_team_id, season))
+        keys.add((away_team_id, season))
+    return await refresh_team_stats(session, keys)
+
+
+async def get_team_stats(
+    session: AsyncSession,
+    team_id: int,
+    season: Optional[int] = None
+) -> Optional[TeamSeasonStats]:
+    """Read a team's materialised stats, defaulting to its latest season"""
+    if season is not None:
+        return await session.get(TeamSeasonStats, (team_id, season))
+
+    result = await session.execute(
+        select(TeamSeasonStats)
+        .where(TeamSeasonStats.team_id == team_id)
+        .order_by(TeamSeasonStats.season.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+@subscribe(MATCH_COMPLETED)
+async def on_matches_completed(events: Sequence[MatchEvent]) -> None:
+    """Recompute stats for the teams involved in newly completed matches"""
+    keys = touched_team_seasons(events)
+    if not keys:
+        return
+
+    async with get_session_factory()() as session:
+        written = await refresh_team_stats(session, keys)
+        await session.commit()
+
+    # Drop entries that may have been re-cached while the refresh was running
+    await get_cache().invalidate(
+        STATS,
+        {key for team_id, season in keys for key in (stats_key(team_id, season), stats_key(team_id))}
+    )
+
+    logger.info("Refreshed team stats", extra={"rows": written, "matches": len(events)})
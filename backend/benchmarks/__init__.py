@@ -0,0 +1,21 @@
+"""Benchmarks for the API and the prediction path
+
+Run from the ``backend`` directory::
+
+    # 1. Seed a local database (SQLite by default) and train a benchmark model
+    python -m benchmarks.seed --leagues 50 --seasons 20
+
+    # 2. Endpoint latency/throughput, served in-process through httpx's ASGI transport
+    python -m benchmarks.api --requests 500 --concurrency 16
+
+    # 3. Feature extraction, inference and serialisation micro-benchmarks
+    python -m benchmarks.micro
+
+    # 4. Compare two runs and flag regressions
+    python -m benchmarks.compare benchmarks/results/api-a.json benchmarks/results/api-b.json
+
+Every script reads ``--database-url`` (default ``sqlite:///benchmarks/bench.db``)
+and writes its results as JSON under ``benchmarks/results/``. Synthetic data is
+generated from a fixed ``--seed`` so runs are reproducible. These are not
+tests and are not collected by pytest.
+"""
@@ -0,0 +1,191 @@
+"""Latency and throughput of the main read endpoints
+
+Requests are served in-process through httpx's ASGI transport with the full
+middleware stack and a real database, so the numbers cover routing,
+validation, SQL, serialisation and compression but not the network or the
+ASGI server. Each scenario sends ``--requests`` requests from
+``--concurrency`` concurrent clients, picking ids at random (with a fixed
+seed) from the seeded data.
+
+Usage::
+
+    python -m benchmarks.api --requests 500 --concurrency 16
+    python -m benchmarks.api --cold --scenarios prediction prediction_batch
+    python -m benchmarks.api --cold --pregenerate --scenarios prediction
+
+``--pregenerate`` stores predictions for every scheduled match first (the
+window is widened to a year), so prediction requests are served from the
+store.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Any, Callable
+
+from benchmarks.common import add_common_arguments, configure_environment, print_table, summarize, write_results
+
+Request = tuple[str, str, Any]
+
+
+async def _sample_ids(limit: int) -> dict[str, list[Any]]:
+    """Pick the ids each scenario draws from"""
+    from sqlalchemy import func, select
+
+    from app.db.session import get_session_factory
+    from app.models import Match, TeamSeasonStats
+
+    async with get_session_factory()() as session:
+        completed = (await session.execute(
+            select(Match.id).where(Match.status == "completed").order_by(func.random()).limit(limit)
+        )).scalars().all()
+        scheduled = (await session.execute(
+            select(Match.id).where(Match.status == "scheduled").order_by(func.random()).limit(limit)
+        )).scalars().all()
+        competition_seasons = (await session.execute(
+            select(Match.competition_id, Match.season).distinct()
+        )).all()
+        teams = (await session.execute(select(TeamSeasonStats.team_id).distinct())).scalars().all()
+
+    if not completed or not competition_seasons:
+        raise SystemExit("The benchmark database is empty, run python -m benchmarks.seed first")
+    return {
+        "completed": list(completed),
+        # Fall back to completed matches when the latest season is fully played
+        "scheduled": list(scheduled) or list(completed),
+        "competition_seasons": [tuple(row) for row in competition_seasons],
+        "teams": list(teams),
+    }
+
+
+async def _pregenerate() -> None:
+    from app.db.session import get_session_factory
+    from app.ml.elo import get_rating_engine
+    from app.services.prediction import pregenerate_predictions
+
+    async with get_session_factory()() as session:
+        await get_rating_engine().load(session)
+        stored = await pregenerate_predictions(session)
+    print(f"Pre-generated {stored} predictions")
+
+
+def build_scenarios(ids: dict[str, list[Any]]) -> dict[str, Callable[[random.Random], Request]]:
+    """Scenario name -> factory of (method, url, json body) requests"""
+
+    def match_list(rng: random.Random) -> Request:
+        competition_id, season = rng.choice(ids["competition_seasons"])
+        return "GET", f"/api/v1/matches?competition_id={competition_id}&season={season}&limit=20", None
+
+    def match_list_team(rng: random.Random) -> Request:
+        return "GET", f"/api/v1/matches?team_id={rng.choice(ids['teams'])}&order=desc&limit=50", None
+
+    def match_detail(rng: random.Random) -> Request:
+        return "GET", f"/api/v1/matches/{rng.choice(ids['completed'])}", None
+
+    def team_stats(rng: random.Random) -> Request:
+        return "GET", f"/api/v1/stats/team/{rng.choice(ids['teams'])}", None
+
+    def prediction(rng: random.Random) -> Request:
+        return "GET", f"/api/v1/predictions/{rng.choice(ids['scheduled'])}", None
+
+    def prediction_batch(rng: random.Random) -> Request:
+        match_ids = rng.sample(ids["scheduled"], min(20, len(ids["scheduled"])))
+        return "POST", "/api/v1/predictions/batch", {"match_ids": match_ids}
+
+    return {
+        "match_list": match_list,
+        "match_list_team": match_list_team,
+        "match_detail": match_detail,
+        "team_stats": team_stats,
+        "prediction": prediction,
+        "prediction_batch": prediction_batch,
+    }
+
+
+async def run_scenario(
+    client: Any,
+    make_request: Callable[[random.Random], Request],
+    requests: int,
+    concurrency: int,
+    seed: int,
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+    planned = [make_request(rng) for _ in range(requests)]
+    latencies: list[float] = []
+    errors: dict[int, int] = {}
+    position = 0
+
+    async def worker() -> None:
+        nonlocal position
+        while position < len(planned):
+            method, url, body = planned[position]
+            position += 1
+            started_at = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started_at)
+            if response.status_code >= 400:
+                errors[response.status_code] = errors.get(response.status_code, 0) + 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize(latencies, time.perf_counter() - started_at)
+    summary["errors"] = errors
+    return summary
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    import httpx
+
+    from app.main import app
+
+    results: dict[str, Any] = {}
+    async with app.router.lifespan_context(app):
+        from app.ml.registry import get_registry
+
+        await get_registry().get()
+        if args.pregenerate:
+            await _pregenerate()
+        ids = await _sample_ids(args.sample_size)
+        scenarios = build_scenarios(ids)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for name in args.scenarios or scenarios:
+                make_request = scenarios[name]
+                if args.warmup:
+                    await run_scenario(client, make_request, args.warmup, args.concurrency, args.seed + 1)
+                results[name] = await run_scenario(
+                    client, make_request, args.requests, args.concurrency, args.seed
+                )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Untimed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sample-size", type=int, default=5000, help="Ids drawn from per scenario")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="*", help="Subset of scenarios to run")
+    parser.add_argument("--cold", action="store_true", help="Disable the prediction and stats caches")
+    parser.add_argument("--pregenerate", action="store_true", help="Store upcoming predictions before timing")
+    args = parser.parse_args()
+
+    configure_environment(args)
+    if args.cold:
+        os.environ["PREDICTION_CACHE_TTL"] = "0"
+        os.environ["STATS_CACHE_TTL"] = "0"
+    if args.pregenerate:
+        os.environ["PREDICTION_PREGENERATE_DAYS"] = "366"
+
+    results = asyncio.run(run(args))
+    print_table(results)
+    write_results("api", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Shared helpers: environment setup, timing statistics and result files"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+BENCHMARK_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCHMARK_DIR / "results"
+DEFAULT_DATABASE_URL = f"sqlite:///{BENCHMARK_DIR / 'bench.db'}"
+DEFAULT_REGISTRY_DIR = str(BENCHMARK_DIR / "models")
+
+
+def add_common_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--registry-dir", default=DEFAULT_REGISTRY_DIR, help="Model registry used by the benchmarks")
+    parser.add_argument("--output", help="Result file, defaults to benchmarks/results/<name>-<timestamp>.json")
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Point the app's settings at the benchmark database and registry
+
+    Must run before anything under ``app`` is imported, since settings are
+    read once at import time.
+    """
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["MODEL_REGISTRY_DIR"] = args.registry_dir
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Scheduled jobs would compete with the measured requests
+    os.environ.setdefault("SCHEDULER_ENABLED", "false")
+
+
+def summarize(latencies: list[float], elapsed: Optional[float] = None) -> dict[str, Any]:
+    """Latency percentiles in milliseconds, plus throughput when the wall time is known"""
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    summary = {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(np.percentile(values, 50)), 3),
+        "p95_ms": round(float(np.percentile(values, 95)), 3),
+        "p99_ms": round(float(np.percentile(values, 99)), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+    if elapsed:
+        summary["throughput_rps"] = round(values.size / elapsed, 2)
+    return summary
+
+
+def time_calls(func: Callable[[], Any], repeat: int, warmup: int = 1) -> dict[str, Any]:
+    """Time a synchronous callable ``repeat`` times after ``warmup`` untimed calls"""
+    for _ in range(warmup):
+        func()
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARK_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(name: str, results: dict[str, Any], args: argparse.Namespace) -> Path:
+    """Write results with enough context to compare runs"""
+    payload = {
+        "benchmark": name,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "git_revision": _git_revision(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "arguments": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    if args.output:
+        path = Path(args.output)
+    else:
+        path = RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2))
+    print(f"Results written to {path}")
+    return path
+
+
+def print_table(results: dict[str, dict[str, Any]]) -> None:
+    columns = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps")
+    print(f"{'scenario':<32}" + "".join(f"{column:>16}" for column in columns))
+    for scenario, summary in results.items():
+        print(f"{scenario:<32}" + "".join(f"{summary.get(column, ''):>16}" for column in columns))
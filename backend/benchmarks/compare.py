@@ -0,0 +1,77 @@
+"""Compare two benchmark result files and flag regressions
+
+A scenario regresses when its metric grows by more than ``--threshold``
+(relative) from the baseline to the candidate; throughput regresses when it
+drops by more than the threshold. Exits with status 1 when anything
+regressed, so the script can gate CI.
+
+Usage::
+
+    python -m benchmarks.compare baseline.json candidate.json --threshold 0.1
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+LATENCY_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _load(path: str) -> dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def compare(baseline: dict[str, Any], candidate: dict[str, Any], threshold: float) -> list[dict[str, Any]]:
+    """One row per scenario and metric present in both runs"""
+    rows = []
+    for scenario, before in baseline["results"].items():
+        after = candidate["results"].get(scenario)
+        if after is None:
+            continue
+        for metric in (*LATENCY_METRICS, "throughput_rps"):
+            if metric not in before or metric not in after or not before[metric]:
+                continue
+            change = (after[metric] - before[metric]) / before[metric]
+            worse = -change if metric == "throughput_rps" else change
+            rows.append({
+                "scenario": scenario,
+                "metric": metric,
+                "baseline": before[metric],
+                "candidate": after[metric],
+                "change": change,
+                "regressed": worse > threshold,
+            })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change tolerated")
+    args = parser.parse_args()
+
+    baseline, candidate = _load(args.baseline), _load(args.candidate)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise SystemExit(f"Cannot compare {baseline['benchmark']} results with {candidate['benchmark']} results")
+
+    print(f"baseline {baseline.get('git_revision')} ({baseline['created_at']}) -> "
+          f"candidate {candidate.get('git_revision')} ({candidate['created_at']})")
+    rows = compare(baseline, candidate, args.threshold)
+    for row in rows:
+        flag = "REGRESSED" if row["regressed"] else ""
+        print(
+            f"{row['scenario']:<32}{row['metric']:<16}{row['baseline']:>12}{row['candidate']:>12}"
+            f"{row['change']:>+10.1%}  {flag}"
+        )
+
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Micro-benchmarks for feature extraction, model inference and serialisation
+
+Works on the seeded database but times only in-memory work: the match
+history is loaded once up front.
+
+Usage::
+
+    python -m benchmarks.micro --repeat 20
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import add_common_arguments, configure_environment, print_table, time_calls, write_results
+
+BATCH_SIZES = (1, 10, 100, 1000)
+
+
+async def _load_history() -> Any:
+    from app.db.session import dispose_engine, get_session_factory
+    from app.ml.features import load_match_frame
+
+    async with get_session_factory()() as session:
+        frame = await load_match_frame(session)
+    await dispose_engine()
+    if frame.empty:
+        raise SystemExit("The benchmark database is empty, run python -m benchmarks.seed first")
+    return frame
+
+
+def _corrections(history: pd.DataFrame) -> Iterator[Any]:
+    """The latest match with a different result each time, so every apply reverts and re-applies"""
+    from app.services.events import MatchEvent
+
+    row = history.iloc[-1]
+    for home_score in itertools.cycle(range(5)):
+        yield MatchEvent(
+            match_id=int(row["id"]),
+            competition_id=int(row["competition_id"]),
+            season=int(row["season"]),
+            home_team_id=int(row["home_team_id"]),
+            away_team_id=int(row["away_team_id"]),
+            status="completed",
+            home_score=home_score,
+            away_score=1,
+            match_date=row["match_date"].to_pydatetime(),
+        )
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    from app.core.serialization import encode_json
+    from app.ml.elo import RatingEngine
+    from app.ml.features import LEGACY_FEATURE_COLUMNS, build_fixture_features, build_match_features, compute_team_features
+    from app.ml.registry import get_registry
+    from app.services.prediction import expected_scores, outcome_probabilities
+
+    history = asyncio.run(_load_history())
+    latest_season = int(history["season"].max())
+    recent = history[history["season"] > latest_season - 3]
+    season = history[history["season"] == latest_season]
+    rng = np.random.default_rng(args.seed)
+    results: dict[str, Any] = {}
+
+    results["build_match_features_3_seasons"] = time_calls(lambda: build_match_features(recent), args.repeat)
+    engine = RatingEngine.from_settings()
+    tiers = {competition_id: None for competition_id in history["competition_id"].unique().tolist()}
+    results["elo_replay_all"] = time_calls(lambda: engine.replay(history, tiers), max(args.repeat // 4, 1))
+    corrections = _corrections(history)
+    results["elo_apply_one"] = time_calls(lambda: engine.apply(next(corrections)), args.repeat * 10)
+    results["compute_team_features_season"] = time_calls(
+        lambda: compute_team_features(season, by_season=True), args.repeat
+    )
+
+    teams = np.unique(recent[["home_team_id", "away_team_id"]].to_numpy())
+    handle = get_registry().load(get_registry().current_version())
+    model = handle.model
+    columns = handle.metadata.get("feature_columns") or LEGACY_FEATURE_COLUMNS
+    for size in BATCH_SIZES:
+        pairs = rng.choice(teams, size=(size, 2))
+        fixtures = pd.DataFrame({"id": np.arange(size), "home_team_id": pairs[:, 0], "away_team_id": pairs[:, 1]})
+        features = build_fixture_features(recent, fixtures)
+        X = features[columns].to_numpy(dtype=np.float64)
+
+        results[f"build_fixture_features_{size}"] = time_calls(
+            lambda: build_fixture_features(recent, fixtures), args.repeat
+        )
+        results[f"outcome_probabilities_{size}"] = time_calls(
+            lambda: outcome_probabilities(model, X), args.repeat
+        )
+        outcomes = outcome_probabilities(model, X).argmax(axis=1)
+        results[f"expected_scores_{size}"] = time_calls(lambda: expected_scores(features, outcomes), args.repeat)
+
+    payload = {
+        "success": True,
+        "matches": [
+            {"id": int(row.id), "season": int(row.season), "match_date": row.match_date.isoformat(),
+             "score": {"home": int(row.home_score), "away": int(row.away_score)}}
+            for row in season.head(100).itertuples()
+        ],
+    }
+    results["encode_orjson_100_matches"] = time_calls(lambda: encode_json(payload), args.repeat * 10)
+    results["encode_json_100_matches"] = time_calls(lambda: json.dumps(payload).encode(), args.repeat * 10)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=20, help="Timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    configure_environment(args)
+
+    results = run(args)
+    print_table(results)
+    write_results("micro", results, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Seed a benchmark database with synthetic competitions, teams and matches
+
+Every league plays a double round robin each season with the same teams.
+Scores are drawn from Poisson distributions driven by fixed per-team attack
+and defence strengths, so features carry real signal and the trained
+benchmark model behaves like a real one. Matches dated before now are
+completed, later ones are scheduled, which leaves the latest season partly
+played when it is the current one.
+
+Usage::
+
+    python -m benchmarks.seed --leagues 50 --seasons 20 --reset
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterator
+
+import numpy as np
+
+from benchmarks.common import add_common_arguments, configure_environment
+
+HOME_ADVANTAGE = 0.25
+BASE_GOAL_RATE = 1.35
+ROUND_INTERVAL = timedelta(days=7)
+
+
+def round_robin(team_ids: list[int]) -> list[list[tuple[int, int]]]:
+    """Double round robin by the circle method, one list of (home, away) pairs per round"""
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    size = len(teams)
+    rounds = []
+    for round_index in range(size - 1):
+        pairs = []
+        for i in range(size // 2):
+            home, away = teams[i], teams[size - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alternate venues so no team plays every first-leg game at home
+            pairs.append((home, away) if (round_index + i) % 2 == 0 else (away, home))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1], *teams[1:-1]]
+    return rounds + [[(away, home) for home, away in pairs] for pairs in rounds]
+
+
+def _chunks(rows: list[dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def generate(args: argparse.Namespace) -> dict[str, list[dict[str, Any]]]:
+    """Generate every row to insert, deterministically from ``args.seed``"""
+    rng = np.random.default_rng(args.seed)
+    now = datetime.now(timezone.utc)
+    first_season = args.last_season - args.seasons + 1
+
+    competitions, teams, matches = [], [], []
+    team_id = 0
+    for league in range(args.leagues):
+        competition_id = league + 1
+        competitions.append({
+            "id": competition_id,
+            "external_id": 900000 + competition_id,
+            "name": f"Benchmark League {competition_id}",
+            "type": "league",
+            "country": f"Country {league % 25 + 1}",
+            "tier": league % 4 + 1,
+            "created_at": now,
+            "updated_at": now,
+        })
+
+        league_teams = list(range(team_id + 1, team_id + args.teams_per_league + 1))
+        team_id += args.teams_per_league
+        for member in league_teams:
+            teams.append({
+                "id": member,
+                "external_id": 900000 + member,
+                "name": f"Benchmark Team {member}",
+                "short_name": f"BT{member}",
+                "country": competitions[-1]["country"],
+                "created_at": now,
+                "updated_at": now,
+            })
+
+        attack = dict(zip(league_teams, rng.normal(0.0, 0.3, len(league_teams))))
+        defence = dict(zip(league_teams, rng.normal(0.0, 0.3, len(league_teams))))
+        rounds = round_robin(league_teams)
+
+        for season in range(first_season, args.last_season + 1):
+            kickoff = datetime(season, 8, 15, 18, tzinfo=timezone.utc) + timedelta(hours=league % 24)
+            for round_index, pairs in enumerate(rounds):
+                match_date = kickoff + round_index * ROUND_INTERVAL
+                played = match_date < now
+                if played:
+                    home_rates = [
+                        BASE_GOAL_RATE * np.exp(attack[h] - defence[a] + HOME_ADVANTAGE) for h, a in pairs
+                    ]
+                    away_rates = [BASE_GOAL_RATE * np.exp(attack[a] - defence[h]) for h, a in pairs]
+                    home_scores = rng.poisson(home_rates)
+                    away_scores = rng.poisson(away_rates)
+                for slot, (home, away) in enumerate(pairs):
+                    matches.append({
+                        "id": len(matches) + 1,
+                        "external_id": len(matches) + 1,
+                        "competition_id": competition_id,
+                        "home_team_id": home,
+                        "away_team_id": away,
+                        # Spread a round's games over the weekend
+                        "match_date": match_date + timedelta(minutes=15 * slot),
+                        "season": season,
+                        "round": f"Regular Season - {round_index + 1}",
+                        "home_score": int(home_scores[slot]) if played else None,
+                        "away_score": int(away_scores[slot]) if played else None,
+                        "status": "completed" if played else "scheduled",
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+
+    return {"competitions": competitions, "teams": teams, "matches": matches}
+
+
+def build_stats(matches: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Materialise TeamSeasonStats the same way ingestion does"""
+    from app.ml.features import MATCH_FRAME_COLUMNS, matches_to_frame
+    from app.services.team_stats import build_stats_rows
+
+    completed = [m for m in matches if m["status"] == "completed"]
+    frame = matches_to_frame([tuple(m[column] for column in MATCH_FRAME_COLUMNS) for m in completed])
+    keys = {(m["home_team_id"], m["season"]) for m in completed}
+    keys |= {(m["away_team_id"], m["season"]) for m in completed}
+    return build_stats_rows(frame, keys)
+
+
+def train_model(data: dict[str, list[dict[str, Any]]], seed: int) -> str:
+    """Fit a baseline classifier on the synthetic history and activate it"""
+    from sklearn.linear_model import LogisticRegression
+
+    from app.ml.elo import RatingEngine
+    from app.ml.features import FEATURE_COLUMNS, MATCH_FRAME_COLUMNS, build_match_features, matches_to_frame
+    from app.ml.registry import get_registry
+
+    completed = [m for m in data["matches"] if m["status"] == "completed"]
+    frame = matches_to_frame([tuple(m[column] for column in MATCH_FRAME_COLUMNS) for m in completed])
+    tiers = {competition["id"]: competition["tier"] for competition in data["competitions"]}
+    ratings = RatingEngine.from_settings().replay(frame, tiers)
+    features = build_match_features(frame, ratings=ratings)
+    model = LogisticRegression(max_iter=1000, random_state=seed)
+    model.fit(features[FEATURE_COLUMNS].to_numpy(dtype=np.float64), features["outcome"].to_numpy())
+    return get_registry().save(
+        model,
+        metadata={"source": "benchmarks.seed", "samples": len(features), "feature_columns": FEATURE_COLUMNS},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    parser.add_argument("--leagues", type=int, default=50)
+    parser.add_argument("--seasons", type=int, default=20)
+    parser.add_argument("--teams-per-league", type=int, default=20)
+    parser.add_argument("--last-season", type=int, default=datetime.now(timezone.utc).year)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT")
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    parser.add_argument("--skip-model", action="store_true", help="Do not train a benchmark model")
+    args = parser.parse_args()
+    configure_environment(args)
+
+    from sqlalchemy import create_engine
+
+    from app.db.base import Base
+    from app.models import Competition, Match, Team, TeamSeasonStats
+
+    started_at = time.perf_counter()
+    data = generate(args)
+    stats = build_stats(data["matches"])
+    print(
+        f"Generated {len(data['competitions'])} competitions, {len(data['teams'])} teams, "
+        f"{len(data['matches'])} matches and {len(stats)} stats rows "
+        f"in {time.perf_counter() - started_at:.1f}s"
+    )
+
+    engine = create_engine(args.database_url)
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    started_at = time.perf_counter()
+    with engine.begin() as connection:
+        for model, rows in (
+            (Competition, data["competitions"]),
+            (Team, data["teams"]),
+            (Match, data["matches"]),
+            (TeamSeasonStats, stats),
+        ):
+            for chunk in _chunks(rows, args.batch_size):
+                connection.execute(model.__table__.insert(), chunk)
+    engine.dispose()
+    print(f"Inserted rows in {time.perf_counter() - started_at:.1f}s")
+
+    if not args.skip_model:
+        started_at = time.perf_counter()
+        version = train_model(data, args.seed)
+        print(f"Trained model {version} in {time.perf_counter() - started_at:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
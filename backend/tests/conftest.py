@@ -0,0 +1,43 @@
+"""Shared fixtures: a throwaway SQLite database and recorded API responses"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# Settings are read once at import time, so point them at the test database first
+_DB_DIR = tempfile.mkdtemp(prefix="football-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ["LOG_QUEUE_ENABLED"] = "false"
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import create_engine
+
+import app.models  # noqa: F401  registers every table on Base.metadata
+from app.db.base import Base
+from app.db.session import dispose_engine
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest_asyncio.fixture
+async def db():
+    """Fresh schema per test; pooled async connections are dropped afterwards"""
+    engine = create_engine(os.environ["DATABASE_URL"])
+    Base.metadata.create_all(engine)
+    try:
+        yield
+    finally:
+        await dispose_engine()
+        Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+@pytest.fixture
+def load_fixture():
+    """Load a recorded API response from tests/fixtures"""
+    def load(name: str) -> dict:
+        return json.loads((FIXTURES_DIR / name).read_text())
+    return load
@@ -0,0 +1,155 @@
+"""Two-tier cache with the in-memory backend standing in for Redis"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import (
+    MATCH,
+    PREDICTION,
+    STATS,
+    InMemoryBackend,
+    LRUCache,
+    TwoTierCache,
+    get_cache,
+    on_matches_changed,
+    set_cache,
+    stats_key,
+)
+from app.services.events import MatchEvent
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def shared_cache():
+    """Process-wide cache backed by a fresh InMemoryBackend"""
+    cache = TwoTierCache(backend=InMemoryBackend())
+    set_cache(cache)
+    yield cache
+    set_cache(None)
+
+
+def test_lru_evicts_least_recently_used(clock):
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1, ttl=60)
+    lru.set("b", 2, ttl=60)
+    assert lru.get("a") == 1  # "b" is now the least recently used
+
+    lru.set("c", 3, ttl=60)
+
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+    assert len(lru) == 2
+
+
+def test_lru_expires_entries(clock):
+    lru = LRUCache(max_entries=10)
+    lru.set("a", 1, ttl=60)
+
+    clock.now += 59
+    assert lru.get("a") == 1
+    clock.now += 1
+    assert lru.get("a", "expired") == "expired"
+    assert len(lru) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_calls_the_loader_once_for_concurrent_misses():
+    cache = TwoTierCache()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"points": 3}
+
+    results = await asyncio.gather(*(cache.get_or_load(STATS, "1:latest", load) for _ in range(10)))
+
+    assert calls == 1
+    assert results == [{"points": 3}] * 10
+    assert await cache.get_or_load(STATS, "1:latest", load) == {"points": 3}
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_load_propagates_the_loader_error_to_waiters():
+    cache = TwoTierCache()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("database is down")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load(STATS, "1:latest", load) for _ in range(3)), return_exceptions=True
+    )
+
+    assert calls == 1
+    assert [type(result) for result in results] == [RuntimeError] * 3
+    # Failures are not cached
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load(STATS, "1:latest", load)
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_match_events_drop_derived_entries(shared_cache):
+    event = MatchEvent(match_id=7, competition_id=140, season=2024, home_team_id=1, away_team_id=2, status="completed")
+    other = {"id": 8}
+    await shared_cache.set_many(MATCH, {7: {"id": 7}, 8: other})
+    await shared_cache.set_many(PREDICTION, {7: {"match_id": 7}, 8: {"match_id": 8}})
+    stats_keys = [stats_key(team_id, season) for team_id in (1, 2, 3) for season in (2024, None)]
+    await shared_cache.set_many(STATS, {key: {"team": key} for key in stats_keys})
+
+    await on_matches_changed([event])
+
+    assert await shared_cache.get_many(MATCH, [7, 8]) == {8: other}
+    assert await shared_cache.get_many(PREDICTION, [7, 8]) == {8: {"match_id": 8}}
+    assert sorted(await shared_cache.get_many(STATS, stats_keys)) == ["3:2024", "3:latest"]
+    # Gone from the shared backend too, not just this worker's LRU
+    fresh = TwoTierCache(backend=shared_cache.backend)
+    assert await fresh.get_many(MATCH, [7, 8]) == {8: other}
+
+
+@pytest.mark.asyncio
+async def test_backend_hits_match_local_hits(shared_cache):
+    value = {
+        "generated_at": datetime(2024, 8, 17, 19, tzinfo=timezone.utc),
+        "probabilities": {"home_win": np.float64(0.5), "draw": np.float32(0.25)},
+        "by_minute": {15: 1, 90: 2},
+        "scores": np.array([2, 1]),
+    }
+    await get_cache().set(PREDICTION, 7, value)
+    other_worker = TwoTierCache(backend=shared_cache.backend)
+
+    local = await shared_cache.get(PREDICTION, 7)
+    remote = await other_worker.get(PREDICTION, 7)
+
+    assert local == remote == {
+        "generated_at": "2024-08-17T19:00:00+00:00",
+        "probabilities": {"home_win": 0.5, "draw": 0.25},
+        "by_minute": {"15": 1, "90": 2},
+        "scores": [2, 1],
+    }
+    assert type(remote["probabilities"]["draw"]) is float
+    assert shared_cache.stats["local_hits"] == 1
+    assert other_worker.stats["backend_hits"] == 1
@@ -0,0 +1,65 @@
+"""Vary handling of the compression middleware"""
+
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from app.core.compression import CompressionMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    def large():
+        return {"data": "x" * 500}
+
+    @app.get("/small")
+    def small():
+        return {"data": "x"}
+
+    @app.get("/cors")
+    def cors():
+        return Response('{"data": 1}', media_type="application/json", headers={"Vary": "Origin"})
+
+    @app.get("/not-modified")
+    def not_modified():
+        return Response(status_code=304, headers={"ETag": '"v1"'})
+
+    @app.get("/events")
+    def events():
+        return Response("data: 1\n\n", media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    ("path", "accept_encoding", "content_encoding"),
+    [
+        ("/large", "gzip", "gzip"),
+        ("/large", "identity", None),
+        ("/small", "gzip", None),
+        ("/not-modified", "gzip", None),
+        ("/not-modified", "identity", None),
+    ],
+)
+def test_every_variant_varies_on_accept_encoding(client, path, accept_encoding, content_encoding):
+    response = client.get(path, headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers.get_list("vary") == ["Accept-Encoding"]
+    assert response.headers.get("content-encoding") == content_encoding
+
+
+@pytest.mark.parametrize("accept_encoding", ["gzip", "identity"])
+def test_existing_vary_is_merged(client, accept_encoding):
+    response = client.get("/cors", headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers.get_list("vary") == ["Origin, Accept-Encoding"]
+
+
+def test_event_stream_does_not_vary(client):
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+
+    assert "vary" not in response.headers
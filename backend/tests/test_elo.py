@@ -0,0 +1,103 @@
+"""Vectorised Elo replay against a plain match-by-match loop"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.db.session import get_session_factory
+from app.ml.elo import RatingEngine, load_tiers, margin_multiplier, match_result
+from app.ml.features import load_match_frame, matches_to_frame
+from app.services.ingestion import upsert_fixtures
+
+PAGES = ("fixtures_la_liga_2024_page1.json", "fixtures_la_liga_2024_page2.json")
+TIERS = {140: 1, 143: None}  # league and cup
+
+
+def _engine() -> RatingEngine:
+    return RatingEngine(initial_rating=1500.0, home_advantage=65.0, k_factors={1: 30.0}, default_k=20.0)
+
+
+def _sequential(frame: pd.DataFrame, engine: RatingEngine) -> tuple[dict[int, float], list[tuple[float, float]]]:
+    """Textbook Elo: one match at a time, in frame order"""
+    ratings: dict[int, float] = {}
+    before = []
+    for row in frame.itertuples():
+        rh = ratings.get(row.home_team_id, engine.initial_rating)
+        ra = ratings.get(row.away_team_id, engine.initial_rating)
+        expected = 1 / (1 + 10 ** ((ra - rh - engine.home_advantage) / 400))
+        k = engine.k_factor(TIERS.get(row.competition_id))
+        step = k * margin_multiplier(row.home_score - row.away_score) * (match_result(row.home_score, row.away_score) - expected)
+        ratings[row.home_team_id] = rh + float(step)
+        ratings[row.away_team_id] = ra - float(step)
+        before.append((rh, ra))
+    return ratings, before
+
+
+def _random_season(seed: int = 3, teams: int = 12, days: int = 40) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for day in range(days):
+        pairs = rng.permutation(teams).reshape(-1, 2)[: rng.integers(1, teams // 2 + 1)]
+        for home, away in pairs:
+            kickoff = pd.Timestamp("2024-08-01", tz="UTC") + pd.Timedelta(days=day, hours=int(rng.integers(12, 21)))
+            rows.append((len(rows) + 1, int(rng.choice([140, 143])), 2024, kickoff, int(home) + 1, int(away) + 1,
+                         int(rng.poisson(1.5)), int(rng.poisson(1.1))))
+    # Team 1 plays twice on one day (e.g. a replay after an abandoned game)
+    rows.append((len(rows) + 1, 143, 2024, pd.Timestamp("2024-09-15 12:00", tz="UTC"), 1, 2, 3, 0))
+    rows.append((len(rows) + 1, 140, 2024, pd.Timestamp("2024-09-15 18:00", tz="UTC"), 3, 1, 2, 2))
+    rows.append((len(rows) + 1, 140, 2024, pd.Timestamp("2024-09-15 18:00", tz="UTC"), 4, 5, 1, 0))
+    rows.sort(key=lambda row: (row[3], row[0]))
+    return matches_to_frame(rows)
+
+
+def test_replay_matches_a_sequential_loop():
+    frame = _random_season()
+    engine = _engine()
+
+    pre_match = engine.replay(frame, TIERS)
+    ratings, before = _sequential(frame, engine)
+
+    team_ids = np.array(sorted(ratings))
+    np.testing.assert_allclose(engine.current(team_ids), [ratings[team] for team in team_ids])
+    np.testing.assert_allclose(pre_match[["home_rating", "away_rating"]].to_numpy(), np.array(before))
+
+
+def test_before_returns_ratings_going_into_a_day():
+    frame = _random_season()
+    engine = _engine()
+    engine.replay(frame, TIERS)
+
+    # Going into 2024-09-15 team 1 has played neither game of that day
+    cutoff = pd.Timestamp("2024-09-15", tz="UTC")
+    ratings, _ = _sequential(frame[frame["match_date"] < cutoff], engine)
+    np.testing.assert_allclose(engine.before([1, 3], [cutoff, cutoff]), [ratings[1], ratings[3]])
+    np.testing.assert_allclose(engine.before([1], [cutoff + pd.Timedelta(days=1)]), engine.current([1]))
+
+
+@pytest.mark.asyncio
+async def test_catch_up_applies_new_results_like_a_replay(db, load_fixture):
+    items = {item["fixture"]["id"]: item for name in PAGES for item in load_fixture(name)["response"]}
+    async with get_session_factory()() as session:
+        await upsert_fixtures(session, list(items.values()))
+        await session.commit()
+
+    engine = _engine()
+    async with get_session_factory()() as session:
+        await engine.load(session)
+        assert await engine.catch_up(session) == 0
+
+    finished = copy.deepcopy(items[1208025])
+    finished["fixture"]["status"]["short"] = "FT"
+    finished["goals"] = {"home": 0, "away": 2}
+    async with get_session_factory()() as session:
+        await upsert_fixtures(session, [finished])
+        await session.commit()
+        assert await engine.catch_up(session) == 1
+
+        replayed = _engine()
+        frame = await load_match_frame(session)
+        replayed.replay(frame, await load_tiers(session))
+    team_ids = np.unique(frame[["home_team_id", "away_team_id"]].to_numpy())
+    np.testing.assert_allclose(engine.current(team_ids), replayed.current(team_ids))
@@ -0,0 +1,99 @@
+"""Vectorised feature builder on a small hand-checked history"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.features import (
+    LEGACY_FEATURE_COLUMNS,
+    build_fixture_features,
+    build_match_features,
+    compute_head_to_head,
+    compute_team_features,
+    matches_to_frame,
+)
+
+
+def _frame(rows):
+    """Matches from (id, home, away, home_score, away_score, date) tuples"""
+    return matches_to_frame([
+        (match_id, 140, 2024, pd.Timestamp(date, tz="UTC"), home, away, home_score, away_score)
+        for match_id, home, away, home_score, away_score, date in rows
+    ])
+
+
+@pytest.fixture
+def history():
+    return _frame([
+        (1, 1, 2, 2, 0, "2024-08-01 18:00"),
+        (2, 3, 1, 1, 1, "2024-08-08 18:00"),
+        (3, 2, 1, 0, 3, "2024-08-15 18:00"),
+        (4, 1, 3, 0, 1, "2024-08-22 18:00"),
+        (5, 2, 3, 2, 2, "2024-08-29 18:00"),
+    ])
+
+
+def test_completed_match_features_exclude_its_own_and_later_results(history):
+    # Match 3 as it stood at kick-off: team 2 had lost 2-0 at team 1, team 1 had won and drawn
+    fixture = pd.DataFrame({"id": [3], "home_team_id": [2], "away_team_id": [1], "match_date": history["match_date"][2:3]})
+
+    features = build_fixture_features(history, fixture).loc[3]
+
+    assert features["home_form_points"] == 0.0
+    assert features["away_form_points"] == 2.0
+    assert (features["home_goals_scored_avg"], features["home_goals_conceded_avg"]) == (0.0, 2.0)
+    assert (features["away_goals_scored_avg"], features["away_goals_conceded_avg"]) == (1.5, 0.5)
+    assert features["h2h_matches"] == 1.0
+    assert features["h2h_home_win_rate"] == 0.0
+
+
+def test_fixture_features_match_training_features_for_played_matches(history):
+    fixtures = history[["id", "home_team_id", "away_team_id", "match_date"]]
+
+    served = build_fixture_features(history, fixtures)[LEGACY_FEATURE_COLUMNS]
+    trained = build_match_features(history)[LEGACY_FEATURE_COLUMNS]
+
+    pd.testing.assert_frame_equal(served, trained, check_names=False)
+
+
+def test_fixture_features_without_dates_use_the_whole_history(history):
+    fixture = pd.DataFrame({"id": [6], "home_team_id": [1], "away_team_id": [2]})
+
+    features = build_fixture_features(history, fixture).loc[6]
+
+    # Team 1: W, D, W, L -> 7 points over 4 matches; two meetings with team 2, both won
+    assert features["home_form_points"] == pytest.approx(7 / 4)
+    assert features["h2h_matches"] == 2.0
+    assert features["h2h_home_win_rate"] == 1.0
+    assert np.isclose(features["away_form_points"], 1 / 3)
+
+
+def test_team_features_by_hand(history):
+    features = compute_team_features(history, last_n=3)
+
+    # Team 1: W 2-0, D 1-1, W 3-0, L 0-1
+    team = features.loc[1]
+    assert (team["matches_played"], team["wins"], team["draws"], team["losses"]) == (4, 2, 1, 1)
+    assert (team["goals_scored"], team["goals_conceded"], team["points"]) == (6, 2, 7)
+    assert team["form"] == "DWL"
+    assert (team["goals_last_n"], team["conceded_last_n"]) == (4, 2)
+    # Team 2: L 0-2, L 0-3, D 2-2
+    assert features.loc[2, "form"] == "LLD"
+
+
+def test_head_to_head_by_hand(history):
+    h2h = compute_head_to_head(history, [(1, 2), (2, 1), (1, 3), (2, 4)])
+
+    assert h2h.loc[(1, 2)].tolist() == [2, 2, 0, 0, 5, 0, "WW"]
+    assert h2h.loc[(2, 1)].tolist() == [2, 0, 0, 2, 0, 5, "LL"]
+    assert h2h.loc[(1, 3)].tolist() == [2, 0, 1, 1, 1, 2, "DL"]
+    # Never met
+    assert h2h.loc[(2, 4)].tolist() == [0, 0, 0, 0, 0, 0, ""]
+
+
+def test_head_to_head_without_pairs(history):
+    h2h = compute_head_to_head(history, [])
+
+    assert h2h.empty
+    assert list(h2h.index.names) == ["team_id", "opponent_id"]
+    assert "last_results" in h2h.columns
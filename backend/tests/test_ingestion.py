@@ -0,0 +1,163 @@
+"""Fixture ingestion against recorded API-Football pages"""
+
+import copy
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+from app.db.session import get_session_factory
+from app.models.match import Match
+from app.services import ingestion
+from app.services.events import MATCH_COMPLETED, MATCH_UPDATED, REFERENCE_UPDATED
+from app.services.football_api import FootballAPIClient
+from app.services.ingestion import parse_fixture, sync_league_season, upsert_fixtures
+
+PAGES = ("fixtures_la_liga_2024_page1.json", "fixtures_la_liga_2024_page2.json")
+
+
+@pytest.fixture
+def items(load_fixture):
+    return [item for name in PAGES for item in load_fixture(name)["response"]]
+
+
+@pytest.fixture
+def published(monkeypatch):
+    """Capture events instead of running the subscribers"""
+    events = []
+
+    async def publish(topic, batch):
+        events.append((topic, list(batch)))
+
+    monkeypatch.setattr(ingestion, "publish", publish)
+    return events
+
+
+async def _upsert(items):
+    async with get_session_factory()() as session:
+        changes = await upsert_fixtures(session, items)
+        await session.commit()
+    return changes
+
+
+async def _matches_by_external_id():
+    async with get_session_factory()() as session:
+        result = await session.execute(select(Match.external_id, Match.id, Match.status, Match.home_score))
+        return {row.external_id: row for row in result}
+
+
+def test_parse_fixture(items):
+    competition, teams, match = parse_fixture(items[0])
+
+    assert competition == {
+        "external_id": 140,
+        "name": "La Liga",
+        "type": "league",
+        "logo_url": "https://media.api-sports.io/football/leagues/140.png",
+        "country": "Spain",
+    }
+    assert [team["external_id"] for team in teams] == [529, 541]
+    assert match["external_id"] == 1208021
+    assert match["match_date"] == datetime(2024, 8, 17, 19, tzinfo=timezone.utc)
+    assert match["status"] == "completed"
+    assert (match["home_score"], match["away_score"]) == (2, 1)
+    assert parse_fixture(items[4])[2]["status"] == "scheduled"
+
+
+@pytest.mark.asyncio
+async def test_upsert_writes_new_fixtures_once(db, items):
+    changes = await _upsert(items)
+
+    assert len(changes.matches) == 6
+    assert sum(event.has_result for event in changes.matches) == 4
+    assert {event.kind for event in changes.references} == {"competition", "team"}
+    assert len(await _matches_by_external_id()) == 6
+
+    unchanged = await _upsert(items)
+    assert unchanged.matches == []
+    assert unchanged.references == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_reports_only_changed_matches(db, items):
+    await _upsert(items)
+    updated = copy.deepcopy(items)
+    updated[4]["fixture"]["status"]["short"] = "FT"
+    updated[4]["goals"] = {"home": 1, "away": 0}
+
+    changes = await _upsert(updated)
+
+    assert [event.match_id for event in changes.matches] == [(await _matches_by_external_id())[1208025].id]
+    assert changes.matches[0].has_result
+    assert changes.references == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_rekeys_match_holding_the_unique_slot(db, items):
+    await _upsert(items)
+    before = await _matches_by_external_id()
+    renumbered = copy.deepcopy(items)
+    renumbered[0]["fixture"]["id"] = 9999001
+
+    await _upsert(renumbered)
+
+    after = await _matches_by_external_id()
+    assert len(after) == 6
+    assert 1208021 not in after
+    assert after[9999001].id == before[1208021].id
+
+
+@pytest.mark.asyncio
+async def test_upsert_skips_fixture_colliding_with_another_match(db, items):
+    await _upsert(items)
+    # Fixture 1208022 moved onto the slot still held by 1208021
+    moved = copy.deepcopy(items[1])
+    moved["fixture"]["date"] = items[0]["fixture"]["date"]
+    moved["teams"] = copy.deepcopy(items[0]["teams"])
+
+    changes = await _upsert([moved, items[2]])
+
+    assert changes.matches == []
+    async with get_session_factory()() as session:
+        assert await session.scalar(select(func.count()).select_from(Match)) == 6
+
+
+class RecordedAPI:
+    """Serves the recorded pages with an ETag, answering 304 when it matches"""
+
+    def __init__(self, load_fixture):
+        self.pages = {index + 1: load_fixture(name) for index, name in enumerate(PAGES)}
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        page = int(request.url.params.get("page", 1))
+        etag = f'"la-liga-2024-{page}"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, json=self.pages[page], headers={"ETag": etag})
+
+
+@pytest.mark.asyncio
+async def test_sync_league_season_skips_unchanged_pages(db, load_fixture, published):
+    api = RecordedAPI(load_fixture)
+    client = FootballAPIClient(base_url="https://api.test", api_key="test", transport=httpx.MockTransport(api))
+    try:
+        async with get_session_factory()() as session:
+            first = await sync_league_season(client, session, 140, 2024)
+        async with get_session_factory()() as session:
+            second = await sync_league_season(client, session, 140, 2024)
+    finally:
+        await client.close()
+
+    assert (first.pages, first.fixtures, first.matches_written) == (2, 6, 6)
+    topics = [topic for topic, _ in published]
+    assert topics.count(MATCH_UPDATED) == 2
+    assert topics.count(MATCH_COMPLETED) == 2
+    assert REFERENCE_UPDATED in topics
+
+    assert (second.pages, second.fixtures, second.matches_written) == (2, 0, 0)
+    assert [request.headers.get("If-None-Match") for request in api.requests[2:]] == [
+        '"la-liga-2024-1"', '"la-liga-2024-2"'
+    ]
@@ -0,0 +1,165 @@
+"""Live result polling against the recorded API-Football pages"""
+
+import asyncio
+import copy
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy import select, update
+
+from app.db.session import get_session_factory
+from app.models.match import Match
+from app.services import live_updates
+from app.services.football_api import FootballAPIClient
+from app.services.ingestion import upsert_fixtures
+from app.services.live_updates import LiveResultUpdater, apply_changes, diff_results, load_live_window
+
+PAGES = ("fixtures_la_liga_2024_page1.json", "fixtures_la_liga_2024_page2.json")
+
+# Half an hour after 1208025 kicked off; 1208026 starts at 18:30
+NOW = datetime(2024, 8, 24, 16, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def items(load_fixture):
+    return {item["fixture"]["id"]: item for name in PAGES for item in load_fixture(name)["response"]}
+
+
+@pytest_asyncio.fixture
+async def stored(db, items, monkeypatch):
+    """Recorded fixtures in the database, with 1208021 stuck as live since August 17"""
+    monkeypatch.setattr(live_updates, "get_utc_now", lambda: NOW)
+    async with get_session_factory()() as session:
+        await upsert_fixtures(session, list(items.values()))
+        await session.execute(update(Match).where(Match.external_id == 1208021).values(status="live"))
+        await session.commit()
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+
+    async def publish(batch):
+        events.extend(batch)
+
+    monkeypatch.setattr(live_updates, "publish_match_events", publish)
+    return events
+
+
+async def _live_window():
+    async with get_session_factory()() as session:
+        return await load_live_window(session)
+
+
+async def _results():
+    async with get_session_factory()() as session:
+        result = await session.execute(select(Match.external_id, Match.status, Match.home_score, Match.away_score))
+        return {row.external_id: (row.status, row.home_score, row.away_score) for row in result}
+
+
+def _in_play(item, home, away, short="2H"):
+    item = copy.deepcopy(item)
+    item["fixture"]["status"]["short"] = short
+    item["goals"] = {"home": home, "away": away}
+    return item
+
+
+@pytest.mark.asyncio
+async def test_live_window_keeps_live_matches_and_recent_kickoffs(stored):
+    rows = await _live_window()
+
+    # Live matches stay in however long ago they kicked off; completed and later ones never do
+    assert sorted(row.external_id for row in rows) == [1208021, 1208025]
+
+
+@pytest.mark.asyncio
+async def test_diff_results_returns_only_changed_matches(stored, items):
+    rows = await _live_window()
+    fixtures = [
+        _in_play(items[1208021], 2, 1, short="FT"),
+        copy.deepcopy(items[1208025]),  # still 0-0 before kickoff: unchanged
+        _in_play(items[1208026], 1, 0),  # not in the window
+    ]
+
+    changes = diff_results(rows, fixtures)
+
+    [change] = changes
+    assert change.match_id == next(row.id for row in rows if row.external_id == 1208021)
+    assert (change.status, change.home_score, change.away_score) == ("completed", 2, 1)
+    assert change.has_result
+
+
+@pytest.mark.asyncio
+async def test_apply_changes_writes_only_the_changed_rows(stored, items):
+    rows = await _live_window()
+    changes = diff_results(rows, [_in_play(items[1208025], 1, 0)])
+    before = await _results()
+
+    async with get_session_factory()() as session:
+        await apply_changes(session, changes)
+        await session.commit()
+
+    after = await _results()
+    assert after.pop(1208025) == ("live", 1, 0)
+    before.pop(1208025)
+    assert after == before
+
+
+class LiveAPI:
+    """Answers /fixtures?ids=... from the recorded items, with live scores patched in"""
+
+    def __init__(self, items):
+        self.items = items
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        ids = [int(i) for i in request.url.params["ids"].split("-")]
+        return httpx.Response(200, json={"errors": [], "response": [self.items[i] for i in ids]})
+
+
+@pytest.mark.asyncio
+async def test_run_once_polls_the_window_and_publishes_changes(stored, items, published):
+    items[1208025] = _in_play(items[1208025], 0, 1)
+    api = LiveAPI(items)
+    client = FootballAPIClient(base_url="https://api.test", api_key="test", transport=httpx.MockTransport(api))
+    updater = LiveResultUpdater(client=client)
+    try:
+        # 1208021 finished 2-1 while stored as live, 1208025 kicked off
+        assert await updater.run_once() == 2
+        assert await updater.run_once() == 0
+    finally:
+        await updater.stop()
+
+    # The completed match drops out of the window
+    assert [request.url.params["ids"] for request in api.requests] == ["1208021-1208025", "1208025"]
+    assert sorted((event.status, event.home_score, event.away_score) for event in published) == [
+        ("completed", 2, 1), ("live", 0, 1)
+    ]
+    results = await _results()
+    assert (results[1208021], results[1208025]) == (("completed", 2, 1), ("live", 0, 1))
+
+
+@pytest.mark.asyncio
+async def test_only_the_lock_holder_polls(monkeypatch):
+    @asynccontextmanager
+    async def held_elsewhere(name):
+        yield None
+
+    polls = []
+
+    async def run_once(self, window_minutes=None):
+        polls.append(window_minutes)
+        return 0
+
+    monkeypatch.setattr(live_updates, "try_hold_advisory_lock", held_elsewhere)
+    monkeypatch.setattr(LiveResultUpdater, "run_once", run_once)
+    updater = LiveResultUpdater(interval=0.01)
+    updater.start()
+    await asyncio.sleep(0.05)
+    await updater.stop()
+
+    assert polls == []
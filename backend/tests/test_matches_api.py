@@ -0,0 +1,104 @@
+"""Cache headers and SQL statement budgets of the match endpoints"""
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from sqlalchemy import select, text
+
+from app.db.query_guard import QueryBudgetExceeded, QueryBudgetMiddleware, count_queries
+from app.db.session import get_db, get_session_factory
+from app.main import app
+from app.models.match import Match
+from app.services import reference
+from app.services.ingestion import upsert_fixtures
+
+PAGES = ("fixtures_la_liga_2024_page1.json", "fixtures_la_liga_2024_page2.json")
+
+
+@pytest_asyncio.fixture
+async def client(db, load_fixture, monkeypatch):
+    # Start every test with a cold reference cache, as after a restart
+    monkeypatch.setattr(reference, "_reference_cache", None)
+    items = [item for name in PAGES for item in load_fixture(name)["response"]]
+    async with get_session_factory()() as session:
+        await upsert_fixtures(session, items)
+        await session.commit()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def _match_id(external_id):
+    async with get_session_factory()() as session:
+        return await session.scalar(select(Match.id).where(Match.external_id == external_id))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"status": "completed", "order": "desc"},
+        {"status": "completed", "limit": 1},
+        {"status": "postponed"},
+    ],
+    ids=["latest-results", "completed-first-page", "empty"],
+)
+async def test_listing_pages_are_always_revalidated(client, params):
+    response = await client.get("/api/v1/matches", params=params)
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_detail_is_cached_only_once_the_season_is_over_for_both_teams(client):
+    # 529 and 541 have no fixtures left; 531 still plays on 2024-08-24
+    closed = await client.get(f"/api/v1/matches/{await _match_id(1208021)}")
+    scheduled = await client.get(f"/api/v1/matches/{await _match_id(1208025)}")
+
+    assert closed.headers["cache-control"] == "public, max-age=3600"
+    assert scheduled.headers["cache-control"] == "no-cache"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", [1, 6])
+async def test_listing_query_count_does_not_grow_with_the_page(client, limit):
+    # The page, then the teams and competitions missing from the reference cache
+    with count_queries(budget=3):
+        response = await client.get("/api/v1/matches", params={"limit": limit})
+
+    assert response.json()["count"] == limit
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("external_id", [1208021, 1208025])
+async def test_detail_query_budget(client, external_id):
+    match_id = await _match_id(external_id)
+
+    # Version, both references, then the match, both teams' stats and head-to-head
+    with count_queries(budget=6):
+        response = await client.get(f"/api/v1/matches/{match_id}")
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_budget_middleware_fails_the_request_before_it_is_sent(db):
+    budgeted = FastAPI()
+    budgeted.add_middleware(QueryBudgetMiddleware, budget=1)
+
+    @budgeted.get("/queries/{count}")
+    async def queries(count: int, session=Depends(get_db)):
+        for _ in range(count):
+            await session.execute(text("SELECT 1"))
+        return {"ok": True}
+
+    transport = httpx.ASGITransport(app=budgeted, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        assert (await client.get("/queries/1")).status_code == 200
+        assert (await client.get("/queries/2")).status_code == 500
+
+    with pytest.raises(QueryBudgetExceeded):
+        with count_queries(budget=0):
+            await _match_id(1208021)
@@ -0,0 +1,25 @@
+"""Prometheus exposition of callback-backed metrics"""
+
+from app.core.metrics import Counter, Gauge, render_metrics
+
+
+def test_callback_counter_renders_counter_type():
+    totals = Counter("widget_operations_total", "Widget operations", ("outcome",), callback=lambda: {("hits",): 3})
+
+    assert totals.render().splitlines() == [
+        "# HELP widget_operations_total Widget operations",
+        "# TYPE widget_operations_total counter",
+        'widget_operations_total{outcome="hits"} 3',
+    ]
+
+
+def test_callback_gauge_renders_scalar():
+    level = Gauge("widget_level", "Widget level", callback=lambda: 0.5)
+
+    assert level.render().splitlines()[1:] == ["# TYPE widget_level gauge", "widget_level 0.5"]
+
+
+def test_cache_operations_are_exported_as_counter():
+    import app.services.cache  # noqa: F401  registers the cache metrics
+
+    assert "# TYPE cache_operations_total counter" in render_metrics()
@@ -0,0 +1,74 @@
+"""Dixon-Coles fit on synthetic matches with known strengths"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import check_grad
+
+from app.ml.features import matches_to_frame
+from app.ml.poisson import MAX_GOALS, DixonColesModel, _poisson_loss
+
+# Centred, so they can be compared with the fit's centred strengths directly
+ATTACK = np.array([0.45, 0.25, 0.1, -0.1, -0.3, -0.4])
+DEFENCE = np.array([-0.35, -0.2, -0.05, 0.1, 0.2, 0.3])
+RHO = -0.12
+
+
+def _synthetic_matches(rounds: int = 80, seed: int = 7) -> pd.DataFrame:
+    """Every ordered pair of teams meets ``rounds`` times, scores drawn from the true model"""
+    truth = DixonColesModel()
+    truth.team_ids = np.arange(1, len(ATTACK) + 1)
+    truth.attack, truth.defence = ATTACK, DEFENCE
+    truth.intercept, truth.home_advantage, truth.rho = 0.15, 0.25, RHO
+
+    pairs = np.array([(h, a) for h in truth.team_ids for a in truth.team_ids if h != a] * rounds)
+    grid = truth.scoreline_grid(*truth.rates(pairs[:, 0], pairs[:, 1])).reshape(len(pairs), -1)
+    rng = np.random.default_rng(seed)
+    cells = (grid.cumsum(axis=1) < rng.random((len(pairs), 1))).sum(axis=1)
+    home_goals, away_goals = np.divmod(cells, MAX_GOALS + 1)
+    kickoff = pd.Timestamp("2024-08-17 19:00", tz="UTC")
+    return matches_to_frame([
+        (i, 140, 2024, kickoff, home, away, hg, ag)
+        for i, (home, away, hg, ag) in enumerate(zip(pairs[:, 0], pairs[:, 1], home_goals, away_goals))
+    ])
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    return DixonColesModel(l2_penalty=0.1).fit(_synthetic_matches())
+
+
+def test_fit_recovers_strengths_and_home_advantage(fitted):
+    # Strengths are identified up to a shared offset absorbed by the intercept
+    attack = fitted.attack - fitted.attack.mean()
+    defence = fitted.defence - fitted.defence.mean()
+
+    np.testing.assert_array_equal(np.sign(attack), np.sign(ATTACK))
+    np.testing.assert_array_equal(np.sign(defence), np.sign(DEFENCE))
+    np.testing.assert_allclose(attack, ATTACK, atol=0.08)
+    np.testing.assert_allclose(defence, DEFENCE, atol=0.08)
+    assert fitted.home_advantage == pytest.approx(0.25, abs=0.06)
+
+
+def test_fit_recovers_rho(fitted):
+    assert fitted.rho < 0
+    assert fitted.rho == pytest.approx(RHO, abs=0.05)
+
+
+def test_analytic_gradient_matches_finite_differences():
+    frame = _synthetic_matches(rounds=2)
+    home = frame["home_team_id"].to_numpy() - 1
+    away = frame["away_team_id"].to_numpy() - 1
+    args = (
+        home,
+        away,
+        frame["home_score"].to_numpy(dtype=np.float64),
+        frame["away_score"].to_numpy(dtype=np.float64),
+        np.random.default_rng(0).uniform(0.2, 1.0, len(frame)),
+        0.7,
+    )
+    theta = np.random.default_rng(1).normal(0, 0.3, 2 + 2 * len(ATTACK))
+
+    error = check_grad(lambda t: _poisson_loss(t, *args)[0], lambda t: _poisson_loss(t, *args)[1], theta)
+
+    assert error < 1e-4 * np.linalg.norm(_poisson_loss(theta, *args)[1])
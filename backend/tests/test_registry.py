@@ -0,0 +1,80 @@
+"""Model registry storage, lazy loading and hot swap"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.ml.registry import ModelNotAvailableError, ModelRegistry
+
+
+def _model(value: float) -> dict:
+    return {"coef": np.full(1000, value)}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path), "match_outcome", check_interval=0)
+
+
+def test_save_writes_versions_and_switches_current(registry):
+    registry.save(_model(1.0), version="v1", metadata={"accuracy": 0.5})
+    registry.save(_model(2.0), version="v2", activate=False)
+
+    assert registry.list_versions() == ["v1", "v2"]
+    assert registry.current_version() == "v1"
+    assert registry.read_metadata("v1")["accuracy"] == 0.5
+
+    registry.activate("v2")
+    assert registry.current_version() == "v2"
+    with pytest.raises(ValueError):
+        registry.save(_model(3.0), version="v2")
+    with pytest.raises(ValueError):
+        registry.activate("v3")
+
+
+@pytest.mark.asyncio
+async def test_get_loads_lazily_with_memory_mapped_arrays(registry):
+    registry.save(_model(1.0), version="v1")
+    assert registry.peek() is None
+
+    handle = await registry.get()
+
+    assert handle.version == "v1"
+    assert isinstance(handle.model["coef"], np.memmap)
+    assert not handle.model["coef"].flags.writeable
+    assert registry.peek() is handle
+
+
+@pytest.mark.asyncio
+async def test_get_moves_to_a_new_version_without_a_restart(registry):
+    registry.save(_model(1.0), version="v1")
+    assert (await registry.get()).version == "v1"
+
+    registry.save(_model(2.0), version="v2")
+
+    # The old version keeps serving while the new one loads in the background
+    assert (await registry.get()).version == "v1"
+    await asyncio.wait_for(registry._swap_task, timeout=5)
+    handle = await registry.get()
+    assert handle.version == "v2"
+    assert handle.model["coef"][0] == 2.0
+
+
+@pytest.mark.asyncio
+async def test_refresh_loads_the_new_version_now(tmp_path):
+    registry = ModelRegistry(str(tmp_path), "match_outcome", check_interval=3600)
+    registry.save(_model(1.0), version="v1")
+    await registry.get()
+    registry.save(_model(2.0), version="v2")
+
+    assert (await registry.get()).version == "v1"  # not checked again for an hour
+    assert (await registry.refresh()).version == "v2"
+
+
+@pytest.mark.asyncio
+async def test_missing_model(tmp_path):
+    registry = ModelRegistry(str(tmp_path), "match_outcome", legacy_path=str(tmp_path / "missing.pkl"))
+
+    with pytest.raises(ModelNotAvailableError):
+        await registry.get()
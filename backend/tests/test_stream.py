@@ -0,0 +1,101 @@
+"""Broadcast hub supervision and WebSocket input handling"""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from app.api.stream import stream_matches
+from app.main import app
+from app.services import broadcast
+from app.services.broadcast import BroadcastHub
+
+
+class FlakyBackend:
+    """Fails to listen once, then relays published messages; publishing may fail too"""
+
+    def __init__(self, fail_publish: bool = False):
+        self.fail_publish = fail_publish
+        self.listens = 0
+        self.queue: asyncio.Queue[str] = asyncio.Queue()
+
+    async def publish(self, data: str) -> None:
+        if self.fail_publish:
+            raise ConnectionError("redis is down")
+        await self.queue.put(data)
+
+    async def listen(self, deliver) -> None:
+        self.listens += 1
+        if self.listens == 1:
+            raise ConnectionError("redis is down")
+        while True:
+            deliver(await self.queue.get())
+
+    async def close(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_listener_reconnects_after_an_error(monkeypatch):
+    monkeypatch.setattr(broadcast, "_RECONNECT_MAX_DELAY", 0.01)
+    backend = FlakyBackend()
+    hub = BroadcastHub(backend=backend)
+    subscription = hub.subscribe()
+    await hub.start()
+    try:
+        await hub.publish([{"type": "score", "match_id": 1}])
+        assert await subscription.get(timeout=1) == '{"type":"score","match_id":1}'
+        assert backend.listens == 2
+    finally:
+        await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_publish_still_reaches_local_subscribers():
+    hub = BroadcastHub(backend=FlakyBackend(fail_publish=True))
+    subscription = hub.subscribe({1})
+
+    await hub.publish([{"type": "score", "match_id": 1}, {"type": "score", "match_id": 2}])
+
+    assert await subscription.get(timeout=0.1) == '{"type":"score","match_id":1}'
+    assert await subscription.get(timeout=0.1) is None
+
+
+def test_websocket_rejects_bad_match_ids():
+    client = TestClient(app)
+    with pytest.raises(WebSocketDisconnect) as error:
+        with client.websocket_connect("/api/v1/stream/ws?match_ids=1,x"):
+            pass
+    assert error.value.code == 1008
+
+
+@pytest.mark.parametrize(
+    ("message", "code"),
+    [("not json", 1003), ("[1, 2]", 1008), ('{"match_ids": "1"}', 1008), ('{"other": 1}', 1008)],
+)
+def test_websocket_closes_on_invalid_message(message, code):
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/stream/ws") as websocket:
+        websocket.send_text('{"match_ids": [1, 2]}')
+        websocket.send_text(message)
+        with pytest.raises(WebSocketDisconnect) as error:
+            websocket.receive_text()
+    assert error.value.code == code
+
+
+@pytest.mark.asyncio
+async def test_sse_subscription_lives_only_while_the_stream_is_consumed(monkeypatch):
+    hub = BroadcastHub()
+    monkeypatch.setattr(broadcast, "_hub", hub)
+
+    abandoned = await stream_matches(match_ids="1")
+    # A client that disconnects before the body starts leaves nothing registered
+    assert hub.subscriber_count == 0
+    await abandoned.body_iterator.aclose()
+
+    response = await stream_matches(match_ids="1")
+    assert await response.body_iterator.__anext__() == "retry: 5000\n\n"
+    assert hub.subscriber_count == 1
+    await response.body_iterator.aclose()
+    assert hub.subscriber_count == 0
@@ -0,0 +1,114 @@
+"""Materialisation of team season stats"""
+
+import copy
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.db.session import get_session_factory
+from app.ml.features import matches_to_frame
+from app.models.team import Team
+from app.models.team_stats import TeamSeasonStats
+from app.services.ingestion import upsert_fixtures
+from app.services.team_stats import build_stats_rows, refresh_team_stats, touched_team_seasons
+
+PAGES = ("fixtures_la_liga_2024_page1.json", "fixtures_la_liga_2024_page2.json")
+
+
+@pytest.fixture
+def items(load_fixture):
+    return [item for name in PAGES for item in load_fixture(name)["response"]]
+
+
+def _cup_replay(items):
+    """A Copa del Rey tie between the teams of 1208021, won 3-0 by the league loser"""
+    item = copy.deepcopy(next(item for item in items if item["fixture"]["id"] == 1208021))
+    item["fixture"]["id"] = 1300001
+    item["fixture"]["date"] = "2024-08-21T19:00:00+00:00"
+    item["league"].update(id=143, name="Copa del Rey", round="Round of 32")
+    item["teams"]["home"], item["teams"]["away"] = item["teams"]["away"], item["teams"]["home"]
+    item["goals"] = {"home": 3, "away": 0}
+    item["score"]["fulltime"] = {"home": 3, "away": 0}
+    return item
+
+
+async def _team_ids():
+    async with get_session_factory()() as session:
+        result = await session.execute(select(Team.external_id, Team.id))
+        return dict(result.all())
+
+
+async def _stats(team_id, season=2024):
+    async with get_session_factory()() as session:
+        return await session.get(TeamSeasonStats, (team_id, season))
+
+
+def test_build_stats_rows_aggregates_home_and_away_records():
+    updated_at = datetime(2024, 9, 1, tzinfo=timezone.utc)
+    frame = matches_to_frame([
+        (1, 140, 2024, pd.Timestamp("2024-08-01", tz="UTC"), 1, 2, 2, 0),
+        (2, 140, 2024, pd.Timestamp("2024-08-08", tz="UTC"), 3, 1, 1, 1),
+        (3, 140, 2024, pd.Timestamp("2024-08-15", tz="UTC"), 2, 1, 0, 3),
+        (4, 140, 2023, pd.Timestamp("2024-05-01", tz="UTC"), 1, 2, 0, 4),
+    ])
+
+    rows = {(row["team_id"], row["season"]): row for row in build_stats_rows(frame, {(1, 2024), (4, 2024)}, updated_at)}
+
+    team = rows[(1, 2024)]
+    assert (team["home_matches_played"], team["home_wins"], team["home_goals_scored"], team["home_goals_conceded"]) == (1, 1, 2, 0)
+    assert (team["away_matches_played"], team["away_wins"], team["away_draws"]) == (2, 1, 1)
+    assert (team["away_goals_scored"], team["away_goals_conceded"]) == (4, 1)
+    assert team["clean_sheets"] == 2
+    assert team["form"] == "WDW"
+    assert (team["goals_last_5"], team["conceded_last_5"]) == (6, 1)
+    assert team["updated_at"] == updated_at
+
+    # No completed matches that season
+    assert rows[(4, 2024)]["form"] == ""
+    assert rows[(4, 2024)]["home_matches_played"] == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_aggregates_league_fixtures_only(db, items):
+    async with get_session_factory()() as session:
+        changes = await upsert_fixtures(session, [*items, _cup_replay(items)])
+        await session.commit()
+        keys = touched_team_seasons(changes.matches)
+        written = await refresh_team_stats(session, keys)
+        await session.commit()
+
+    teams = await _team_ids()
+    assert (teams[541], 2024) in keys
+    assert written == 8
+
+    winner = await _stats(teams[529])
+    assert (winner.matches_played, winner.points, winner.form) == (1, 3, "W")
+    assert (winner.goals_scored, winner.goals_conceded) == (2, 1)
+
+    loser = await _stats(teams[541])
+    assert (loser.matches_played, loser.points, loser.form) == (1, 0, "L")
+    assert loser.home_matches_played == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_overwrites_a_corrected_result(db, items):
+    async with get_session_factory()() as session:
+        changes = await upsert_fixtures(session, items)
+        await session.commit()
+        await refresh_team_stats(session, touched_team_seasons(changes.matches))
+        await session.commit()
+
+    corrected = copy.deepcopy(next(item for item in items if item["fixture"]["id"] == 1208021))
+    corrected["goals"] = {"home": 1, "away": 1}
+    corrected["score"]["fulltime"] = {"home": 1, "away": 1}
+    async with get_session_factory()() as session:
+        changes = await upsert_fixtures(session, [corrected])
+        await session.commit()
+        await refresh_team_stats(session, touched_team_seasons(changes.matches))
+        await session.commit()
+
+    teams = await _team_ids()
+    stats = await _stats(teams[529])
+    assert (stats.matches_played, stats.draws, stats.points, stats.form) == (1, 1, 1, "D")
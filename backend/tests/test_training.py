@@ -0,0 +1,108 @@
+"""Training feature matrix refreshes and walk-forward folds"""
+
+import copy
+
+import numpy as np
+import pytest
+
+from app.db.session import get_session_factory
+from app.ml import elo
+from app.ml.feature_store import FeatureStore
+from app.ml.training import walk_forward_splits
+from app.services.ingestion import upsert_fixtures
+
+PAGES = ("fixtures_la_liga_2024_page1.json", "fixtures_la_liga_2024_page2.json")
+
+
+def _dates(*days_and_counts):
+    """Chronological match dates, ``count`` matches on each ``day``"""
+    return np.array(
+        [np.datetime64(f"2024-08-{day:02d}T{18 + i % 4:02d}:00") for day, count in days_and_counts for i in range(count)],
+        dtype="datetime64[ns]",
+    )
+
+
+def test_walk_forward_splits_expand_and_never_split_a_day():
+    dates = _dates((1, 4), (2, 4), (3, 4), (4, 4), (5, 4))
+
+    splits = walk_forward_splits(dates, n_splits=2, min_train=6)
+
+    # Cut-offs at rows 6 and 13 move back to the first match of their day
+    assert splits == [(4, 12), (12, 20)]
+    for train_end, test_end in splits:
+        assert dates[train_end - 1].astype("datetime64[D]") < dates[train_end].astype("datetime64[D]")
+
+
+def test_walk_forward_splits_need_more_than_min_train():
+    assert walk_forward_splits(_dates((1, 4)), n_splits=3, min_train=4) == []
+    # Every match on one day leaves no cut-off with data on both sides
+    assert walk_forward_splits(_dates((1, 10)), n_splits=3, min_train=2) == []
+
+
+@pytest.fixture
+def items(load_fixture):
+    return {item["fixture"]["id"]: item for name in PAGES for item in load_fixture(name)["response"]}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(elo, "_engine", None)
+    return FeatureStore(str(tmp_path))
+
+
+async def _upsert(items):
+    async with get_session_factory()() as session:
+        await upsert_fixtures(session, items)
+        await session.commit()
+
+
+async def _refresh(store):
+    async with get_session_factory()() as session:
+        return await store.refresh(session)
+
+
+async def _rebuild(store):
+    async with get_session_factory()() as session:
+        return await store.rebuild(session)
+
+
+def _finished(item, home, away):
+    item = copy.deepcopy(item)
+    item["fixture"]["status"]["short"] = "FT"
+    item["goals"] = {"home": home, "away": away}
+    return item
+
+
+@pytest.mark.asyncio
+async def test_refresh_appends_new_results_like_a_rebuild(db, items, store, tmp_path):
+    await _upsert(list(items.values()))
+    first = await _refresh(store)
+    assert len(first) == 4
+
+    # Nothing changed since the watermark: the stored matrix is reused
+    assert (await _refresh(store)).path == first.path
+
+    await _upsert([_finished(items[1208025], 2, 0)])
+    appended = await _refresh(store)
+
+    assert len(appended) == 5
+    assert appended.watermark > first.watermark
+    rebuilt = await _rebuild(FeatureStore(str(tmp_path / "rebuilt")))
+    np.testing.assert_array_equal(appended.match_ids, rebuilt.match_ids)
+    np.testing.assert_array_equal(appended.y, rebuilt.y)
+    np.testing.assert_allclose(appended.X, rebuilt.X)
+
+
+@pytest.mark.asyncio
+async def test_refresh_rebuilds_when_a_stored_result_changes(db, items, store):
+    await _upsert(list(items.values()))
+    first = await _refresh(store)
+
+    corrected = _finished(items[1208021], 0, 1)
+    await _upsert([corrected])
+    refreshed = await _refresh(store)
+
+    assert refreshed.path != first.path
+    assert len(refreshed) == 4
+    row = list(refreshed.match_ids).index(list(first.match_ids)[0])
+    assert (first.y[row], refreshed.y[row]) == (0, 2)  # home win corrected to an away win